@@ -3,15 +3,37 @@ from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from .models import db
 from .routes import api
-from .database import init_db, verificar_conexao  # Importa as funções de inicialização e verificação
-from config import Config
+from . import resumos  # Registra os eventos que mantêm resumos_mensais
+from . import arvore  # Registra os eventos que mantêm categorias_caminhos
+from . import busca  # Cria o índice de busca textual junto com a tabela transacoes
+from .database import init_db  # Importa a função de inicialização do banco
+from .cache import init_cache
+from .arquivo import init_arquivo
+from .metricas import init_metricas
+from .serializacao import CodificadorJSON
+from config import obter_config
 
-def create_app():
+def create_app(config=None):
+    """Cria a aplicação com o perfil de DB_PERFIL.
+
+    ``config`` (dict ou objeto de configuração) sobrescreve o perfil; testes
+    e benchmarks usam, por exemplo,
+    ``create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'})`` para ter uma
+    instância isolada com banco em memória.
+    """
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.json_encoder = CodificadorJSON  # orjson e valores monetários exatos (ver api/serializacao.py)
+    app.config.from_object(obter_config())
+    if isinstance(config, dict):
+        app.config.from_mapping(config)
+    elif config is not None:
+        app.config.from_object(config)
     
     # Inicializando extensões
     init_db(app)  # Inicializa o banco de dados
+    init_cache(app)  # Cache de respostas dos relatórios e listagens
+    init_arquivo(app)  # Data de corte do arquivo de transações, em memória
+    init_metricas(app)  # GET /metrics (Prometheus)
     jwt = JWTManager(app)
     CORS(app)
     
@@ -22,11 +44,3 @@ def create_app():
 
 # Criar uma instância do aplicativo
 app = create_app()
-
-# Verificar conexões ativas antes de cada requisição
-@app.before_request
-def before_request():
-    verificar_conexao()  # Verifica e fecha a conexão se necessário
-
-if __name__ == '__main__':
-    app.run(debug=True) 
\ No newline at end of file
@@ -0,0 +1,157 @@
+"""Arquivo das transações de anos encerrados (``transacoes_arquivo``).
+
+``python manutencao.py arquivar <ano>`` move para ``transacoes_arquivo`` as
+transações até o fim de ``<ano>``, um ano por transação do banco: INSERT ...
+SELECT no arquivo, DELETE pela conexão e o registro em ``arquivamentos``.
+Como o DELETE é feito fora da sessão, ``resumos_mensais`` continua com os
+totais dos anos arquivados, que passam a ser o resumo compacto desses anos.
+
+Os relatórios combinam as duas tabelas sem mudar a resposta: os meses
+completos já vêm dos resumos e, nas leituras de transações,
+``fonte_transacoes`` devolve ``transacoes`` quando o intervalo começa depois
+do último ano arquivado e o UNION ALL das duas tabelas quando não. A
+listagem e a exportação também leem as duas tabelas (``tabelas_transacoes``),
+com os filtros aplicados em cada uma. A busca textual só alcança as
+transações vivas e sinaliza na resposta quando o período inclui anos
+arquivados. Edição e operações em massa trabalham só com ``transacoes``; as
+arquivadas são somente leitura. Transações lançadas depois em um ano já
+arquivado ficam em ``transacoes`` e também entram nos relatórios.
+
+A data de corte fica em memória em cada processo (``CorteArquivo``), para
+que os relatórios continuem com um único comando SQL, e é relida a cada
+``ARQUIVO_CORTE_TTL_S`` segundos. ``arquivar`` a atualiza no próprio
+processo; os workers da API passam a ler o arquivo em até
+``ARQUIVO_CORTE_TTL_S`` segundos depois de um ``manutencao.py arquivar``
+(ou logo após recarregá-los, ``kill -HUP`` no gunicorn).
+"""
+import time
+from datetime import date, datetime
+from flask import current_app, has_app_context
+from sqlalchemy import func, select, union_all
+from .models import Transacao, TransacaoArquivada, Arquivamento
+from .resumos import SEM_CATEGORIA, novos_deltas, agregar_totais, aplicar_deltas
+
+_transacoes = Transacao.__table__
+_arquivo = TransacaoArquivada.__table__
+_arquivamentos = Arquivamento.__table__
+_COLUNAS = [c.name for c in _arquivo.c]
+
+# Colunas lidas pelos relatórios nas duas tabelas
+COLUNAS_RELATORIOS = ('id', 'usuario_id', 'data_transacao', 'tipo', 'valor', 'categoria_id')
+
+
+def data_corte(conexao):
+    """Primeiro dia ainda não arquivado (1º de janeiro após o último ano arquivado), ou None."""
+    ano = conexao.execute(select(func.max(_arquivamentos.c.ano))).scalar()
+    return None if ano is None else date(ano + 1, 1, 1)
+
+
+class CorteArquivo:
+    """Data de corte guardada no processo e relida após ``validade_s`` segundos."""
+
+    def __init__(self, validade_s=300.0):
+        self.validade_s = validade_s
+        self._atual = None  # (corte, instante da leitura)
+
+    def obter(self, conexao):
+        atual = self._atual
+        if atual is None or time.monotonic() - atual[1] >= self.validade_s:
+            return self.atualizar(data_corte(conexao))
+        return atual[0]
+
+    def atualizar(self, corte):
+        self._atual = (corte, time.monotonic())
+        return corte
+
+
+def init_arquivo(app):
+    """Registra na aplicação o cache da data de corte do arquivo."""
+    app.extensions['corte_arquivo'] = CorteArquivo(app.config.get('ARQUIVO_CORTE_TTL_S', 300.0))
+
+
+def _corte_em_cache(conexao):
+    """Data de corte pelo cache da aplicação (consulta direta fora de um contexto)."""
+    cache = current_app.extensions.get('corte_arquivo') if has_app_context() else None
+    return data_corte(conexao) if cache is None else cache.obter(conexao)
+
+
+def arquivo_no_periodo(conexao, data_inicio=None):
+    """Data de corte se um período iniciado em ``data_inicio`` alcança anos arquivados, senão None."""
+    corte = _corte_em_cache(conexao)
+    if corte is None or (data_inicio is not None and data_inicio >= corte):
+        return None
+    return corte
+
+
+def tabelas_transacoes(conexao, data_inicio=None):
+    """Tabelas com as transações a partir de ``data_inicio``: ``transacoes`` e, se preciso, o arquivo."""
+    if arquivo_no_periodo(conexao, data_inicio) is None:
+        return (_transacoes,)
+    return (_transacoes, _arquivo)
+
+
+def fonte_transacoes(conexao, data_inicio=None):
+    """Tabela das transações lidas a partir de ``data_inicio`` (None: todo o histórico).
+
+    ``transacoes`` se nada antes de ``data_inicio`` foi arquivado; senão
+    uma subconsulta com o UNION ALL de ``transacoes`` e
+    ``transacoes_arquivo``. Nos dois casos as colunas de
+    ``COLUNAS_RELATORIOS`` ficam em ``.c``.
+    """
+    tabelas = tabelas_transacoes(conexao, data_inicio)
+    if len(tabelas) == 1:
+        return _transacoes
+    return union_all(*(
+        select(*(tabela.c[nome] for nome in COLUNAS_RELATORIOS)) for tabela in tabelas
+    )).subquery('transacoes_com_arquivo')
+
+
+def arquivar(engine, ano):
+    """Move as transações até 31/12 de ``ano`` para o arquivo.
+
+    Cada ano ainda não arquivado é movido em uma transação do banco.
+    Retorna a lista de (ano, transações movidas). Levanta ValueError se o
+    ano não estiver encerrado ou já tiver sido arquivado.
+    """
+    if ano >= date.today().year:
+        raise ValueError('Só anos encerrados podem ser arquivados.')
+    with engine.connect() as conexao:
+        corte = data_corte(conexao)
+        primeira = conexao.execute(select(func.min(_transacoes.c.data_transacao))).scalar()
+    if corte is not None and ano < corte.year:
+        raise ValueError(f'Os anos até {corte.year - 1} já estão arquivados.')
+
+    inicio = corte.year if corte is not None else min(primeira.year if primeira else ano, ano)
+    movidos = []
+    for atual in range(inicio, ano + 1):
+        # Tudo antes do fim do ano, inclusive lançamentos tardios em anos já arquivados
+        condicao = _transacoes.c.data_transacao < date(atual + 1, 1, 1)
+        with engine.begin() as conexao:
+            conexao.execute(_arquivo.insert().from_select(
+                _COLUNAS, select(*(_transacoes.c[nome] for nome in _COLUNAS)).where(condicao)
+            ))
+            quantidade = conexao.execute(_transacoes.delete().where(condicao)).rowcount
+            conexao.execute(_arquivamentos.insert().values(
+                ano=atual, transacoes=quantidade, arquivado_em=datetime.utcnow()
+            ))
+        movidos.append((atual, quantidade))
+    if has_app_context() and current_app.extensions.get('corte_arquivo') is not None:
+        current_app.extensions['corte_arquivo'].atualizar(date(ano + 1, 1, 1))
+    return movidos
+
+
+def desvincular_categorias(conexao, ids):
+    """Deixa sem categoria as transações arquivadas das categorias ``ids``.
+
+    O UPDATE é Core, então os resumos mensais são ajustados aqui: os totais
+    saem das categorias e vão para ``SEM_CATEGORIA``.
+    """
+    deltas = novos_deltas()
+    agregar_totais(conexao, _arquivo, _arquivo.c.categoria_id.in_(ids), deltas, -1)
+    if not deltas:
+        return
+    for (usuario_id, mes, _, tipo), (total, quantidade) in list(deltas.items()):
+        deltas[(usuario_id, mes, SEM_CATEGORIA, tipo)][0] -= total
+        deltas[(usuario_id, mes, SEM_CATEGORIA, tipo)][1] -= quantidade
+    aplicar_deltas(conexao, deltas)
+    conexao.execute(_arquivo.update().where(_arquivo.c.categoria_id.in_(ids)).values(categoria_id=None))
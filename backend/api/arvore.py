@@ -0,0 +1,140 @@
+"""Manutenção da tabela de fechamento ``categorias_caminhos``.
+
+Os eventos de mapper de ``Categoria`` ajustam os caminhos no mesmo flush:
+
+* criação: o par (categoria, categoria) e um par para cada ancestral do pai;
+* mudança de ``categoria_pai_id``: os caminhos da subárvore até os antigos
+  ancestrais são removidos e recriados a partir dos ancestrais do novo pai;
+* remoção: os pares da categoria. Antes disso o ORM desvincula as
+  subcategorias (``categoria_pai_id`` NULL), movendo-as para a raiz.
+
+``remover_subarvore`` apaga uma categoria com todas as descendentes; é o
+que fazem a rota DELETE /categorias/<id> e ``Categoria.deletar_categoria``.
+Escritas fora da sessão (SQL manual, ``insert()`` Core em ``categorias``)
+não são vistas; ``reconstruir_caminhos`` recalcula a tabela a partir de
+``categoria_pai_id``.
+"""
+from sqlalchemy import event, inspect, literal, or_, select, true
+from .models import Categoria, CategoriaCaminho, Transacao
+from .arquivo import desvincular_categorias
+
+_caminhos = CategoriaCaminho.__table__
+_categorias = Categoria.__table__
+_COLUNAS = ['ancestral_id', 'descendente_id', 'profundidade']
+
+
+def _inserir_caminhos(conexao, categoria_id, pai_id):
+    conexao.execute(_caminhos.insert(), {
+        'ancestral_id': categoria_id, 'descendente_id': categoria_id, 'profundidade': 0
+    })
+    if pai_id is not None:
+        conexao.execute(_caminhos.insert().from_select(_COLUNAS, select(
+            _caminhos.c.ancestral_id, literal(categoria_id), _caminhos.c.profundidade + 1
+        ).where(_caminhos.c.descendente_id == pai_id)))
+
+
+def _mover(conexao, categoria_id, novo_pai_id):
+    # Ids lidos antes do DELETE: o MySQL não aceita subconsulta na tabela alterada
+    subarvore = conexao.execute(select(_caminhos.c.descendente_id).where(
+        _caminhos.c.ancestral_id == categoria_id
+    )).scalars().all()
+    ancestrais = conexao.execute(select(_caminhos.c.ancestral_id).where(
+        _caminhos.c.descendente_id == categoria_id, _caminhos.c.ancestral_id != categoria_id
+    )).scalars().all()
+    if ancestrais:
+        conexao.execute(_caminhos.delete().where(
+            _caminhos.c.descendente_id.in_(subarvore), _caminhos.c.ancestral_id.in_(ancestrais)
+        ))
+    if novo_pai_id is not None:
+        # Produto dos ancestrais do novo pai pela subárvore da categoria
+        acima, abaixo = _caminhos.alias('acima'), _caminhos.alias('abaixo')
+        conexao.execute(_caminhos.insert().from_select(_COLUNAS, select(
+            acima.c.ancestral_id, abaixo.c.descendente_id,
+            acima.c.profundidade + abaixo.c.profundidade + 1
+        ).select_from(acima.join(abaixo, true())).where(
+            acima.c.descendente_id == novo_pai_id, abaixo.c.ancestral_id == categoria_id
+        )))
+
+
+@event.listens_for(Categoria, 'after_insert')
+def _apos_inserir(mapper, conexao, target):
+    _inserir_caminhos(conexao, target.id, target.categoria_pai_id)
+
+
+@event.listens_for(Categoria, 'after_update')
+def _apos_atualizar(mapper, conexao, target):
+    if inspect(target).attrs.categoria_pai_id.history.has_changes():
+        _mover(conexao, target.id, target.categoria_pai_id)
+
+
+@event.listens_for(Categoria, 'before_delete')
+def _antes_remover(mapper, conexao, target):
+    conexao.execute(_caminhos.delete().where(or_(
+        _caminhos.c.ancestral_id == target.id, _caminhos.c.descendente_id == target.id
+    )))
+
+
+def eh_descendente(session, categoria_id, ancestral_id):
+    """Indica se ``categoria_id`` está na subárvore de ``ancestral_id`` (inclusive)."""
+    return session.execute(select(_caminhos.c.profundidade).where(
+        _caminhos.c.ancestral_id == ancestral_id, _caminhos.c.descendente_id == categoria_id
+    )).first() is not None
+
+
+def remover_subarvore(session, categoria_id):
+    """Remove a categoria e todas as descendentes; as transações delas ficam sem categoria.
+
+    Vale também para as transações arquivadas (``api/arquivo.py``).
+
+    Retorna a quantidade de categorias removidas.
+    """
+    niveis = session.execute(select(_caminhos.c.descendente_id, _caminhos.c.profundidade).where(
+        _caminhos.c.ancestral_id == categoria_id
+    )).all()
+    ids = [id for id, _ in niveis]
+    if not ids:
+        return 0
+
+    # UPDATE pela sessão para que os resumos mensais sejam ajustados
+    session.query(Transacao).filter(Transacao.categoria_id.in_(ids)).update(
+        {'categoria_id': None}, synchronize_session=False
+    )
+    desvincular_categorias(session.connection(), ids)
+    session.execute(_caminhos.delete().where(_caminhos.c.descendente_id.in_(ids)))
+    # Das folhas para a raiz: o InnoDB verifica o FK categoria_pai_id linha a linha
+    for profundidade in sorted({p for _, p in niveis}, reverse=True):
+        session.execute(_categorias.delete().where(
+            _categorias.c.id.in_([id for id, p in niveis if p == profundidade])
+        ))
+    return len(ids)
+
+
+def reconstruir_caminhos(conexao, usuario_id=None):
+    """Recalcula os caminhos a partir de ``categoria_pai_id`` (de um usuário ou de todos).
+
+    Um INSERT ... SELECT por nível da árvore, sem percorrer as categorias em Python.
+    """
+    categorias = select(_categorias.c.id)
+    if usuario_id is not None:
+        categorias = categorias.where(_categorias.c.usuario_id == usuario_id)
+    conexao.execute(_caminhos.delete().where(_caminhos.c.descendente_id.in_(categorias)))
+    conexao.execute(_caminhos.insert().from_select(_COLUNAS, select(
+        _categorias.c.id, _categorias.c.id, literal(0)
+    ).where(_categorias.c.id.in_(categorias))))
+
+    filhas = _categorias.alias('filhas')
+    profundidade = 0
+    while True:
+        # Estende cada caminho da profundidade atual até as filhas do descendente
+        consulta = select(
+            _caminhos.c.ancestral_id, filhas.c.id, literal(profundidade + 1)
+        ).select_from(
+            _caminhos.join(filhas, filhas.c.categoria_pai_id == _caminhos.c.descendente_id)
+        ).where(_caminhos.c.profundidade == profundidade, filhas.c.id.in_(categorias))
+        # Um caminho que volta ao próprio ancestral é um ciclo; é o primeiro
+        # par repetido a surgir, antes que o INSERT viole a chave primária
+        if conexao.execute(consulta.where(filhas.c.id == _caminhos.c.ancestral_id).limit(1)).first():
+            raise ValueError('Ciclo em categoria_pai_id: a árvore de categorias é inválida.')
+        if not conexao.execute(_caminhos.insert().from_select(_COLUNAS, consulta)).rowcount:
+            break
+        profundidade += 1
@@ -0,0 +1,167 @@
+"""Busca textual na descrição das transações (``q=`` em ``GET /api/transacoes``).
+
+* MariaDB: tabela ``transacoes_busca`` (id, descricao) com índice
+  ``FULLTEXT`` e ``MATCH ... AGAINST`` em modo booleano. O índice não fica
+  em ``transacoes`` porque tabelas particionadas não aceitam FULLTEXT (ver
+  ``api/particoes.py``);
+* SQLite: tabela FTS5 ``transacoes_fts`` de conteúdo externo (só o índice,
+  o texto continua em ``transacoes``).
+
+Nos dois bancos a tabela de busca é mantida por triggers em
+``transacoes``, de modo que também as cargas por ``insert()`` Core e SQL
+manual são indexadas.
+
+O texto do usuário nunca chega ao banco como está: ``interpretar_busca``
+extrai palavras (``mercado``), prefixos (``super*``) e frases entre aspas
+(``"conta de luz"``), todos obrigatórios; os demais caracteres são
+ignorados. Cada banco recebe a expressão na sua sintaxe.
+"""
+import re
+from collections import namedtuple
+from sqlalchemy import event, inspect, literal_column, column, table
+from .models import Transacao
+from .migracoes.ddl import remover_indice
+
+MAX_TERMOS = 16
+MAX_CARACTERES = 200
+
+TABELA_MARIADB = 'transacoes_busca'
+INDICE_MARIADB = 'ft_transacoes_busca'
+INDICE_ANTIGO_MARIADB = 'ft_transacoes_descricao'  # Em transacoes, até a migração 0005
+TABELA_FTS = 'transacoes_fts'
+
+# Triggers de um comando só: dispensam BEGIN ... END e DELIMITER no cliente
+_DDL_MARIADB = [
+    f"""CREATE TABLE IF NOT EXISTS {TABELA_MARIADB} (
+        id INT PRIMARY KEY,
+        descricao TEXT,
+        FULLTEXT INDEX {INDICE_MARIADB} (descricao)
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS transacoes_busca_inserir AFTER INSERT ON transacoes FOR EACH ROW
+        INSERT INTO {TABELA_MARIADB} (id, descricao) VALUES (NEW.id, NEW.descricao)""",
+    f"""CREATE TRIGGER IF NOT EXISTS transacoes_busca_remover AFTER DELETE ON transacoes FOR EACH ROW
+        DELETE FROM {TABELA_MARIADB} WHERE id = OLD.id""",
+    f"""CREATE TRIGGER IF NOT EXISTS transacoes_busca_atualizar AFTER UPDATE ON transacoes FOR EACH ROW
+        UPDATE {TABELA_MARIADB} SET descricao = NEW.descricao
+        WHERE id = NEW.id AND NOT (descricao <=> NEW.descricao)""",
+]
+
+# remove_diacritics: "acucar" encontra "Açúcar", como a collation do MariaDB
+_DDL_SQLITE = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_FTS} USING fts5(
+        descricao, content='transacoes', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS transacoes_fts_inserir AFTER INSERT ON transacoes BEGIN
+        INSERT INTO {TABELA_FTS}(rowid, descricao) VALUES (new.id, new.descricao);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS transacoes_fts_remover AFTER DELETE ON transacoes BEGIN
+        INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, descricao) VALUES ('delete', old.id, old.descricao);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS transacoes_fts_atualizar AFTER UPDATE OF descricao ON transacoes BEGIN
+        INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, descricao) VALUES ('delete', old.id, old.descricao);
+        INSERT INTO {TABELA_FTS}(rowid, descricao) VALUES (new.id, new.descricao);
+    END""",
+]
+
+_fts = table(TABELA_FTS, column('rowid'), column('rank'))
+_busca_mariadb = table(TABELA_MARIADB, column('id'), column('descricao'))
+
+_TERMO = re.compile(r'"([^"]*)"?|(\w+)(\*)?')
+
+Termo = namedtuple('Termo', 'texto tipo')  # tipo: palavra, prefixo ou frase
+
+
+class BuscaInvalida(ValueError):
+    """Erro lançado quando o parâmetro ``q`` não tem termos pesquisáveis."""
+
+
+def interpretar_busca(texto):
+    """Converte o texto digitado na tupla de termos da busca.
+
+    Levanta BuscaInvalida se não houver nenhuma palavra ou se o texto
+    exceder os limites de tamanho.
+    """
+    if len(texto) > MAX_CARACTERES:
+        raise BuscaInvalida(f'A busca deve ter no máximo {MAX_CARACTERES} caracteres.')
+    termos = []
+    for encontrado in _TERMO.finditer(texto):
+        frase, palavra, prefixo = encontrado.groups()
+        if palavra:
+            termos.append(Termo(palavra, 'prefixo' if prefixo else 'palavra'))
+            continue
+        palavras = re.findall(r'\w+', frase or '')
+        if len(palavras) == 1:
+            termos.append(Termo(palavras[0], 'palavra'))
+        elif palavras:
+            termos.append(Termo(' '.join(palavras), 'frase'))
+    if not termos:
+        raise BuscaInvalida('A busca deve conter ao menos uma palavra.')
+    if len(termos) > MAX_TERMOS:
+        raise BuscaInvalida(f'A busca aceita no máximo {MAX_TERMOS} termos.')
+    return tuple(termos)
+
+
+def expressao_booleana(termos):
+    """Expressão do ``AGAINST (... IN BOOLEAN MODE)`` do MariaDB."""
+    partes = []
+    for termo in termos:
+        if termo.tipo == 'frase':
+            partes.append(f'+"{termo.texto}"')
+        else:
+            partes.append(f"+{termo.texto}{'*' if termo.tipo == 'prefixo' else ''}")
+    return ' '.join(partes)
+
+
+def expressao_fts5(termos):
+    """Expressão do ``MATCH`` do FTS5: strings entre aspas, unidas por AND implícito."""
+    return ' '.join(
+        f'"{termo.texto}"' + ('*' if termo.tipo == 'prefixo' else '') for termo in termos
+    )
+
+
+def aplicar_busca(consulta, dialeto, termos):
+    """Restringe o ``select()`` às transações encontradas.
+
+    Retorna (consulta, relevancia), em que ``relevancia`` é a expressão de
+    pontuação (maior é melhor) para o ORDER BY.
+    """
+    if dialeto == 'sqlite':
+        consulta = consulta.join(_fts, _fts.c.rowid == Transacao.id).where(
+            literal_column(TABELA_FTS).op('MATCH')(expressao_fts5(termos))
+        )
+        return consulta, -_fts.c.rank  # rank é o bm25(), negativo
+    correspondencia = _busca_mariadb.c.descricao.match(expressao_booleana(termos))
+    consulta = consulta.join(_busca_mariadb, _busca_mariadb.c.id == Transacao.id)
+    # O mesmo MATCH no WHERE e no SELECT é calculado uma única vez
+    return consulta.where(correspondencia), correspondencia
+
+
+def criar_indice_busca(conexao):
+    """Cria o índice de busca do banco da conexão, se ainda não existir.
+
+    Uma tabela de busca criada sobre transações já existentes é
+    preenchida com elas (``rebuild`` no FTS5). No MariaDB o antigo índice
+    FULLTEXT em ``transacoes`` é removido.
+    """
+    if conexao.dialect.name == 'sqlite':
+        existia = inspect(conexao).has_table(TABELA_FTS)
+        for ddl in _DDL_SQLITE:
+            conexao.exec_driver_sql(ddl)
+        if not existia:
+            conexao.exec_driver_sql(f"INSERT INTO {TABELA_FTS}({TABELA_FTS}) VALUES ('rebuild')")
+        return
+    existia = inspect(conexao).has_table(TABELA_MARIADB)
+    for ddl in _DDL_MARIADB:
+        conexao.exec_driver_sql(ddl)
+    if not existia:
+        conexao.exec_driver_sql(
+            f'INSERT INTO {TABELA_MARIADB} (id, descricao) SELECT id, descricao FROM transacoes'
+        )
+    remover_indice(conexao, 'transacoes', INDICE_ANTIGO_MARIADB)
+
+
+@event.listens_for(Transacao.__table__, 'after_create')
+def _apos_criar_transacoes(tabela, conexao, **kw):
+    # db.create_all() (perfil SQLite, testes) cria o índice junto com a tabela
+    criar_indice_busca(conexao)
@@ -0,0 +1,229 @@
+"""Cache de respostas por usuário com invalidação por versão de dados.
+
+Cada usuário tem uma versão de dados incrementada a cada escrita bem
+sucedida. A chave do cache e o ETag incluem essa versão, de modo que uma
+escrita torna todas as respostas anteriores do usuário inalcançáveis sem
+precisar apagá-las. Com ``If-None-Match`` igual ao ETag atual a resposta
+304 é devolvida sem consultar o banco.
+
+Backends disponíveis (``CACHE_BACKEND``):
+
+* ``memoria``: LRU no processo, limitado por quantidade de itens e TTL;
+  só serve para um processo (``run.py`` ou ``WEB_WORKERS=1``), pois uma
+  escrita não invalida o cache dos outros workers;
+* ``sqlite``: arquivo SQLite local compartilhado entre os workers do host
+  (o padrão do ``gunicorn.conf.py`` com mais de um worker);
+* ``nenhum``: desativa o cache.
+
+As versões começam de uma geração única do cache (o processo, no backend
+em memória, ou o arquivo, no SQLite), então um ETag emitido por outro
+worker ou antes de um reinício nunca coincide com o atual.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, request, make_response
+from flask_jwt_extended import get_jwt_identity
+from .perfilador import perfilando
+from .serializacao import CABECALHO_FORMATO
+
+
+class CacheMemoria:
+    """LRU em memória, seguro para threads, com limite de itens e TTL."""
+
+    def __init__(self, max_itens=1024, ttl=300):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self._itens = OrderedDict()
+        self._versoes = {}
+        self._geracao = f'{os.getpid()}-{time.time_ns()}'
+        self._lock = threading.Lock()
+
+    def versao(self, usuario_id):
+        return f'{self._geracao}.{self._versoes.get(usuario_id, 0)}'
+
+    def incrementar_versao(self, usuario_id):
+        with self._lock:
+            self._versoes[usuario_id] = self._versoes.get(usuario_id, 0) + 1
+
+    def obter(self, chave):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return None
+            valor, expira = item
+            if expira < time.monotonic():
+                del self._itens[chave]
+                return None
+            self._itens.move_to_end(chave)
+            return valor
+
+    def gravar(self, chave, valor):
+        with self._lock:
+            self._itens[chave] = (valor, time.monotonic() + self.ttl)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+
+class CacheSQLite:
+    """Cache em um arquivo SQLite local, compartilhado entre processos.
+
+    As versões de dados ficam no mesmo arquivo, então uma escrita atendida
+    por um worker invalida o cache de todos os outros do mesmo host.
+    """
+
+    _LIMPEZA_A_CADA = 100  # gravações entre remoções de itens expirados/excedentes
+
+    def __init__(self, caminho, max_itens=10000, ttl=300):
+        self.caminho = caminho
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self._local = threading.local()
+        self._gravacoes = 0
+        with self._conexao() as conexao:
+            conexao.execute(
+                'CREATE TABLE IF NOT EXISTS respostas '
+                '(chave TEXT PRIMARY KEY, valor BLOB NOT NULL, expira REAL NOT NULL)'
+            )
+            conexao.execute('CREATE INDEX IF NOT EXISTS ix_respostas_expira ON respostas (expira)')
+            conexao.execute(
+                'CREATE TABLE IF NOT EXISTS versoes '
+                '(usuario_id INTEGER PRIMARY KEY, versao INTEGER NOT NULL)'
+            )
+            # Geração do arquivo: o primeiro worker a criá-lo define, os demais a leem
+            conexao.execute(
+                'CREATE TABLE IF NOT EXISTS geracao (id INTEGER PRIMARY KEY CHECK (id = 1), valor TEXT NOT NULL)'
+            )
+            conexao.execute(
+                'INSERT OR IGNORE INTO geracao (id, valor) VALUES (1, ?)', (f'{os.getpid()}-{time.time_ns()}',)
+            )
+            self._geracao = conexao.execute('SELECT valor FROM geracao').fetchone()[0]
+
+    def _conexao(self):
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=5, isolation_level=None)
+            conexao.execute('PRAGMA journal_mode=WAL')
+            conexao.execute('PRAGMA synchronous=NORMAL')
+            self._local.conexao = conexao
+        return conexao
+
+    def versao(self, usuario_id):
+        linha = self._conexao().execute(
+            'SELECT versao FROM versoes WHERE usuario_id = ?', (usuario_id,)
+        ).fetchone()
+        return f'{self._geracao}.{linha[0] if linha else 0}'
+
+    def incrementar_versao(self, usuario_id):
+        self._conexao().execute(
+            'INSERT INTO versoes (usuario_id, versao) VALUES (?, 1) '
+            'ON CONFLICT(usuario_id) DO UPDATE SET versao = versao + 1',
+            (usuario_id,)
+        )
+
+    def obter(self, chave):
+        linha = self._conexao().execute(
+            'SELECT valor FROM respostas WHERE chave = ? AND expira >= ?', (chave, time.time())
+        ).fetchone()
+        return linha[0] if linha else None
+
+    def gravar(self, chave, valor):
+        conexao = self._conexao()
+        conexao.execute(
+            'INSERT OR REPLACE INTO respostas (chave, valor, expira) VALUES (?, ?, ?)',
+            (chave, valor, time.time() + self.ttl)
+        )
+        self._gravacoes += 1
+        if self._gravacoes % self._LIMPEZA_A_CADA == 0:
+            conexao.execute('DELETE FROM respostas WHERE expira < ?', (time.time(),))
+            conexao.execute(
+                'DELETE FROM respostas WHERE chave IN (SELECT chave FROM respostas '
+                'ORDER BY expira DESC LIMIT -1 OFFSET ?)', (self.max_itens,)
+            )
+
+
+def init_cache(app):
+    """Cria o backend de cache configurado e o registra na aplicação."""
+    backend = app.config.get('CACHE_BACKEND', 'memoria')
+    if backend == 'memoria':
+        cache = CacheMemoria(app.config['CACHE_MAX_ITENS'], app.config['CACHE_TTL'])
+    elif backend == 'sqlite':
+        cache = CacheSQLite(app.config['CACHE_CAMINHO'], app.config['CACHE_MAX_ITENS'], app.config['CACHE_TTL'])
+    elif backend == 'nenhum':
+        cache = None
+    else:
+        raise ValueError(f'CACHE_BACKEND inválido: {backend}')
+    app.extensions['cache_respostas'] = cache
+
+
+def _cache():
+    return current_app.extensions.get('cache_respostas')
+
+
+def invalidar_cache(usuario_id):
+    """Incrementa a versão de dados do usuário, invalidando suas respostas."""
+    cache = _cache()
+    if cache is not None and usuario_id is not None:
+        cache.incrementar_versao(usuario_id)
+
+
+def _chave_requisicao(usuario_id):
+    """Usuário, rota, argumentos normalizados (ordem não importa), Accept e formato dos valores.
+
+    O Accept e o X-Formato-Valores entram na chave porque a mesma rota pode
+    responder em outro formato (ex.: NDJSON, valores em centavos).
+    """
+    argumentos = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+    return (f"{usuario_id}:{request.path}?{argumentos}|{request.headers.get('Accept', '')}"
+            f"|{request.headers.get(CABECALHO_FORMATO, '')}")
+
+
+def em_cache(view=None, *, chave=None):
+    """Cacheia a resposta JSON de uma rota GET autenticada.
+
+    Deve ser aplicado abaixo de ``@jwt_required()``. ``chave`` é uma função
+    sem argumentos cujo resultado entra na chave e no ETag, para rotas que
+    dependem de algo além da requisição (ex.: a data de hoje):
+    ``@em_cache(chave=data_referencia)``.
+    """
+    if view is None:
+        return lambda view: em_cache(view, chave=chave)
+
+    @wraps(view)
+    def decorada(*args, **kwargs):
+        cache = _cache()
+        if cache is None or perfilando():
+            return view(*args, **kwargs)  # Um perfil precisa executar a rota de fato
+
+        usuario_id = get_jwt_identity()
+        # A versão é lida antes da consulta: uma escrita concorrente apenas
+        # deixa a resposta gravada com a versão antiga inalcançável
+        versao = cache.versao(usuario_id)
+        chave_cache = f'{_chave_requisicao(usuario_id)}#{versao}'
+        if chave is not None:
+            chave_cache = f'{chave_cache}#{chave()}'
+        etag = hashlib.sha1(chave_cache.encode()).hexdigest()[:24]
+
+        if etag in request.if_none_match:
+            resposta = make_response('', 304)
+        else:
+            corpo = cache.obter(chave_cache)
+            if corpo is not None:
+                resposta = make_response(corpo, 200)
+                resposta.mimetype = 'application/json'
+            else:
+                resposta = make_response(view(*args, **kwargs))
+                if resposta.status_code != 200 or resposta.is_streamed:
+                    return resposta
+                cache.gravar(chave_cache, resposta.get_data())
+
+        resposta.set_etag(etag)
+        resposta.headers['Cache-Control'] = 'private, no-cache'
+        resposta.vary.update(('Accept', CABECALHO_FORMATO))
+        return resposta
+    return decorada
@@ -0,0 +1,352 @@
+from sqlalchemy import func, case, select, union_all, and_, or_, literal, null
+from .models import Transacao, Categoria, CategoriaCaminho, ResumoMensal
+from .expressoes import inicio_periodo, dias_desde, centavos
+from .paginacao import filtro_apos_cursor
+from .resumos import dividir_periodo, SEM_CATEGORIA
+from .busca import aplicar_busca
+from .arquivo import fonte_transacoes, tabelas_transacoes
+
+
+def aplicar_filtros_transacoes(query, filtros, transacoes=Transacao.__table__):
+    """Aplica os filtros de listagem (datas, categoria e tipo) à consulta.
+
+    Aceita tanto ``Query`` do ORM quanto ``select()`` Core; ``transacoes``
+    é a tabela filtrada (``transacoes`` ou ``transacoes_arquivo``).
+    """
+    if 'data_inicio' in filtros:
+        query = query.filter(transacoes.c.data_transacao >= filtros['data_inicio'])
+    if 'data_fim' in filtros:
+        query = query.filter(transacoes.c.data_transacao <= filtros['data_fim'])
+    if 'categoria_id' in filtros:
+        query = query.filter(transacoes.c.categoria_id == filtros['categoria_id'])
+    if 'tipo' in filtros:
+        query = query.filter(transacoes.c.tipo == filtros['tipo'])
+    return query
+
+
+def consulta_selecao(session, usuario_id, ids=None, filtros=None):
+    """Transações do usuário selecionadas por lista de ids e/ou filtros."""
+    query = session.query(Transacao).filter(Transacao.usuario_id == usuario_id)
+    if ids is not None:
+        query = query.filter(Transacao.id.in_(ids))
+    if filtros:
+        query = aplicar_filtros_transacoes(query, filtros)
+    return query
+
+
+# Colunas serializadas pelas rotas de leitura; descricao é TEXT e
+# data_criacao não é exposta, então nada além disso é buscado
+COLUNAS_LISTAGEM = ('id', 'valor', 'tipo', 'descricao', 'data_transacao', 'categoria_id')
+COLUNAS_PERIODO = ('id', 'valor', 'tipo', 'data_transacao')
+
+
+def _selecionar(transacoes, colunas, usuario_id, filtros):
+    """SELECT das ``colunas`` de uma tabela de transações, com os filtros da listagem."""
+    consulta = select(*(transacoes.c[nome] for nome in colunas)).where(
+        transacoes.c.usuario_id == usuario_id
+    )
+    return aplicar_filtros_transacoes(consulta, filtros, transacoes)
+
+
+def consulta_listagem(session, usuario_id, filtros, cursor=None, limite=None):
+    """SELECT das colunas de listagem ordenado por (data_transacao, id).
+
+    ``cursor`` é a tupla (data_transacao, id) do último item já entregue.
+    Retorna um ``select()`` Core: as linhas vêm como tuplas, sem criar
+    objetos ``Transacao`` nem passar pelo identity map.
+
+    Se o período alcança anos arquivados, cada tabela é filtrada, ordenada
+    e limitada pelo próprio índice e o UNION ALL das duas partes é
+    reordenado; a página nunca lê mais que ``limite`` linhas de cada uma.
+    """
+    partes = []
+    for transacoes in tabelas_transacoes(session, filtros.get('data_inicio')):
+        consulta = _selecionar(transacoes, COLUNAS_LISTAGEM, usuario_id, filtros)
+        if cursor is not None:
+            consulta = consulta.where(filtro_apos_cursor(
+                transacoes.c.data_transacao, transacoes.c.id, *cursor
+            ))
+        partes.append(consulta)
+
+    if len(partes) == 1:
+        consulta, transacoes = partes[0], Transacao.__table__
+    else:
+        if limite is not None:
+            # Subconsultas: o SQLite não aceita ORDER BY/LIMIT em cada SELECT do UNION
+            partes = [select(parte.order_by(
+                parte.selected_columns.data_transacao, parte.selected_columns.id
+            ).limit(limite).subquery()) for parte in partes]
+        transacoes = union_all(*partes).subquery('transacoes_com_arquivo')
+        consulta = select(transacoes)
+    consulta = consulta.order_by(transacoes.c.data_transacao, transacoes.c.id)
+    if limite is not None:
+        consulta = consulta.limit(limite)
+    return consulta
+
+
+def consulta_busca(session, usuario_id, filtros, termos, posicao=0, limite=None):
+    """SELECT das colunas de listagem mais ``relevancia`` para a busca textual.
+
+    Ordenado da maior para a menor relevância (empates pelo id mais
+    recente); ``posicao`` é quantas linhas já foram entregues. Os demais
+    filtros da listagem são combinados com a busca. Só as transações vivas
+    são indexadas: as arquivadas ficam de fora (ver ``arquivo_no_periodo``).
+    """
+    consulta = _selecionar(Transacao.__table__, COLUNAS_LISTAGEM, usuario_id, filtros)
+    consulta, relevancia = aplicar_busca(consulta, session.connection().dialect.name, termos)
+    relevancia = relevancia.label('relevancia')  # O ORDER BY usa o rótulo, sem repetir o MATCH
+    consulta = consulta.add_columns(relevancia).order_by(relevancia.desc(), Transacao.id.desc())
+    if posicao:
+        consulta = consulta.offset(posicao)
+    if limite is not None:
+        consulta = consulta.limit(limite)
+    return consulta
+
+
+# Colunas de GET /api/transacoes/exportar, na ordem do arquivo (mais o nome da categoria)
+COLUNAS_EXPORTACAO = ('id', 'data_transacao', 'tipo', 'valor', 'descricao', 'categoria_id')
+
+
+def consulta_exportacao(session, usuario_id, filtros):
+    """SELECT da exportação: filtros da listagem e o nome da categoria no mesmo JOIN.
+
+    Inclui as transações arquivadas quando o período alcança anos arquivados.
+    """
+    tabelas = tabelas_transacoes(session, filtros.get('data_inicio'))
+    if len(tabelas) == 1:
+        consulta = _selecionar(Transacao.__table__, COLUNAS_EXPORTACAO, usuario_id, filtros)
+        transacoes = Transacao.__table__
+    else:
+        # Filtros em cada tabela, antes do UNION ALL
+        transacoes = _unir([
+            _selecionar(tabela, COLUNAS_EXPORTACAO, usuario_id, filtros) for tabela in tabelas
+        ])
+        consulta = select(*transacoes.c)
+    consulta = consulta.add_columns(Categoria.nome.label('categoria')).outerjoin_from(
+        transacoes, Categoria, Categoria.id == transacoes.c.categoria_id
+    )
+    return consulta.order_by(transacoes.c.data_transacao, transacoes.c.id)
+
+
+def _no_periodo(transacoes, usuario_id, data_inicio, data_fim):
+    return (
+        transacoes.c.usuario_id == usuario_id,
+        transacoes.c.data_transacao >= data_inicio,
+        transacoes.c.data_transacao <= data_fim
+    )
+
+
+def consulta_transacoes_periodo(session, usuario_id, data_inicio, data_fim):
+    """SELECT Core das transações do período (vivas e arquivadas), com as colunas do relatório de fluxo."""
+    transacoes = fonte_transacoes(session, data_inicio)
+    return select(*(transacoes.c[nome] for nome in COLUNAS_PERIODO)).where(
+        *_no_periodo(transacoes, usuario_id, data_inicio, data_fim)
+    ).order_by(transacoes.c.data_transacao, transacoes.c.id)
+
+
+def consulta_estatisticas(session, usuario_id, data_inicio, data_fim):
+    """SELECT das transações do período como colunas inteiras.
+
+    Cada linha é (dia, receita, centavos, categoria): dias desde
+    ``data_inicio``, 1 para receita e 0 para despesa, o valor em centavos e
+    a categoria (``SEM_CATEGORIA`` quando nula), prontos para virar arrays
+    do NumPy sem converter datas e Decimals linha a linha.
+    """
+    transacoes = fonte_transacoes(session, data_inicio)
+    return select(
+        dias_desde(transacoes.c.data_transacao, data_inicio),
+        case((transacoes.c.tipo == 'receita', 1), else_=0),
+        centavos(transacoes.c.valor),
+        func.coalesce(transacoes.c.categoria_id, SEM_CATEGORIA)
+    ).where(*_no_periodo(transacoes, usuario_id, data_inicio, data_fim))
+
+
+def consulta_dashboard(session, usuario_id, data_inicio, data_fim):
+    """Totais por (dia, tipo, categoria) do período, com o nome da categoria.
+
+    Uma única passada no índice de cobertura (usuario_id, data_transacao,
+    tipo, categoria_id, valor); o resultado tem no máximo uma linha por dia,
+    tipo e categoria, e dele saem os totais, a série e a divisão por
+    categoria do dashboard.
+    """
+    transacoes = fonte_transacoes(session, data_inicio)
+    colunas = (transacoes.c.data_transacao, transacoes.c.tipo, transacoes.c.categoria_id)
+    totais = select(*colunas, func.sum(transacoes.c.valor).label('total')).where(
+        *_no_periodo(transacoes, usuario_id, data_inicio, data_fim)
+    ).group_by(*colunas).subquery()
+    return select(
+        totais.c.data_transacao, totais.c.tipo, totais.c.categoria_id, Categoria.nome, totais.c.total
+    ).select_from(totais).outerjoin(Categoria, Categoria.id == totais.c.categoria_id)
+
+
+def ler_em_lotes(session, consulta, tamanho_lote):
+    """Executa a consulta buscando as linhas do cursor em lotes (yield_per)."""
+    return session.execute(consulta, execution_options={'yield_per': tamanho_lote})
+
+
+def _intervalos(coluna, intervalos):
+    """Condição OR para uma lista de intervalos fechados (inicio, fim)."""
+    return or_(*[and_(coluna >= inicio, coluna <= fim) for inicio, fim in intervalos])
+
+
+def _filtro_meses(meses):
+    """Condições sobre ResumoMensal.ano_mes para o par (inicial, final)."""
+    condicoes = [ResumoMensal.quantidade > 0]
+    if meses[0] is not None:
+        condicoes.append(ResumoMensal.ano_mes >= meses[0])
+    if meses[1] is not None:
+        condicoes.append(ResumoMensal.ano_mes <= meses[1])
+    return condicoes
+
+
+def _soma_por_tipo(coluna_tipo, coluna_valor, tipo):
+    """SUM condicional dos valores de um tipo (receita ou despesa)."""
+    return func.sum(case((coluna_tipo == tipo, coluna_valor), else_=0))
+
+
+def _unir(partes):
+    """UNION ALL das partes (ou a própria parte, se houver só uma)."""
+    return (partes[0] if len(partes) == 1 else union_all(*partes)).subquery()
+
+
+def consulta_fluxo(session, usuario_id, data_inicio, data_fim, granularidade):
+    """Série de receitas, despesas e saldo acumulado por período.
+
+    Nas granularidades mensal e anual os meses completos vêm de
+    ``resumos_mensais`` e apenas os meses parciais das bordas leem
+    transações (vivas e arquivadas, ver ``api/arquivo.py``).
+    """
+    meses, bordas = None, [(data_inicio, data_fim)]
+    if granularidade in ('mes', 'ano'):
+        meses, bordas = dividir_periodo(data_inicio, data_fim)
+
+    partes = []
+    if meses is not None:
+        if granularidade == 'mes':
+            periodo = ResumoMensal.ano_mes + '-01'
+        else:
+            periodo = func.substr(ResumoMensal.ano_mes, 1, 4) + '-01-01'
+        partes.append(select(
+            periodo.label('periodo'),
+            _soma_por_tipo(ResumoMensal.tipo, ResumoMensal.total, 'receita').label('receitas'),
+            _soma_por_tipo(ResumoMensal.tipo, ResumoMensal.total, 'despesa').label('despesas')
+        ).where(
+            ResumoMensal.usuario_id == usuario_id, *_filtro_meses(meses)
+        ).group_by(periodo))
+    if bordas:
+        transacoes = fonte_transacoes(session, bordas[0][0])
+        periodo = inicio_periodo(transacoes.c.data_transacao, granularidade)
+        partes.append(select(
+            periodo.label('periodo'),
+            _soma_por_tipo(transacoes.c.tipo, transacoes.c.valor, 'receita').label('receitas'),
+            _soma_por_tipo(transacoes.c.tipo, transacoes.c.valor, 'despesa').label('despesas')
+        ).where(
+            transacoes.c.usuario_id == usuario_id,
+            _intervalos(transacoes.c.data_transacao, bordas)
+        ).group_by(periodo))
+
+    unidos = _unir(partes)
+    buckets = select(
+        unidos.c.periodo,
+        func.sum(unidos.c.receitas).label('receitas'),
+        func.sum(unidos.c.despesas).label('despesas')
+    ).group_by(unidos.c.periodo).subquery()
+
+    # Saldo acumulado calculado com função de janela sobre os períodos
+    return session.query(
+        buckets.c.periodo,
+        buckets.c.receitas,
+        buckets.c.despesas,
+        func.sum(buckets.c.receitas - buckets.c.despesas).over(
+            order_by=buckets.c.periodo
+        ).label('saldo')
+    ).order_by(buckets.c.periodo)
+
+
+def _partes_totais_categorias(session, usuario_id, data_inicio, data_fim):
+    """SELECTs de (categoria_id, tipo, total) a serem unidos com UNION ALL.
+
+    Os meses completos do intervalo vêm de ``resumos_mensais`` e as bordas
+    parciais das transações, vivas e arquivadas. As transações sem
+    categoria têm categoria_id ``SEM_CATEGORIA``.
+    """
+    meses, bordas = dividir_periodo(data_inicio, data_fim)
+
+    partes = []
+    if meses is not None:
+        partes.append(select(
+            ResumoMensal.categoria_id.label('categoria_id'),
+            ResumoMensal.tipo.label('tipo'),
+            func.sum(ResumoMensal.total).label('total')
+        ).where(
+            ResumoMensal.usuario_id == usuario_id, *_filtro_meses(meses)
+        ).group_by(ResumoMensal.categoria_id, ResumoMensal.tipo))
+    if bordas:
+        transacoes = fonte_transacoes(session, bordas[0][0])
+        categoria = func.coalesce(transacoes.c.categoria_id, SEM_CATEGORIA)
+        partes.append(select(
+            categoria.label('categoria_id'),
+            transacoes.c.tipo.label('tipo'),
+            func.sum(transacoes.c.valor).label('total')
+        ).where(
+            transacoes.c.usuario_id == usuario_id,
+            _intervalos(transacoes.c.data_transacao, bordas)
+        ).group_by(categoria, transacoes.c.tipo))
+    return partes
+
+
+def consulta_categorias(session, usuario_id, data_inicio=None, data_fim=None):
+    """Totais por (categoria, tipo) em uma única consulta agregada.
+
+    Os meses completos do intervalo vêm de ``resumos_mensais`` e as bordas
+    parciais das transações, combinados com UNION ALL. As transações sem
+    categoria ficam em um grupo próprio (categoria_id NULL).
+    """
+    unidos = _unir(_partes_totais_categorias(session, usuario_id, data_inicio, data_fim))
+    return session.query(
+        func.nullif(unidos.c.categoria_id, SEM_CATEGORIA).label('categoria_id'),
+        Categoria.nome,
+        unidos.c.tipo,
+        func.sum(unidos.c.total)
+    ).outerjoin(
+        Categoria, Categoria.id == unidos.c.categoria_id
+    ).group_by(unidos.c.categoria_id, Categoria.nome, unidos.c.tipo)
+
+
+def consulta_arvore_categorias(session, usuario_id, data_inicio=None, data_fim=None):
+    """Categorias do usuário com os totais próprios e os acumulados da subárvore.
+
+    Uma única consulta: os totais por categoria (os mesmos de
+    ``consulta_categorias``) são somados em cada ancestral pelo JOIN com
+    ``categorias_caminhos``, sem percorrer a árvore. A última linha, com id
+    NULL, traz as transações sem categoria.
+    """
+    partes = _partes_totais_categorias(session, usuario_id, data_inicio, data_fim)
+    totais = (partes[0] if len(partes) == 1 else union_all(*partes)).cte('totais_categorias')
+    direto = CategoriaCaminho.profundidade == 0
+
+    def soma(tipo, *condicoes):
+        return func.coalesce(func.sum(case(
+            (and_(totais.c.tipo == tipo, *condicoes), totais.c.total), else_=0
+        )), 0)
+
+    arvore = select(
+        Categoria.id, Categoria.nome, Categoria.categoria_pai_id,
+        soma('receita').label('total_receitas'),
+        soma('despesa').label('total_despesas'),
+        soma('receita', direto).label('receitas_diretas'),
+        soma('despesa', direto).label('despesas_diretas')
+    ).select_from(Categoria).outerjoin(
+        CategoriaCaminho, CategoriaCaminho.ancestral_id == Categoria.id
+    ).outerjoin(
+        totais, totais.c.categoria_id == CategoriaCaminho.descendente_id
+    ).where(
+        Categoria.usuario_id == usuario_id
+    ).group_by(Categoria.id, Categoria.nome, Categoria.categoria_pai_id)
+
+    sem_categoria = select(
+        null(), literal('Sem categoria'), null(),
+        soma('receita'), soma('despesa'), soma('receita'), soma('despesa')
+    ).where(totais.c.categoria_id == SEM_CATEGORIA)
+
+    return session.execute(union_all(arvore, sem_categoria))
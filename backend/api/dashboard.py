@@ -0,0 +1,63 @@
+"""Corpo de ``GET /api/dashboard``: resumo, série de saldo e despesas por categoria.
+
+Tudo sai das linhas de ``consulta_dashboard`` (totais por dia, tipo e
+categoria), lidas uma única vez. A série traz o saldo acumulado desde o
+início do período, reduzida a no máximo ``pontos`` valores: cada ponto cobre
+o mesmo número de dias e traz o saldo no último deles, de modo que a linha
+do gráfico passa pelos mesmos valores da série diária.
+"""
+import re
+from datetime import timedelta
+from decimal import Decimal
+
+_PERIODO = re.compile(r'^(\d+)d$')
+
+
+def interpretar_periodo(valor, maximo_dias):
+    """Converte ``<n>d`` (ex.: ``30d``) no número de dias; ValueError se inválido."""
+    encontrado = _PERIODO.match(valor.strip().lower())
+    dias = int(encontrado.group(1)) if encontrado else 0
+    if not 1 <= dias <= maximo_dias:
+        raise ValueError(f'Período inválido. Use <dias>d, de 1d a {maximo_dias}d (ex.: 30d).')
+    return dias
+
+
+def montar_dashboard(linhas, data_inicio, data_fim, pontos):
+    """Resumo do período a partir das linhas (data, tipo, categoria_id, nome, total)."""
+    dias = (data_fim - data_inicio).days + 1
+    saldo_dia = [Decimal('0')] * dias
+    receitas = despesas = Decimal('0')
+    categorias = {}
+
+    for data_transacao, tipo, categoria_id, nome, total in linhas:
+        if tipo == 'receita':
+            receitas += total
+            saldo_dia[(data_transacao - data_inicio).days] += total
+            continue
+        despesas += total
+        saldo_dia[(data_transacao - data_inicio).days] -= total
+        item = categorias.setdefault(categoria_id, {
+            'categoria_id': categoria_id,
+            'categoria': nome if categoria_id is not None else 'Sem categoria',
+            'total_despesas': Decimal('0')
+        })
+        item['total_despesas'] += total
+
+    # Saldo acumulado no último dia de cada grupo de `passo` dias
+    passo = -(-dias // pontos)  # Divisão arredondada para cima
+    datas, saldos, acumulado = [], [], Decimal('0')
+    for indice, valor in enumerate(saldo_dia):
+        acumulado += valor
+        if (indice + 1) % passo == 0 or indice == dias - 1:
+            datas.append((data_inicio + timedelta(days=indice)).isoformat())
+            saldos.append(acumulado)
+
+    return {
+        'data_inicio': data_inicio.isoformat(),
+        'data_fim': data_fim.isoformat(),
+        'receitas': receitas,
+        'despesas': despesas,
+        'saldo': receitas - despesas,
+        'serie': {'dias_por_ponto': passo, 'datas': datas, 'saldo': saldos},
+        'categorias': sorted(categorias.values(), key=lambda item: -item['total_despesas'])
+    }
@@ -1,12 +1,163 @@
-from flask_sqlalchemy import SQLAlchemy
-from flask import current_app
+import logging
+import threading
+import time
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from flask import current_app, g, has_app_context
+from sqlalchemy import create_engine, event, orm
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, StaticPool
+from sqlalchemy.sql.dml import UpdateBase
+from .replicas import init_replicas
+
+logger = logging.getLogger(__name__)
+
+
+class SessaoRoteada(SignallingSession):
+    """Sessão que executa as leituras na réplica escolhida para a requisição.
+
+    ``api/replicas.py`` coloca o engine da réplica em ``g.engine_leitura``;
+    flushes e INSERT/UPDATE/DELETE continuam sempre no primário.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if has_app_context() and not self._flushing and not isinstance(clause, UpdateBase):
+            engine = g.get('engine_leitura')
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper, clause)
+
+
+class SQLAlchemyRoteado(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=SessaoRoteada, db=self, **options)
+
 
 # Inicializa o objeto SQLAlchemy
-db = SQLAlchemy()
+db = SQLAlchemyRoteado()
+
+
+class PoolMonitorado(QueuePool):
+    """QueuePool que mede o tempo de espera por uma conexão livre.
+
+    As estatísticas servem para dimensionar ``DB_POOL_SIZE`` e
+    ``DB_MAX_OVERFLOW`` de acordo com o número de workers/threads.
+    """
+
+    def __init__(self, creator, alerta_espera_ms=None, **kw):
+        super().__init__(creator, **kw)
+        self._alerta_espera_ms = alerta_espera_ms
+        self._lock_estatisticas = threading.Lock()
+        self._checkouts = 0
+        self._espera_total = 0.0
+        self._espera_maxima = 0.0
+
+    def recreate(self):
+        novo = super().recreate()
+        novo._alerta_espera_ms = self._alerta_espera_ms
+        return novo
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        conexao = super()._do_get()
+        espera = time.perf_counter() - inicio
+        with self._lock_estatisticas:
+            self._checkouts += 1
+            self._espera_total += espera
+            self._espera_maxima = max(self._espera_maxima, espera)
+        if self._alerta_espera_ms is not None and espera * 1000 >= self._alerta_espera_ms:
+            logger.warning(
+                'Espera de %.1f ms por conexão do pool (em uso=%d, overflow=%d, tamanho=%d)',
+                espera * 1000, self.checkedout(), max(self.overflow(), 0), self.size()
+            )
+        return conexao
+
+    def estatisticas(self):
+        """Retorna o estado atual do pool e os tempos de espera acumulados."""
+        with self._lock_estatisticas:
+            checkouts = self._checkouts
+            espera_total = self._espera_total
+            espera_maxima = self._espera_maxima
+        return {
+            'tamanho': self.size(),
+            'em_uso': self.checkedout(),
+            'livres': self.checkedin(),
+            'overflow': max(self.overflow(), 0),  # QueuePool conta negativo enquanto há folga
+            'checkouts': checkouts,
+            'espera_media_ms': round(espera_total / checkouts * 1000, 3) if checkouts else 0.0,
+            'espera_maxima_ms': round(espera_maxima * 1000, 3)
+        }
+
+
+def _opcoes_sqlite(url, opcoes):
+    """Ajusta as opções do engine para SQLite.
+
+    As conexões são usadas por várias threads (check_same_thread=False). Um
+    banco em memória existe só enquanto sua conexão está aberta, então usa
+    uma única conexão compartilhada (StaticPool) e descarta as opções de
+    dimensionamento do pool.
+    """
+    opcoes['connect_args'] = {'check_same_thread': False, **opcoes.get('connect_args', {})}
+    if url.database in (None, '', ':memory:'):
+        for chave in ('pool_size', 'max_overflow', 'pool_timeout', 'pool_recycle'):
+            opcoes.pop(chave, None)
+        opcoes.setdefault('poolclass', StaticPool)
+    return opcoes
+
+
+def _aplicar_pragmas(engine, pragmas, em_memoria):
+    """Executa os PRAGMAs em cada nova conexão SQLite do engine."""
+    @event.listens_for(engine, 'connect')
+    def _pragmas(conexao_dbapi, registro):
+        cursor = conexao_dbapi.cursor()
+        for nome, valor in pragmas.items():
+            if em_memoria and nome in ('journal_mode', 'mmap_size'):
+                continue  # Sem efeito em bancos em memória
+            cursor.execute(f'PRAGMA {nome}={valor}')
+        cursor.close()
+
+
+def _opcoes_engine(app, url, opcoes):
+    """Opções do engine para a URL: ajustes do SQLite e o pool monitorado."""
+    opcoes = dict(opcoes)
+    if url.get_backend_name() == 'sqlite':
+        opcoes = _opcoes_sqlite(url, opcoes)
+    if 'pool_size' in opcoes and 'poolclass' not in opcoes:
+        opcoes['poolclass'] = PoolMonitorado
+        opcoes['alerta_espera_ms'] = app.config.get('DB_POOL_ALERTA_ESPERA_MS')
+    return opcoes
+
+
+def _preparar_sqlite(app, engine):
+    _aplicar_pragmas(
+        engine, app.config.get('SQLITE_PRAGMAS', {}),
+        em_memoria=engine.url.database in (None, '', ':memory:')
+    )
+
 
 def init_db(app):
-    """Inicializa o banco de dados com a aplicação Flask."""
+    """Inicializa o banco de dados com a aplicação Flask.
+
+    A sessão é removida uma única vez ao final de cada requisição pelo
+    ``teardown_appcontext`` que o Flask-SQLAlchemy registra em ``init_app``.
+    As réplicas de ``DB_REPLICAS`` ganham engines próprios, com as mesmas
+    opções de pool do primário (ver ``api/replicas.py``).
+    """
+    opcoes = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = _opcoes_engine(app, url, opcoes)
     db.init_app(app)
+    if url.get_backend_name() == 'sqlite':
+        with app.app_context():
+            _preparar_sqlite(app, db.get_engine(app))
+
+    replicas = []
+    for url_replica in app.config.get('DB_REPLICAS', []):
+        url_replica = make_url(url_replica)
+        engine = create_engine(url_replica, **_opcoes_engine(app, url_replica, opcoes))
+        if url_replica.get_backend_name() == 'sqlite':
+            _preparar_sqlite(app, engine)
+        replicas.append(engine)
+    init_replicas(app, replicas)
 
 def get_db_session():
     """Retorna a sessão do banco de dados."""
@@ -16,7 +167,18 @@ def fechar_conexao():
     """Fecha a conexão atual com o banco de dados."""
     db.session.remove()  # Remove a sessão atual e fecha a conexão
 
-def verificar_conexao():
-    """Verifica se a conexão está ativa e a fecha se necessário."""
-    if db.session.is_active:
-        fechar_conexao() 
\ No newline at end of file
+def _estatisticas(pool):
+    if isinstance(pool, PoolMonitorado):
+        return pool.estatisticas()
+    return {'tamanho': None, 'status': pool.status()}
+
+def estatisticas_pool():
+    """Retorna as estatísticas do pool do engine atual, se disponíveis.
+
+    Com réplicas configuradas, as de cada uma vêm em ``replicas``.
+    """
+    estatisticas = _estatisticas(db.get_engine(current_app).pool)
+    replicas = current_app.extensions.get('replicas')
+    if replicas is not None:
+        estatisticas['replicas'] = [_estatisticas(engine.pool) for engine in replicas.engines]
+    return estatisticas
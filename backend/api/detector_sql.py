@@ -0,0 +1,172 @@
+"""Detector de N+1 e de consultas lentas, para desenvolvimento e CI.
+
+Com ``DETECTOR_SQL`` ligado, cada requisição do blueprint ``api`` registra
+os comandos SQL que executa. Ao final:
+
+* formatos de comando repetidos ``DETECTOR_SQL_REPETICOES`` vezes ou mais
+  (o padrão típico de N+1) geram um aviso no log com a rota;
+* comandos mais lentos que ``DETECTOR_SQL_LENTA_MS`` são registrados com os
+  parâmetros e a rota assim que terminam;
+* a resposta recebe o cabeçalho ``X-Consultas-SQL`` com a contagem.
+
+Desligado, o único custo é uma consulta à configuração por requisição e um
+``getattr`` por comando SQL.
+
+Em testes (pytest), ``maximo_consultas`` e ``verificar_consultas_rota``
+falham quando um trecho ou rota executa mais comandos que o permitido::
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'CACHE_BACKEND': 'nenhum'})
+    ...
+    verificar_consultas_rota(cliente, 'GET', '/api/dashboard', 1, headers=cabecalhos)
+
+Os orçamentos de cada rota de leitura ficam em ``tests/test_consultas.py``.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from flask import current_app, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+_ESPACOS = re.compile(r'\s+')
+_LISTA_PARAMETROS = re.compile(r'\(\s*(?:\?|%s|:\w+)(?:\s*,\s*(?:\?|%s|:\w+))*\s*\)')
+
+
+def formato_consulta(instrucao):
+    """Normaliza o SQL para comparar formatos: espaços e listas IN expandidas."""
+    return _LISTA_PARAMETROS.sub('(...)', _ESPACOS.sub(' ', instrucao).strip())
+
+
+class RastreioSQL:
+    """Comandos SQL executados enquanto o rastreio está ativo."""
+
+    def __init__(self, rota=None, lenta_ms=None):
+        self.rota = rota
+        self.lenta_ms = lenta_ms
+        self.consultas = []  # (instrucao, parametros, duracao em segundos)
+
+    def __len__(self):
+        return len(self.consultas)
+
+    def repetidas(self, minimo):
+        """Formatos executados ``minimo`` vezes ou mais, do mais frequente ao menos."""
+        contagem = Counter(formato_consulta(instrucao) for instrucao, _, _ in self.consultas)
+        return [(forma, n) for forma, n in contagem.most_common() if n >= minimo]
+
+    def resumo(self):
+        """Texto com cada formato e quantas vezes foi executado."""
+        contagem = Counter(formato_consulta(instrucao) for instrucao, _, _ in self.consultas)
+        return '\n'.join(f'  {n}x {forma}' for forma, n in contagem.most_common())
+
+
+def _pilha():
+    pilha = getattr(_local, 'pilha', None)
+    if pilha is None:
+        pilha = _local.pilha = []
+    return pilha
+
+
+@contextmanager
+def rastrear_sql(rota=None, lenta_ms=None):
+    """Ativa um rastreio na thread atual. Rastreios aninhados recebem os mesmos comandos."""
+    rastreio = RastreioSQL(rota, lenta_ms)
+    pilha = _pilha()
+    pilha.append(rastreio)
+    try:
+        yield rastreio
+    finally:
+        pilha.remove(rastreio)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _antes_sql(conexao, cursor, instrucao, parametros, contexto, executemany):
+    if getattr(_local, 'pilha', None):
+        _local.inicio_sql = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _depois_sql(conexao, cursor, instrucao, parametros, contexto, executemany):
+    pilha = getattr(_local, 'pilha', None)
+    if not pilha:
+        return
+    duracao = time.perf_counter() - getattr(_local, 'inicio_sql', time.perf_counter())
+    for rastreio in pilha:
+        rastreio.consultas.append((instrucao, parametros, duracao))
+        if rastreio.lenta_ms is not None and duracao * 1000 >= rastreio.lenta_ms:
+            logger.warning(
+                'Consulta lenta (%.1f ms) em %s: %s | parâmetros: %r',
+                duracao * 1000, rastreio.rota or '-', _ESPACOS.sub(' ', instrucao), parametros
+            )
+
+
+def _analisar(rastreio, repeticoes):
+    for forma, n in rastreio.repetidas(repeticoes):
+        logger.warning('Possível N+1 em %s: %d execuções de %s', rastreio.rota, n, forma)
+
+
+def instrumentar(blueprint):
+    """Ativa o detector nas requisições do blueprint quando DETECTOR_SQL está ligado."""
+
+    @blueprint.before_request
+    def _iniciar_rastreio():
+        if not current_app.config.get('DETECTOR_SQL'):
+            return
+        contexto = rastrear_sql(
+            rota=f'{request.method} {request.path} ({request.endpoint})',
+            lenta_ms=current_app.config.get('DETECTOR_SQL_LENTA_MS')
+        )
+        _local.requisicao = (contexto, contexto.__enter__())
+
+    @blueprint.after_request
+    def _finalizar_rastreio(response):
+        atual = getattr(_local, 'requisicao', None)
+        if atual is None:
+            return response
+        _local.requisicao = None
+        contexto, rastreio = atual
+        repeticoes = current_app.config.get('DETECTOR_SQL_REPETICOES', 5)
+
+        def encerrar():
+            contexto.__exit__(None, None, None)
+            _analisar(rastreio, repeticoes)
+
+        if response.is_streamed:
+            # As linhas ainda serão lidas durante o envio do corpo
+            response.call_on_close(encerrar)
+        else:
+            encerrar()
+            response.headers['X-Consultas-SQL'] = str(len(rastreio))
+        return response
+
+
+@contextmanager
+def maximo_consultas(maximo, descricao='Trecho'):
+    """Falha (AssertionError) se o bloco executar mais de ``maximo`` comandos SQL.
+
+    Feito para testes com pytest; a mensagem lista os formatos executados.
+    """
+    with rastrear_sql() as rastreio:
+        yield rastreio
+    if len(rastreio) > maximo:
+        raise AssertionError(
+            f'{descricao} executou {len(rastreio)} comandos SQL (máximo {maximo}):\n{rastreio.resumo()}'
+        )
+
+
+def verificar_consultas_rota(cliente, metodo, caminho, maximo, **kwargs):
+    """Executa ``metodo caminho`` no test client e exige no máximo ``maximo`` comandos SQL.
+
+    Retorna a resposta para verificações adicionais.
+    """
+    with maximo_consultas(maximo, f'{metodo} {caminho}'):
+        resposta = cliente.open(caminho, method=metodo, **kwargs)
+        if resposta.is_streamed:
+            resposta.get_data()  # Consome o corpo para contar as consultas do streaming
+    return resposta
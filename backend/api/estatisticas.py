@@ -0,0 +1,186 @@
+"""Estatísticas de um período calculadas com NumPy (``GET /api/relatorios/estatisticas``).
+
+As transações chegam de ``consulta_estatisticas`` em uma única consulta, já
+como colunas inteiras (dia, receita, centavos, categoria), e todo o
+cálculo é vetorizado sobre esses arrays:
+
+* série por período (dia, semana, mês ou ano) com receitas, despesas e o
+  saldo acumulado desde ``data_inicio``, como em ``/relatorios/fluxo``;
+* médias móveis de 7, 30 e 90 dias das despesas diárias, tomadas no último
+  dia de cada período. A consulta começa 89 dias antes de ``data_inicio``
+  para que todas as janelas estejam completas;
+* totais por categoria em cada mês do calendário entre o mês de
+  ``data_inicio`` e o de ``data_fim`` (o último até ``data_fim``), com a
+  variação em relação ao mês anterior;
+* quantidade, média, extremos e percentis do valor das transações do
+  período, por tipo.
+
+As somas são feitas em centavos e convertidas para Decimal só na resposta,
+então ``?valores=`` também vale aqui. Requer o pacote ``numpy``.
+"""
+import itertools
+from datetime import timedelta
+from decimal import Decimal
+from .resumos import SEM_CATEGORIA
+
+try:
+    import numpy
+except ImportError:  # Dependência opcional
+    numpy = None
+
+JANELAS = (7, 30, 90)
+PERCENTIS = (10, 25, 50, 75, 90, 99)
+
+
+class NumpyIndisponivel(Exception):
+    """As estatísticas dependem do pacote numpy, que não está instalado no servidor."""
+
+
+def verificar_numpy():
+    """Levanta NumpyIndisponivel se o numpy não estiver instalado."""
+    if numpy is None:
+        raise NumpyIndisponivel('O relatório de estatísticas requer o pacote numpy no servidor.')
+
+
+def inicio_consulta(data_inicio):
+    """Primeiro dia a ser lido para que a maior janela móvel esteja completa em ``data_inicio``."""
+    return data_inicio - timedelta(days=max(JANELAS) - 1)
+
+
+def carregar_colunas(conexao, consulta, tamanho_lote):
+    """Executa ``consulta_estatisticas`` e devolve a matriz int64 (n x 4).
+
+    As linhas são lidas direto do cursor DBAPI em lotes de tuplas de
+    inteiros: sem os objetos Row do SQLAlchemy a leitura fica cerca de três
+    vezes mais rápida, e é ela que domina o tempo do relatório.
+    """
+    resultado = conexao.execute(consulta)
+    try:
+        cursor = resultado.cursor
+        lotes = iter(lambda: cursor.fetchmany(tamanho_lote), [])
+        valores = numpy.fromiter(itertools.chain.from_iterable(itertools.chain.from_iterable(lotes)),
+                                 dtype=numpy.int64)
+    finally:
+        resultado.close()
+    return valores.reshape(-1, 4)
+
+
+def _reais(centavos):
+    """Lista de Decimals a partir de um array de centavos."""
+    return [Decimal(c).scaleb(-2) for c in numpy.rint(centavos).astype(numpy.int64).tolist()]
+
+
+def _somar_por_dia(dia, centavos, dias):
+    return numpy.bincount(dia, weights=centavos, minlength=dias).round().astype(numpy.int64)
+
+
+def _inicio_periodos(datas, granularidade):
+    """Data inicial do período de cada dia (a semana começa na segunda-feira)."""
+    if granularidade == 'dia':
+        return datas
+    if granularidade == 'semana':
+        return datas - (datas.astype(numpy.int64) + 3) % 7  # 1970-01-01 foi uma quinta-feira
+    unidade = 'M' if granularidade == 'mes' else 'Y'
+    return datas.astype(f'datetime64[{unidade}]').astype('datetime64[D]')
+
+
+def _serie(receitas_dia, despesas_dia, primeiro, data_inicio, data_fim, granularidade):
+    deslocamento = (data_inicio - primeiro).days
+    datas = numpy.arange(
+        numpy.datetime64(data_inicio), numpy.datetime64(data_fim + timedelta(days=1)), dtype='datetime64[D]'
+    )
+    periodos, posicoes = numpy.unique(_inicio_periodos(datas, granularidade), return_index=True)
+    ultimos = numpy.append(posicoes[1:], len(datas)) - 1  # Último dia de cada período
+
+    receitas = numpy.add.reduceat(receitas_dia[deslocamento:], posicoes)
+    despesas = numpy.add.reduceat(despesas_dia[deslocamento:], posicoes)
+    saldo = numpy.cumsum(receitas - despesas)
+
+    # Soma da janela terminada em cada dia pela diferença das somas acumuladas
+    acumulado = numpy.concatenate(([0], numpy.cumsum(despesas_dia)))
+    fim_janela = deslocamento + ultimos + 1
+    medias = {
+        janela: _reais((acumulado[fim_janela] - acumulado[fim_janela - janela]) / janela)
+        for janela in JANELAS
+    }
+
+    colunas = [periodos.astype(str).tolist(), _reais(receitas), _reais(despesas), _reais(saldo)]
+    colunas += [medias[janela] for janela in JANELAS]
+    nomes = ['periodo', 'receitas', 'despesas', 'saldo'] + [f'media_{janela}d_despesas' for janela in JANELAS]
+    return [dict(zip(nomes, valores)) for valores in zip(*colunas)]
+
+
+def _categorias_por_mes(dia, receita, centavos, categoria, primeiro, data_inicio, data_fim, nomes):
+    # O mês anterior ao de data_inicio está inteiro nos dados (a consulta começa 89 dias antes)
+    mes_anterior = numpy.datetime64(data_inicio, 'M') - 1
+    meses_transacoes = (numpy.datetime64(primeiro) + dia).astype('datetime64[M]')
+    selecao = meses_transacoes >= mes_anterior
+    indice_mes = (meses_transacoes[selecao] - mes_anterior).astype(numpy.int64)
+    quantidade_meses = int((numpy.datetime64(data_fim, 'M') - mes_anterior).astype(numpy.int64)) + 1
+
+    categorias, indice_categoria = numpy.unique(categoria[selecao], return_inverse=True)
+    celula = indice_categoria * quantidade_meses + indice_mes
+    formato = (len(categorias), quantidade_meses)
+
+    def totais(tipo):
+        pesos = numpy.where(receita[selecao] == tipo, centavos[selecao], 0)
+        return numpy.bincount(celula, weights=pesos, minlength=formato[0] * formato[1]).reshape(formato)
+
+    receitas, despesas = totais(1), totais(0)
+    variacao_receitas, variacao_despesas = numpy.diff(receitas, axis=1), numpy.diff(despesas, axis=1)
+    meses = (mes_anterior + numpy.arange(1, quantidade_meses)).astype(str).tolist()
+
+    resultado = []
+    for i, categoria_id in enumerate(categorias.tolist()):
+        if not (receitas[i].any() or despesas[i].any()):
+            continue
+        colunas = [
+            meses, _reais(receitas[i, 1:]), _reais(despesas[i, 1:]),
+            _reais(variacao_receitas[i]), _reais(variacao_despesas[i])
+        ]
+        resultado.append({
+            'categoria_id': None if categoria_id == SEM_CATEGORIA else categoria_id,
+            'categoria': nomes.get(categoria_id, 'Sem categoria'),
+            'meses': [dict(zip(
+                ('mes', 'receitas', 'despesas', 'variacao_receitas', 'variacao_despesas'), valores
+            )) for valores in zip(*colunas)]
+        })
+    return sorted(resultado, key=lambda c: (c['categoria_id'] is None, c['categoria']))
+
+
+def _distribuicao(valores):
+    if not len(valores):
+        return {'quantidade': 0}
+    percentis = _reais(numpy.percentile(valores, PERCENTIS))
+    return {
+        'quantidade': int(len(valores)),
+        'media': _reais([valores.mean()])[0],
+        'minimo': _reais([valores.min()])[0],
+        'maximo': _reais([valores.max()])[0],
+        'percentis': {f'p{p}': valor for p, valor in zip(PERCENTIS, percentis)}
+    }
+
+
+def calcular_estatisticas(matriz, primeiro, data_inicio, data_fim, granularidade, nomes):
+    """Monta o corpo do relatório a partir da matriz de ``carregar_colunas``.
+
+    ``primeiro`` é o dia 0 da coluna ``dia`` (``inicio_consulta``) e
+    ``nomes`` mapeia o id de cada categoria do usuário para o nome.
+    """
+    dia, receita, centavos, categoria = matriz.T
+    dias = (data_fim - primeiro).days + 1
+    receitas_dia = _somar_por_dia(dia, numpy.where(receita == 1, centavos, 0), dias)
+    despesas_dia = _somar_por_dia(dia, numpy.where(receita == 0, centavos, 0), dias)
+
+    no_periodo = dia >= (data_inicio - primeiro).days
+    return {
+        'granularidade': granularidade,
+        'serie': _serie(receitas_dia, despesas_dia, primeiro, data_inicio, data_fim, granularidade),
+        'categorias': _categorias_por_mes(
+            dia, receita, centavos, categoria, primeiro, data_inicio, data_fim, nomes
+        ),
+        'valores_transacoes': {
+            'receita': _distribuicao(centavos[no_periodo & (receita == 1)]),
+            'despesa': _distribuicao(centavos[no_periodo & (receita == 0)])
+        }
+    }
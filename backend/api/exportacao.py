@@ -0,0 +1,162 @@
+"""Exportação das transações em CSV, Parquet ou XLSX, transmitida em blocos.
+
+As linhas de ``consulta_exportacao`` são lidas do cursor em lotes
+(``yield_per``) e cada lote vira um bloco do corpo da resposta:
+
+* ``csv``: UTF-8 com BOM (o Excel reconhece os acentos), separado por
+  vírgula, com valores exatos e ponto decimal; as colunas são aceitas de
+  volta por ``POST /api/transacoes/importar``;
+* ``parquet``: um row group por lote, ``valor`` como decimal(10,2) e
+  ``data_transacao`` como date32 (requer ``pyarrow``);
+* ``xlsx``: planilha em modo write-only do ``openpyxl`` (requer o pacote).
+  O zip do XLSX só fica completo no fim, então as linhas são gravadas num
+  arquivo temporário e o arquivo é enviado em blocos; a cada 1.048.575
+  linhas (limite do Excel) uma nova aba é criada.
+"""
+import csv
+import io
+import tempfile
+from datetime import date
+from flask import Response, stream_with_context
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Dependência opcional
+    pyarrow = None
+
+try:
+    import openpyxl
+except ImportError:  # Dependência opcional
+    openpyxl = None
+
+COLUNAS = ('id', 'data_transacao', 'tipo', 'valor', 'descricao', 'categoria_id', 'categoria')
+
+MIMETYPES = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+FORMATOS = tuple(MIMETYPES)
+
+_LINHAS_POR_ABA = 1048575  # 1.048.576 linhas do Excel menos o cabeçalho
+_BLOCO_ARQUIVO = 64 * 1024
+
+
+class FormatoIndisponivel(Exception):
+    """O formato depende de um pacote que não está instalado no servidor."""
+
+
+def _csv(lotes):
+    saida = io.StringIO()
+    escritor = csv.writer(saida)
+    saida.write('\ufeff')  # BOM
+    escritor.writerow(COLUNAS)
+    for lote in lotes:
+        escritor.writerows(lote)  # As linhas já vêm na ordem de COLUNAS
+        yield saida.getvalue().encode('utf-8')
+        saida.seek(0)
+        saida.truncate()
+    if saida.tell():
+        yield saida.getvalue().encode('utf-8')  # Só o cabeçalho: nenhuma transação
+
+
+class _DestinoBlocos:
+    """Arquivo de escrita em memória esvaziado a cada bloco enviado."""
+
+    def __init__(self):
+        self.closed = False
+        self._partes = []
+        self._posicao = 0
+
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self):
+        return self._posicao
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def recolher(self):
+        dados = b''.join(self._partes)
+        self._partes = []
+        return dados
+
+
+def _parquet(lotes):
+    esquema = pyarrow.schema([
+        ('id', pyarrow.int64()),
+        ('data_transacao', pyarrow.date32()),
+        ('tipo', pyarrow.string()),
+        ('valor', pyarrow.decimal128(10, 2)),
+        ('descricao', pyarrow.string()),
+        ('categoria_id', pyarrow.int64()),
+        ('categoria', pyarrow.string()),
+    ])
+    destino = _DestinoBlocos()
+    escritor = pyarrow.parquet.ParquetWriter(pyarrow.PythonFile(destino, mode='w'), esquema)
+    try:
+        for lote in lotes:
+            colunas = list(zip(*lote))
+            tabela = pyarrow.Table.from_arrays(
+                [pyarrow.array(valores, type=campo.type) for valores, campo in zip(colunas, esquema)],
+                schema=esquema
+            )
+            escritor.write_table(tabela, row_group_size=len(lote))
+            yield destino.recolher()
+    finally:
+        escritor.close()  # Grava o rodapé com os metadados dos row groups
+    yield destino.recolher()
+
+
+def _xlsx(lotes):
+    livro = openpyxl.Workbook(write_only=True)
+    aba, linhas_aba, abas = None, _LINHAS_POR_ABA, 0
+    for lote in lotes:
+        for linha in lote:
+            if linhas_aba >= _LINHAS_POR_ABA:
+                abas += 1
+                aba = livro.create_sheet('Transações' if abas == 1 else f'Transações {abas}')
+                aba.append(COLUNAS)
+                linhas_aba = 0
+            aba.append(tuple(linha))
+            linhas_aba += 1
+    if aba is None:
+        livro.create_sheet('Transações').append(COLUNAS)
+
+    with tempfile.TemporaryFile() as arquivo:
+        livro.save(arquivo)
+        arquivo.seek(0)
+        yield from iter(lambda: arquivo.read(_BLOCO_ARQUIVO), b'')
+
+
+def gerador_exportacao(formato):
+    """Função que transforma os lotes de linhas nos blocos do arquivo.
+
+    Levanta FormatoIndisponivel se o pacote necessário não estiver instalado.
+    """
+    if formato == 'parquet' and pyarrow is None:
+        raise FormatoIndisponivel('Exportação em Parquet requer o pacote pyarrow no servidor.')
+    if formato == 'xlsx' and openpyxl is None:
+        raise FormatoIndisponivel('Exportação em XLSX requer o pacote openpyxl no servidor.')
+    return {'csv': _csv, 'parquet': _parquet, 'xlsx': _xlsx}[formato]
+
+
+def resposta_exportacao(formato, blocos):
+    """Response chunked de download com os ``blocos`` do arquivo.
+
+    Assim como no NDJSON, o gerador roda com o contexto da requisição ativo
+    e o cursor continua aberto até o último bloco.
+    """
+    resposta = Response(stream_with_context(blocos), mimetype=MIMETYPES[formato])
+    nome = f'transacoes_{date.today().isoformat()}.{formato}'
+    resposta.headers['Content-Disposition'] = f'attachment; filename="{nome}"'
+    resposta.headers['X-Accel-Buffering'] = 'no'
+    return resposta
@@ -0,0 +1,118 @@
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable, FunctionElement
+from sqlalchemy.sql.visitors import InternalTraversal
+from sqlalchemy.types import Integer, String
+
+GRANULARIDADES = ('dia', 'semana', 'mes', 'ano')
+
+
+class inicio_periodo(FunctionElement):
+    """Data inicial (YYYY-MM-DD) do período que contém a data informada.
+
+    Uso: ``inicio_periodo(Transacao.data_transacao, 'mes')``. A semana começa
+    na segunda-feira.
+    """
+    type = String()
+    name = 'inicio_periodo'
+    inherit_cache = True
+    # A granularidade muda o SQL gerado, então precisa fazer parte da chave de cache
+    _traverse_internals = FunctionElement._traverse_internals + [
+        ('granularidade', InternalTraversal.dp_string)
+    ]
+
+    def __init__(self, coluna, granularidade):
+        if granularidade not in GRANULARIDADES:
+            raise ValueError(f'Granularidade inválida: {granularidade}')
+        self.granularidade = granularidade
+        super().__init__(coluna)
+
+
+@compiles(inicio_periodo)
+def _inicio_periodo_mariadb(elemento, compiler, **kw):
+    coluna = compiler.process(list(elemento.clauses)[0], **kw)
+    # Drivers com paramstyle "format" (mysqlclient) exigem %% literal
+    p = '%%' if compiler.dialect.paramstyle in ('format', 'pyformat') else '%'
+    if elemento.granularidade == 'dia':
+        return f"DATE_FORMAT({coluna}, '{p}Y-{p}m-{p}d')"
+    if elemento.granularidade == 'semana':
+        return f"DATE_FORMAT(SUBDATE({coluna}, WEEKDAY({coluna})), '{p}Y-{p}m-{p}d')"
+    if elemento.granularidade == 'mes':
+        return f"DATE_FORMAT({coluna}, '{p}Y-{p}m-01')"
+    return f"DATE_FORMAT({coluna}, '{p}Y-01-01')"
+
+
+@compiles(inicio_periodo, 'sqlite')
+def _inicio_periodo_sqlite(elemento, compiler, **kw):
+    coluna = compiler.process(list(elemento.clauses)[0], **kw)
+    if elemento.granularidade == 'dia':
+        return f"date({coluna})"
+    if elemento.granularidade == 'semana':
+        return f"date({coluna}, 'weekday 0', '-6 days')"
+    if elemento.granularidade == 'mes':
+        return f"strftime('%Y-%m-01', {coluna})"
+    return f"strftime('%Y-01-01', {coluna})"
+
+
+class dias_desde(FunctionElement):
+    """Dias entre a data de referência e a coluna (negativo para datas anteriores).
+
+    Uso: ``dias_desde(Transacao.data_transacao, date(2024, 1, 1))``; o
+    resultado é um inteiro, sem criar objetos ``date`` por linha.
+    """
+    type = Integer()
+    name = 'dias_desde'
+    inherit_cache = True
+
+
+@compiles(dias_desde)
+def _dias_desde_mariadb(elemento, compiler, **kw):
+    coluna, referencia = (compiler.process(c, **kw) for c in elemento.clauses)
+    return f"DATEDIFF({coluna}, {referencia})"
+
+
+@compiles(dias_desde, 'sqlite')
+def _dias_desde_sqlite(elemento, compiler, **kw):
+    coluna, referencia = (compiler.process(c, **kw) for c in elemento.clauses)
+    return f"CAST(julianday({coluna}) - julianday({referencia}) AS INTEGER)"
+
+
+class centavos(FunctionElement):
+    """Valor monetário (coluna ``Dinheiro``) em centavos inteiros.
+
+    Para leituras direto do cursor DBAPI, que não passam pela conversão do
+    tipo: no MariaDB arredonda ``valor * 100``; no SQLite a coluna já
+    guarda os centavos.
+    """
+    type = Integer()
+    name = 'centavos'
+    inherit_cache = True
+
+
+@compiles(centavos)
+def _centavos_mariadb(elemento, compiler, **kw):
+    coluna = compiler.process(list(elemento.clauses)[0], **kw)
+    return f"CAST(ROUND({coluna} * 100) AS SIGNED)"
+
+
+@compiles(centavos, 'sqlite')
+def _centavos_sqlite(elemento, compiler, **kw):
+    return compiler.process(list(elemento.clauses)[0], **kw)
+
+
+class Explain(Executable, ClauseElement):
+    """Plano de execução da consulta: ``EXPLAIN`` (MariaDB) ou
+    ``EXPLAIN QUERY PLAN`` (SQLite)."""
+    inherit_cache = False
+
+    def __init__(self, consulta):
+        self.consulta = consulta
+
+
+@compiles(Explain)
+def _explain_mariadb(elemento, compiler, **kw):
+    return 'EXPLAIN ' + compiler.process(elemento.consulta, **kw)
+
+
+@compiles(Explain, 'sqlite')
+def _explain_sqlite(elemento, compiler, **kw):
+    return 'EXPLAIN QUERY PLAN ' + compiler.process(elemento.consulta, **kw)
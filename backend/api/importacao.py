@@ -0,0 +1,198 @@
+"""Importação em massa de transações a partir de CSV, NDJSON ou OFX.
+
+Os arquivos são lidos de forma incremental; as linhas válidas são inseridas
+em lotes com ``executemany`` dentro de uma única transação e as inválidas
+são devolvidas com o número da linha e o motivo.
+"""
+import codecs
+import csv
+import json
+import re
+from .models import Transacao, Categoria
+from .validacao import ErroValidacao, validar_categoria_id, validar_transacao
+
+FORMATOS = ('csv', 'ndjson', 'ofx')
+
+_EXTENSOES = {
+    'csv': 'csv',
+    'ndjson': 'ndjson',
+    'jsonl': 'ndjson',
+    'ofx': 'ofx',
+}
+
+_MIMETYPES = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+    'application/x-ofx': 'ofx',
+}
+
+_TAG_OFX = re.compile(r'<(\w+)>([^<\r\n]*)')
+_FIM_TRANSACAO_OFX = re.compile(r'</STMTTRN>', re.IGNORECASE)
+
+
+def detectar_formato(nome_arquivo=None, mimetype=None):
+    """Deduz o formato pela extensão do arquivo ou pelo Content-Type."""
+    if nome_arquivo and '.' in nome_arquivo:
+        formato = _EXTENSOES.get(nome_arquivo.rsplit('.', 1)[1].lower())
+        if formato:
+            return formato
+    return _MIMETYPES.get(mimetype)
+
+
+def _texto(fluxo):
+    """Decodifica o fluxo binário em UTF-8 (com ou sem BOM) sob demanda."""
+    decodificador = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+    pendente = ''
+    for bloco in iter(lambda: fluxo.read(64 * 1024), b''):
+        pendente += decodificador.decode(bloco)
+        *linhas, pendente = pendente.split('\n')
+        for linha in linhas:
+            yield linha + '\n'
+    pendente += decodificador.decode(b'', final=True)
+    if pendente:
+        yield pendente
+
+
+def _normalizar_valor(valor):
+    """Aceita valores no formato brasileiro (1.234,56) além de 1234.56."""
+    if isinstance(valor, str) and ',' in valor:
+        valor = valor.replace('.', '').replace(',', '.')
+    return valor
+
+
+def ler_csv(fluxo):
+    """Gera (linha, dados) de um CSV com cabeçalho, separado por vírgula ou ponto e vírgula."""
+    linhas = _texto(fluxo)
+    cabecalho = next(linhas, '')
+    delimitador = ';' if cabecalho.count(';') > cabecalho.count(',') else ','
+    colunas = [c.strip().lower() for c in next(csv.reader([cabecalho], delimiter=delimitador), [])]
+    leitor = csv.reader(linhas, delimiter=delimitador)
+    for valores in leitor:
+        numero = leitor.line_num + 1  # +1 pelo cabeçalho já consumido
+        if not any(v.strip() for v in valores):
+            continue
+        dados = {c: v.strip() for c, v in zip(colunas, valores)}
+        if 'valor' in dados:
+            dados['valor'] = _normalizar_valor(dados['valor'])
+        yield numero, dados
+
+
+def ler_ndjson(fluxo):
+    """Gera (linha, dados) de um arquivo com um objeto JSON por linha."""
+    for numero, linha in enumerate(_texto(fluxo), start=1):
+        if not linha.strip():
+            continue
+        try:
+            yield numero, json.loads(linha)
+        except ValueError:
+            yield numero, ErroValidacao('JSON inválido.')
+
+
+def ler_ofx(fluxo):
+    """Gera (transação, dados) dos blocos <STMTTRN> de um extrato OFX.
+
+    O sinal de TRNAMT define o tipo: positivo é receita, negativo despesa.
+    """
+    buffer = ''
+    numero = 0
+    for linha in _texto(fluxo):
+        buffer += linha
+        while True:
+            fim = _FIM_TRANSACAO_OFX.search(buffer)
+            if not fim:
+                break
+            bloco, buffer = buffer[:fim.start()], buffer[fim.end():]
+            inicio = bloco.upper().rfind('<STMTTRN>')
+            if inicio < 0:
+                continue
+            numero += 1
+            tags = {t.upper(): v.strip() for t, v in _TAG_OFX.findall(bloco[inicio:])}
+            valor = _normalizar_valor(tags.get('TRNAMT', ''))
+            data = tags.get('DTPOSTED', '')[:8]
+            negativo = valor.startswith('-')
+            yield numero, {
+                'valor': valor.lstrip('+-'),
+                'tipo': 'despesa' if negativo else 'receita',
+                'data_transacao': f'{data[:4]}-{data[4:6]}-{data[6:8]}' if len(data) == 8 else data,
+                'descricao': tags.get('MEMO') or tags.get('NAME')
+            }
+
+
+_LEITORES = {
+    'csv': ler_csv,
+    'ndjson': ler_ndjson,
+    'ofx': ler_ofx,
+}
+
+
+def _resolver_categoria(dados, categorias_por_nome, ids_categorias):
+    """Troca o nome da categoria pelo id, usando o mapa carregado uma única vez."""
+    nome = dados.pop('categoria', None)
+    categoria_id = validar_categoria_id(dados.get('categoria_id'))
+    if categoria_id is not None:
+        if categoria_id not in ids_categorias:
+            raise ErroValidacao('Categoria não encontrada.')
+    elif nome:
+        categoria_id = categorias_por_nome.get(str(nome).strip().lower())
+        if categoria_id is None:
+            raise ErroValidacao(f'Categoria não encontrada: {nome}.')
+        dados['categoria_id'] = categoria_id
+
+
+def importar_transacoes(session, usuario_id, fluxo, formato, tamanho_lote, max_erros):
+    """Valida e insere as transações do arquivo em lotes.
+
+    Retorna um resumo com a quantidade importada e os erros por linha. O
+    commit é feito uma única vez ao final.
+    """
+    # Uma única consulta para mapear nomes de categorias em ids
+    categorias = session.query(Categoria.id, Categoria.nome).filter(
+        Categoria.usuario_id == usuario_id
+    ).all()
+    categorias_por_nome = {nome.lower(): id for id, nome in categorias}
+    ids_categorias = {id for id, _ in categorias}
+
+    tabela = Transacao.__table__
+    lote = []
+    erros = []
+    total_erros = 0
+    importadas = 0
+    linhas = 0
+
+    for numero, dados in _LEITORES[formato](fluxo):
+        linhas += 1
+        try:
+            if isinstance(dados, ErroValidacao):
+                raise dados
+            if not isinstance(dados, dict):
+                raise ErroValidacao('Os dados da transação devem ser um objeto.')
+            dados = dict(dados)
+            _resolver_categoria(dados, categorias_por_nome, ids_categorias)
+            campos = validar_transacao(dados)
+        except (ErroValidacao, ValueError) as e:
+            total_erros += 1
+            if len(erros) < max_erros:
+                erros.append({'linha': numero, 'erro': str(e)})
+            continue
+
+        campos.setdefault('descricao', None)
+        campos.setdefault('categoria_id', None)
+        campos['usuario_id'] = usuario_id
+        lote.append(campos)
+        if len(lote) >= tamanho_lote:
+            session.execute(tabela.insert(), lote)  # executemany
+            importadas += len(lote)
+            lote = []
+
+    if lote:
+        session.execute(tabela.insert(), lote)
+        importadas += len(lote)
+    session.commit()
+
+    return {
+        'linhas': linhas,
+        'importadas': importadas,
+        'total_erros': total_erros,
+        'erros': erros
+    }
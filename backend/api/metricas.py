@@ -0,0 +1,292 @@
+"""Métricas das requisições da API no formato de texto do Prometheus.
+
+Para cada (endpoint, método, status) são acumulados um histograma de
+latência, os bytes das respostas, a quantidade de comandos SQL e o tempo
+gasto no banco. Os comandos SQL são contados pelos eventos
+``before/after_cursor_execute`` do engine e atribuídos à requisição em
+andamento na mesma thread.
+
+A agregação é por processo: cada requisição faz uma única atualização, sob
+um lock sem disputa relevante. Com vários workers, ``METRICAS_DIR`` aponta
+para um diretório em que cada worker grava periodicamente seu snapshot;
+``/metrics`` soma os snapshots de todos os workers.
+
+As séries expõem a latência e o volume de SQL de cada rota, então
+``/metrics`` só é registrada com ``METRICAS_TOKEN`` (``Authorization:
+Bearer <token>``) e/ou ``METRICAS_IPS`` (endereços ou redes aceitos)
+configurados; com os dois, a requisição precisa atender a ambos. Sem
+nenhum, a medição continua (``Server-Timing`` e snapshots), mas a rota
+não existe.
+"""
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from flask import Response, current_app, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Limites (em segundos) dos buckets do histograma de latência
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_local = threading.local()
+
+logger = logging.getLogger(__name__)
+
+
+class _Medicao:
+    """Acumuladores da requisição em andamento na thread."""
+    __slots__ = ('inicio', 'consultas', 'tempo_db', 'inicio_sql')
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.tempo_db = 0.0
+        self.inicio_sql = None
+
+
+class Registro:
+    """Séries do processo: (endpoint, metodo, status) -> contadores."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+        self._ultima_gravacao = 0.0
+
+    def registrar(self, chave, duracao, tamanho, consultas, tempo_db):
+        indice = bisect_left(BUCKETS_LATENCIA, duracao)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = {
+                    'buckets': [0] * (len(BUCKETS_LATENCIA) + 1),  # último: +Inf
+                    'soma': 0.0, 'contagem': 0, 'bytes': 0, 'consultas': 0, 'tempo_db': 0.0
+                }
+            serie['buckets'][indice] += 1
+            serie['soma'] += duracao
+            serie['contagem'] += 1
+            serie['bytes'] += tamanho
+            serie['consultas'] += consultas
+            serie['tempo_db'] += tempo_db
+
+    def snapshot(self):
+        with self._lock:
+            return {chave: {**serie, 'buckets': list(serie['buckets'])} for chave, serie in self._series.items()}
+
+    def gravar_se_necessario(self, diretorio, intervalo):
+        """Grava o snapshot deste worker em ``diretorio`` no máximo a cada ``intervalo`` s."""
+        agora = time.monotonic()
+        if agora - self._ultima_gravacao < intervalo:
+            return
+        self._ultima_gravacao = agora
+        gravar_snapshot(diretorio, self.snapshot())
+
+
+_registro = Registro()
+
+
+def _arquivo_worker(diretorio, pid=None):
+    return os.path.join(diretorio, f'metricas_{pid or os.getpid()}.json')
+
+
+def gravar_snapshot(diretorio, series):
+    """Grava as séries com rename atômico, para não expor um arquivo pela metade."""
+    destino = _arquivo_worker(diretorio)
+    temporario = destino + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump([[list(chave), serie] for chave, serie in series.items()], arquivo)
+    os.replace(temporario, destino)
+
+
+def _somar(total, series):
+    for chave, serie in series.items():
+        atual = total.get(chave)
+        if atual is None:
+            total[chave] = {**serie, 'buckets': list(serie['buckets'])}
+            continue
+        atual['buckets'] = [a + b for a, b in zip(atual['buckets'], serie['buckets'])]
+        for campo in ('soma', 'contagem', 'bytes', 'consultas', 'tempo_db'):
+            atual[campo] += serie[campo]
+
+
+def series_agregadas(diretorio=None):
+    """Séries deste processo somadas às dos outros workers gravadas em ``diretorio``."""
+    total = {}
+    _somar(total, _registro.snapshot())
+    if diretorio and os.path.isdir(diretorio):
+        proprio = _arquivo_worker(diretorio)
+        for nome in os.listdir(diretorio):
+            caminho = os.path.join(diretorio, nome)
+            if not nome.startswith('metricas_') or not nome.endswith('.json') or caminho == proprio:
+                continue
+            try:
+                with open(caminho, encoding='utf-8') as arquivo:
+                    _somar(total, {tuple(chave): serie for chave, serie in json.load(arquivo)})
+            except (OSError, ValueError):
+                continue  # Worker gravando ou arquivo removido durante a leitura
+    return total
+
+
+# Contabilização de SQL por requisição
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _antes_sql(conexao, cursor, instrucao, parametros, contexto, executemany):
+    medicao = getattr(_local, 'medicao', None)
+    if medicao is not None:
+        medicao.inicio_sql = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _depois_sql(conexao, cursor, instrucao, parametros, contexto, executemany):
+    medicao = getattr(_local, 'medicao', None)
+    if medicao is not None and medicao.inicio_sql is not None:
+        medicao.consultas += 1
+        medicao.tempo_db += time.perf_counter() - medicao.inicio_sql
+        medicao.inicio_sql = None
+
+
+# Instrumentação do blueprint
+
+def _server_timing(duracao, medicao):
+    return (f'app;dur={duracao * 1000:.1f}, '
+            f'db;dur={medicao.tempo_db * 1000:.1f};desc="{medicao.consultas} SQL"')
+
+
+def _finalizar(chave, medicao, tamanho):
+    _local.medicao = None
+    duracao = time.perf_counter() - medicao.inicio
+    _registro.registrar(chave, duracao, tamanho, medicao.consultas, medicao.tempo_db)
+    diretorio = current_app.config.get('METRICAS_DIR')
+    if diretorio:
+        _registro.gravar_se_necessario(diretorio, current_app.config.get('METRICAS_INTERVALO_S', 5))
+
+
+def _contar_bytes(corpo, contador):
+    try:
+        for bloco in corpo:
+            contador[0] += len(bloco.encode() if isinstance(bloco, str) else bloco)
+            yield bloco
+    finally:
+        if hasattr(corpo, 'close'):
+            corpo.close()  # Encerra o stream_with_context do gerador original
+
+
+def instrumentar(blueprint):
+    """Registra a medição de todas as requisições do blueprint."""
+
+    @blueprint.before_request
+    def _iniciar_medicao():
+        if current_app.config.get('METRICAS_HABILITADAS', True):
+            _local.medicao = _Medicao()
+
+    @blueprint.after_request
+    def _registrar_medicao(response):
+        medicao = getattr(_local, 'medicao', None)
+        if medicao is None:
+            return response
+        chave = (request.endpoint or 'desconhecido', request.method, str(response.status_code))
+        duracao = time.perf_counter() - medicao.inicio
+        response.headers['Server-Timing'] = _server_timing(duracao, medicao)
+
+        if response.is_streamed:
+            # O corpo ainda vai ser gerado (e consultado no banco): a medição
+            # termina quando o servidor fecha a resposta
+            contador = [0]
+            response.response = _contar_bytes(response.response, contador)
+            app = current_app._get_current_object()
+
+            def _ao_fechar():
+                with app.app_context():
+                    _finalizar(chave, medicao, contador[0])
+            response.call_on_close(_ao_fechar)
+        else:
+            _finalizar(chave, medicao, response.calculate_content_length() or 0)
+        return response
+
+
+# Exposição
+
+def _rotulos(endpoint, metodo, status, **extras):
+    pares = {'endpoint': endpoint, 'metodo': metodo, 'status': status, **extras}
+    escapar = lambda v: str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{escapar(v)}"' for k, v in pares.items()) + '}'
+
+
+def formatar_prometheus(series):
+    """Texto no formato de exposição do Prometheus (versão 0.0.4)."""
+    linhas = [
+        '# HELP pyfinance_http_requisicao_segundos Latência das requisições da API.',
+        '# TYPE pyfinance_http_requisicao_segundos histogram',
+    ]
+    ordenadas = sorted(series.items())
+    for (endpoint, metodo, status), serie in ordenadas:
+        acumulado = 0
+        for limite, quantidade in zip(BUCKETS_LATENCIA + ('+Inf',), serie['buckets']):
+            acumulado += quantidade
+            rotulos = _rotulos(endpoint, metodo, status, le=limite)
+            linhas.append(f'pyfinance_http_requisicao_segundos_bucket{rotulos} {acumulado}')
+        rotulos = _rotulos(endpoint, metodo, status)
+        linhas.append(f"pyfinance_http_requisicao_segundos_sum{rotulos} {serie['soma']:.6f}")
+        linhas.append(f"pyfinance_http_requisicao_segundos_count{rotulos} {serie['contagem']}")
+
+    contadores = (
+        ('pyfinance_http_resposta_bytes_total', 'Bytes enviados no corpo das respostas.', 'bytes', '{}'),
+        ('pyfinance_sql_consultas_total', 'Comandos SQL executados pelas requisições.', 'consultas', '{}'),
+        ('pyfinance_sql_segundos_total', 'Tempo gasto no banco pelas requisições.', 'tempo_db', '{:.6f}'),
+    )
+    for nome, ajuda, campo, formato in contadores:
+        linhas.append(f'# HELP {nome} {ajuda}')
+        linhas.append(f'# TYPE {nome} counter')
+        for (endpoint, metodo, status), serie in ordenadas:
+            linhas.append(f'{nome}{_rotulos(endpoint, metodo, status)} {formato.format(serie[campo])}')
+    return '\n'.join(linhas) + '\n'
+
+
+def interpretar_redes(valor):
+    """Lista de redes de ``METRICAS_IPS`` (``10.0.0.5,10.1.0.0/16``); ValueError se inválida."""
+    if not valor:
+        return ()
+    if isinstance(valor, str):
+        valor = valor.split(',')
+    return tuple(ipaddress.ip_network(item.strip(), strict=False) for item in valor if item.strip())
+
+
+def _ip_permitido(redes):
+    try:
+        endereco = ipaddress.ip_address(request.remote_addr or '')
+    except ValueError:
+        return False
+    return any(endereco in rede for rede in redes)
+
+
+def expor_metricas():
+    """View de ``/metrics``: exige o token de METRICAS_TOKEN e/ou um IP de METRICAS_IPS."""
+    token = current_app.config.get('METRICAS_TOKEN')
+    redes = current_app.extensions['metricas_redes']
+    if redes and not _ip_permitido(redes):
+        return Response('Proibido\n', status=403, mimetype='text/plain')
+    if token and not hmac.compare_digest(
+        request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode()
+    ):
+        return Response('Não autorizado\n', status=401, mimetype='text/plain')
+    texto = formatar_prometheus(series_agregadas(current_app.config.get('METRICAS_DIR')))
+    return Response(texto, content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def init_metricas(app):
+    """Prepara o diretório de snapshots e registra ``/metrics`` se o acesso estiver restrito."""
+    if not app.config.get('METRICAS_HABILITADAS', True):
+        return
+    diretorio = app.config.get('METRICAS_DIR')
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+    redes = interpretar_redes(app.config.get('METRICAS_IPS'))
+    if not app.config.get('METRICAS_TOKEN') and not redes:
+        logger.warning('/metrics desativada: configure METRICAS_TOKEN e/ou METRICAS_IPS para expô-la.')
+        return
+    app.extensions['metricas_redes'] = redes
+    app.add_url_rule('/metrics', 'metricas', expor_metricas)
@@ -0,0 +1,67 @@
+"""Migrações versionadas do esquema.
+
+Cada migração é um módulo ``mNNNN_<descricao>.py`` com ``VERSAO``,
+``DESCRICAO`` e ``aplicar(conexao)``, registrado em ``MIGRACOES`` em ordem
+crescente. As versões aplicadas ficam na tabela ``schema_versao``. As
+migrações devem ser idempotentes, já que bancos criados a partir de
+``database/schema.sql`` ou ``db.create_all()`` podem já conter os objetos.
+"""
+from datetime import datetime
+from sqlalchemy import MetaData, Table, Column, Integer, String, DateTime, select
+from . import (
+    m0001_indices_compostos, m0002_resumos_mensais, m0003_categorias_caminhos, m0004_busca_descricao,
+    m0005_busca_tabela_propria, m0006_arquivo_transacoes, m0007_centavos_sqlite,
+    m0008_transacoes_autoincrement,
+)
+
+MIGRACOES = [
+    m0001_indices_compostos,
+    m0002_resumos_mensais,
+    m0003_categorias_caminhos,
+    m0004_busca_descricao,
+    m0005_busca_tabela_propria,
+    m0006_arquivo_transacoes,
+    m0007_centavos_sqlite,
+    m0008_transacoes_autoincrement,
+]
+
+_metadata = MetaData()
+
+schema_versao = Table(
+    'schema_versao', _metadata,
+    Column('versao', Integer, primary_key=True, autoincrement=False),
+    Column('descricao', String(255), nullable=False),
+    Column('aplicado_em', DateTime, nullable=False),
+)
+
+
+def versoes_aplicadas(engine):
+    """Retorna o conjunto de versões já registradas no banco."""
+    _metadata.create_all(engine, checkfirst=True)
+    with engine.connect() as conexao:
+        return {linha.versao for linha in conexao.execute(select(schema_versao.c.versao))}
+
+
+def migracoes_pendentes(engine):
+    """Lista as migrações ainda não aplicadas, em ordem de versão."""
+    aplicadas = versoes_aplicadas(engine)
+    return [m for m in MIGRACOES if m.VERSAO not in aplicadas]
+
+
+def migrar(engine):
+    """Aplica as migrações pendentes, uma transação por versão.
+
+    Retorna a lista de migrações aplicadas.
+    """
+    aplicadas = []
+    for migracao in migracoes_pendentes(engine):
+        with engine.begin() as conexao:
+            migracao.aplicar(conexao)
+            conexao.execute(schema_versao.insert().values(
+                versao=migracao.VERSAO,
+                descricao=migracao.DESCRICAO,
+                aplicado_em=datetime.utcnow()
+            ))
+        aplicadas.append(migracao)
+    return aplicadas
+
@@ -0,0 +1,25 @@
+"""Operações de DDL idempotentes usadas pelas migrações."""
+from sqlalchemy import inspect
+
+
+def criar_indice(conexao, tabela, nome, colunas, tipo=None):
+    """Cria o índice se ainda não existir na tabela.
+
+    ``tipo`` é o prefixo do índice, por exemplo ``FULLTEXT`` no MariaDB.
+    """
+    existentes = {i['name'] for i in inspect(conexao).get_indexes(tabela)}
+    if nome not in existentes:
+        prefixo = f'{tipo} ' if tipo else ''
+        conexao.exec_driver_sql(f"CREATE {prefixo}INDEX {nome} ON {tabela} ({', '.join(colunas)})")
+
+
+def remover_indice(conexao, tabela, nome):
+    """Remove o índice se ele existir na tabela.
+
+    No MariaDB o índice pertence à tabela (``DROP INDEX ... ON``); no SQLite
+    o nome é único no banco e o comando não leva a tabela.
+    """
+    existentes = {i['name'] for i in inspect(conexao).get_indexes(tabela)}
+    if nome in existentes:
+        sufixo = f' ON {tabela}' if conexao.dialect.name in ('mysql', 'mariadb') else ''
+        conexao.exec_driver_sql(f"DROP INDEX {nome}{sufixo}")
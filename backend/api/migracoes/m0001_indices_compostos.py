@@ -0,0 +1,25 @@
+"""Índices compostos para as consultas por usuário.
+
+Todas as rotas filtram por ``usuario_id`` mais um intervalo de
+``data_transacao``, ``categoria_id`` ou ``tipo``.
+"""
+from .ddl import criar_indice
+
+VERSAO = 1
+DESCRICAO = 'Índices compostos em transacoes e categorias'
+
+INDICES = [
+    # Listagem paginada por (data_transacao, id)
+    ('transacoes', 'ix_transacoes_usuario_data_id', ['usuario_id', 'data_transacao', 'id']),
+    # Filtro por categoria e relatório por categoria
+    ('transacoes', 'ix_transacoes_usuario_categoria_data', ['usuario_id', 'categoria_id', 'data_transacao']),
+    # Cobre os relatórios de fluxo e categorias sem acessar a tabela
+    ('transacoes', 'ix_transacoes_usuario_data_cobertura',
+     ['usuario_id', 'data_transacao', 'tipo', 'categoria_id', 'valor']),
+    ('categorias', 'ix_categorias_usuario_pai', ['usuario_id', 'categoria_pai_id']),
+]
+
+
+def aplicar(conexao):
+    for tabela, nome, colunas in INDICES:
+        criar_indice(conexao, tabela, nome, colunas)
@@ -0,0 +1,26 @@
+"""Tabela de resumos mensais por (usuário, mês, categoria, tipo).
+
+Após criar a tabela, preenche-a a partir das transações existentes.
+"""
+from sqlalchemy import MetaData, Table, Column, Integer, String, Numeric, Enum, ForeignKey
+
+VERSAO = 2
+DESCRICAO = 'Tabela resumos_mensais'
+
+
+def aplicar(conexao):
+    from ..resumos import reconstruir
+
+    metadata = MetaData()
+    Table('usuarios', metadata, Column('id', Integer, primary_key=True))
+    resumos = Table(
+        'resumos_mensais', metadata,
+        Column('usuario_id', Integer, ForeignKey('usuarios.id', ondelete='CASCADE'), primary_key=True),
+        Column('ano_mes', String(7), primary_key=True),
+        Column('categoria_id', Integer, primary_key=True, autoincrement=False),
+        Column('tipo', Enum('receita', 'despesa', create_constraint=True), primary_key=True),
+        Column('total', Numeric(14, 2), nullable=False, default=0),
+        Column('quantidade', Integer, nullable=False, default=0),
+    )
+    resumos.create(conexao, checkfirst=True)
+    reconstruir(conexao)
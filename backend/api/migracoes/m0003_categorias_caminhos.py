@@ -0,0 +1,24 @@
+"""Tabela de fechamento da árvore de categorias (categorias_caminhos).
+
+Após criar a tabela, preenche-a a partir de ``categorias.categoria_pai_id``.
+"""
+from sqlalchemy import MetaData, Table, Column, Integer, ForeignKey, Index
+
+VERSAO = 3
+DESCRICAO = 'Tabela categorias_caminhos'
+
+
+def aplicar(conexao):
+    from ..arvore import reconstruir_caminhos
+
+    metadata = MetaData()
+    Table('categorias', metadata, Column('id', Integer, primary_key=True))
+    caminhos = Table(
+        'categorias_caminhos', metadata,
+        Column('ancestral_id', Integer, ForeignKey('categorias.id', ondelete='CASCADE'), primary_key=True),
+        Column('descendente_id', Integer, ForeignKey('categorias.id', ondelete='CASCADE'), primary_key=True),
+        Column('profundidade', Integer, nullable=False),
+        Index('ix_categorias_caminhos_descendente', 'descendente_id', 'ancestral_id'),
+    )
+    caminhos.create(conexao, checkfirst=True)
+    reconstruir_caminhos(conexao)
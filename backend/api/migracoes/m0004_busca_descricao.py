@@ -0,0 +1,16 @@
+"""Índice de busca textual em transacoes.descricao.
+
+No MariaDB, a tabela ``transacoes_busca`` com índice FULLTEXT (até a
+migração 0005 o índice ficava em ``transacoes``); no SQLite, a tabela FTS5
+``transacoes_fts``. Ambas com os triggers que as mantêm e preenchidas com as
+transações existentes.
+"""
+
+VERSAO = 4
+DESCRICAO = 'Busca textual em transacoes.descricao'
+
+
+def aplicar(conexao):
+    from ..busca import criar_indice_busca
+
+    criar_indice_busca(conexao)
@@ -0,0 +1,15 @@
+"""Busca textual do MariaDB em tabela própria (``transacoes_busca``).
+
+Tabelas particionadas não aceitam índice FULLTEXT: o índice sai de
+``transacoes`` e vai para ``transacoes_busca``, mantida por triggers e
+preenchida com as transações existentes. No SQLite nada muda.
+"""
+
+VERSAO = 5
+DESCRICAO = 'Busca textual em transacoes_busca (MariaDB)'
+
+
+def aplicar(conexao):
+    from ..busca import criar_indice_busca
+
+    criar_indice_busca(conexao)
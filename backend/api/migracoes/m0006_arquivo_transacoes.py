@@ -0,0 +1,15 @@
+"""Tabelas do arquivo de transações (``transacoes_arquivo`` e ``arquivamentos``).
+
+Criadas vazias; as transações só são movidas por
+``python manutencao.py arquivar <ano>`` (ver ``api/arquivo.py``).
+"""
+
+VERSAO = 6
+DESCRICAO = 'Tabelas transacoes_arquivo e arquivamentos'
+
+
+def aplicar(conexao):
+    from ..models import TransacaoArquivada, Arquivamento
+
+    TransacaoArquivada.__table__.create(conexao, checkfirst=True)
+    Arquivamento.__table__.create(conexao, checkfirst=True)
@@ -0,0 +1,31 @@
+"""Valores monetários em centavos inteiros no SQLite (tipo ``Dinheiro``).
+
+Bancos SQLite criados antes desta versão têm ``valor`` e ``total``
+declarados NUMERIC e guardados como REAL; aqui eles passam a centavos.
+Colunas já declaradas INTEGER (tabelas criadas com o tipo ``Dinheiro``)
+não são tocadas. No MariaDB as colunas continuam DECIMAL e nada muda.
+"""
+from sqlalchemy import Integer, inspect
+
+VERSAO = 7
+DESCRICAO = 'Valores monetários em centavos no SQLite'
+
+_COLUNAS = (
+    ('transacoes', 'valor'),
+    ('transacoes_arquivo', 'valor'),
+    ('resumos_mensais', 'total'),
+)
+
+
+def aplicar(conexao):
+    if conexao.dialect.name != 'sqlite':
+        return
+    inspetor = inspect(conexao)
+    for tabela, coluna in _COLUNAS:
+        if not inspetor.has_table(tabela):
+            continue
+        tipo = next(c['type'] for c in inspetor.get_columns(tabela) if c['name'] == coluna)
+        if not isinstance(tipo, Integer):
+            conexao.exec_driver_sql(
+                f'UPDATE {tabela} SET {coluna} = CAST(ROUND({coluna} * 100) AS INTEGER)'
+            )
@@ -0,0 +1,55 @@
+"""``transacoes.id`` com AUTOINCREMENT no SQLite.
+
+Sem AUTOINCREMENT o SQLite reutiliza os maiores ids depois que as linhas
+são apagadas, e o arquivamento apaga justamente as transações antigas,
+cujos ids continuam em ``transacoes_arquivo``: uma transação nova podia
+receber o id de uma arquivada e o arquivamento seguinte falhava na chave
+primária do arquivo. O SQLite não altera a chave de uma tabela existente,
+então ela é recriada: cópia das linhas para a tabela nova, remoção da
+antiga, renomeação, índices e triggers da busca. A sequência começa do
+maior id de ``transacoes`` e de ``transacoes_arquivo``. No MariaDB o
+AUTO_INCREMENT já não reutiliza ids e nada muda.
+"""
+from sqlalchemy import MetaData, inspect
+from sqlalchemy.schema import CreateTable
+
+VERSAO = 8
+DESCRICAO = 'AUTOINCREMENT em transacoes.id no SQLite'
+
+_TEMPORARIA = 'transacoes_nova'
+
+
+def aplicar(conexao):
+    if conexao.dialect.name != 'sqlite':
+        return
+    definicao = conexao.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'transacoes'"
+    ).scalar()
+    if definicao is None or 'AUTOINCREMENT' in definicao.upper():
+        return
+
+    from ..models import Transacao, Categoria, Usuario
+    from ..busca import criar_indice_busca
+
+    tabela = Transacao.__table__
+    colunas = ', '.join(c.name for c in tabela.c)
+    metadata = MetaData()
+    for referenciada in (Usuario.__table__, Categoria.__table__):  # Alvos das FKs
+        referenciada.to_metadata(metadata)
+    conexao.execute(CreateTable(tabela.to_metadata(metadata, name=_TEMPORARIA)))
+    conexao.exec_driver_sql(f'INSERT INTO {_TEMPORARIA} ({colunas}) SELECT {colunas} FROM transacoes')
+    # Leva junto os índices e os triggers da busca; o índice FTS5 continua
+    # válido, pois os ids são os mesmos
+    conexao.exec_driver_sql('DROP TABLE transacoes')
+    conexao.exec_driver_sql(f'ALTER TABLE {_TEMPORARIA} RENAME TO transacoes')
+    for indice in tabela.indexes:
+        indice.create(conexao)
+    criar_indice_busca(conexao)
+
+    maior = conexao.exec_driver_sql('SELECT max(id) FROM transacoes').scalar() or 0
+    if inspect(conexao).has_table('transacoes_arquivo'):
+        maior = max(maior, conexao.exec_driver_sql('SELECT max(id) FROM transacoes_arquivo').scalar() or 0)
+    conexao.exec_driver_sql(
+        f"DELETE FROM sqlite_sequence WHERE name IN ('transacoes', '{_TEMPORARIA}')"
+    )
+    conexao.exec_driver_sql("INSERT INTO sqlite_sequence (name, seq) VALUES ('transacoes', ?)", (maior,))
@@ -0,0 +1,68 @@
+"""Verifica, via EXPLAIN, qual índice cada consulta das rotas usa."""
+import re
+from datetime import date, timedelta
+from ..busca import interpretar_busca
+from ..consultas import consulta_listagem, consulta_busca, consulta_fluxo, consulta_categorias
+from ..expressoes import Explain
+from ..models import Categoria
+
+_INDICE_SQLITE = re.compile(r'USING (?:COVERING )?INDEX (\w+)|USING (INTEGER PRIMARY KEY)')
+
+
+def consultas_rotas(session, usuario_id):
+    """Consultas equivalentes às executadas pelas rotas mais acessadas."""
+    data_fim = date.today()
+    data_inicio = data_fim - timedelta(days=30)
+    ano_inicio = data_fim - timedelta(days=365)
+    periodo = {'data_inicio': data_inicio, 'data_fim': data_fim}
+    return {
+        'listar_transacoes': consulta_listagem(session, usuario_id, {}, limite=101),
+        'listar_transacoes (datas)': consulta_listagem(session, usuario_id, periodo, limite=101),
+        'listar_transacoes (cursor)': consulta_listagem(
+            session, usuario_id, {}, cursor=(data_inicio, 0), limite=101
+        ),
+        'listar_transacoes (categoria)': consulta_listagem(
+            session, usuario_id, {'categoria_id': 1}, limite=101
+        ),
+        'listar_transacoes (tipo)': consulta_listagem(
+            session, usuario_id, {'tipo': 'despesa'}, limite=101
+        ),
+        'listar_transacoes (busca)': consulta_busca(
+            session, usuario_id, {}, interpretar_busca('mercado'), limite=101
+        ),
+        'listar_categorias': session.query(Categoria).filter(Categoria.usuario_id == usuario_id),
+        'relatorio_fluxo': consulta_fluxo(session, usuario_id, data_inicio, data_fim, 'dia'),
+        'relatorio_categorias': consulta_categorias(session, usuario_id, data_inicio, data_fim),
+        'relatorio_fluxo (mes, 1 ano)': consulta_fluxo(session, usuario_id, ano_inicio, data_fim, 'mes'),
+        'relatorio_categorias (1 ano)': consulta_categorias(session, usuario_id, ano_inicio, data_fim),
+    }
+
+
+def _ler_plano(campos):
+    """Normaliza uma linha de EXPLAIN (MariaDB) ou EXPLAIN QUERY PLAN (SQLite)."""
+    if 'detail' in campos:
+        encontrado = _INDICE_SQLITE.search(campos['detail'])
+        return {
+            'tabela': None,
+            'indice': (encontrado.group(1) or 'PRIMARY') if encontrado else None,
+            'detalhe': campos['detail']
+        }
+    return {
+        'tabela': campos.get('table'),
+        'indice': campos.get('key'),
+        'detalhe': f"type={campos.get('type')} rows={campos.get('rows')} {campos.get('Extra') or ''}".strip()
+    }
+
+
+def relatorio_indices(session, usuario_id):
+    """Executa EXPLAIN em cada consulta e retorna os índices utilizados."""
+    resultado = []
+    for nome, consulta in consultas_rotas(session, usuario_id).items():
+        # Lê o cursor DBAPI diretamente: as colunas do EXPLAIN não têm os
+        # tipos das colunas da consulta original
+        instrucao = getattr(consulta, 'statement', consulta)  # Query do ORM ou select() Core
+        cursor = session.execute(Explain(instrucao)).cursor
+        colunas = [d[0] for d in cursor.description]
+        planos = [_ler_plano(dict(zip(colunas, linha))) for linha in cursor.fetchall()]
+        resultado.append({'consulta': nome, 'planos': planos})
+    return resultado
@@ -1,7 +1,57 @@
 from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import Float, Integer, Numeric
+from sqlalchemy.sql import operators
+from sqlalchemy.types import TypeDecorator
 from .database import db  # Certifique-se de que está importando db do database.py
 from werkzeug.security import generate_password_hash, check_password_hash
 
+class Dinheiro(TypeDecorator):
+    """Valor monetário: NUMERIC(precisao, escala) no MariaDB, centavos inteiros no SQLite.
+
+    O SQLite não tem decimal exato e guardaria NUMERIC como REAL, com somas
+    em ponto flutuante (0.1 + 0.2 + 0.3 = 0.6000000000000001). Lá a coluna
+    é INTEGER em centavos, as somas são exatas e o valor volta como Decimal
+    com ``escala`` casas; no MariaDB o tipo é o próprio Numeric. Nas
+    expressões, somas e comparações com literais convertem o literal para
+    centavos; multiplicações e divisões usam o número como está. Só o SQL
+    escrito à mão (ou lido direto do cursor) vê os centavos: use
+    ``api.expressoes.centavos`` para obtê-los nos dois bancos.
+    """
+    impl = Numeric
+    cache_ok = True
+
+    def __init__(self, precisao=10, escala=2):
+        super().__init__(precisao, escala)
+        self.precisao = precisao
+        self.escala = escala
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'sqlite':
+            return dialect.type_descriptor(Integer())
+        return dialect.type_descriptor(Numeric(self.precisao, self.escala))
+
+    def process_bind_param(self, value, dialect):
+        if value is None or dialect.name != 'sqlite':
+            return value
+        return int(Decimal(str(value)).scaleb(self.escala).to_integral_value())
+
+    def process_result_value(self, value, dialect):
+        if value is None or dialect.name != 'sqlite':
+            return value
+        return Decimal(round(value)).scaleb(-self.escala)
+
+    class comparator_factory(TypeDecorator.Comparator):
+        def _adapt_expression(self, op, other_comparator):
+            # valor + valor, valor * 2, SUM(valor): o resultado continua monetário
+            return op, self.type
+
+    def coerce_compared_value(self, op, value):
+        # Em valor * 2 o 2 é um fator, não um valor monetário a converter
+        if op in (operators.mul, operators.truediv):
+            return Float() if isinstance(value, float) else Numeric()
+        return self
+
 class Usuario(db.Model):
     __tablename__ = 'usuarios'
     
@@ -55,10 +105,13 @@ class Usuario(db.Model):
 
 class Categoria(db.Model):
     __tablename__ = 'categorias'
+    __table_args__ = (
+        db.Index('ix_categorias_usuario_pai', 'usuario_id', 'categoria_pai_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     nome = db.Column(db.String(50), nullable=False)
-    categoria_pai_id = db.Column(db.Integer, db.ForeignKey('categorias.id'))
+    categoria_pai_id = db.Column(db.Integer, db.ForeignKey('categorias.id', ondelete='CASCADE'))
     usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'))
     
     subcategorias = db.relationship('Categoria', backref=db.backref('categoria_pai', remote_side=[id]))
@@ -88,18 +141,47 @@ class Categoria(db.Model):
 
     @classmethod
     def deletar_categoria(cls, categoria_id):
-        categoria = cls.query.get(categoria_id)
-        if categoria:
-            db.session.delete(categoria)
-            db.session.commit()
-        return categoria
+        """Remove a categoria e as subcategorias, como DELETE /categorias/<id>.
+
+        Retorna a quantidade de categorias removidas (0 se não existir).
+        """
+        from .arvore import remover_subarvore  # arvore importa os modelos
+        removidas = remover_subarvore(db.session, categoria_id)
+        db.session.commit()
+        return removidas
+
+class CategoriaCaminho(db.Model):
+    """Tabela de fechamento (closure table) da árvore de categorias.
+
+    Uma linha para cada par (ancestral, descendente), incluindo a própria
+    categoria com profundidade 0. Mantida pelos eventos em ``api/arvore.py``
+    quando categorias são criadas, movidas ou removidas.
+    """
+    __tablename__ = 'categorias_caminhos'
+    __table_args__ = (
+        db.Index('ix_categorias_caminhos_descendente', 'descendente_id', 'ancestral_id'),
+    )
+
+    ancestral_id = db.Column(db.Integer, db.ForeignKey('categorias.id', ondelete='CASCADE'), primary_key=True)
+    descendente_id = db.Column(db.Integer, db.ForeignKey('categorias.id', ondelete='CASCADE'), primary_key=True)
+    profundidade = db.Column(db.Integer, nullable=False)
 
 class Transacao(db.Model):
     __tablename__ = 'transacoes'
+    # Índices criados pela migração 0001 (ver api/migracoes)
+    __table_args__ = (
+        db.Index('ix_transacoes_usuario_data_id', 'usuario_id', 'data_transacao', 'id'),
+        db.Index('ix_transacoes_usuario_categoria_data', 'usuario_id', 'categoria_id', 'data_transacao'),
+        db.Index('ix_transacoes_usuario_data_cobertura', 'usuario_id', 'data_transacao', 'tipo', 'categoria_id', 'valor'),
+        # Sem AUTOINCREMENT o SQLite reutiliza os ids apagados, e as transações
+        # movidas para transacoes_arquivo mantêm os seus (migração 0008)
+        {'sqlite_autoincrement': True},
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    valor = db.Column(db.Numeric(10,2), nullable=False)
-    tipo = db.Column(db.Enum('receita', 'despesa'), nullable=False)
+    valor = db.Column(Dinheiro(10, 2), nullable=False)
+    # ENUM nativo no MariaDB; no SQLite vira VARCHAR com CHECK (create_constraint)
+    tipo = db.Column(db.Enum('receita', 'despesa', create_constraint=True), nullable=False)
     descricao = db.Column(db.Text)
     data_transacao = db.Column(db.Date, nullable=False)
     categoria_id = db.Column(db.Integer, db.ForeignKey('categorias.id'))
@@ -140,4 +222,51 @@ class Transacao(db.Model):
         if transacao:
             db.session.delete(transacao)
             db.session.commit()
-        return transacao 
\ No newline at end of file
+        return transacao 
+
+class ResumoMensal(db.Model):
+    """Totais mensais por (usuário, mês, categoria, tipo).
+
+    Mantido incrementalmente pelos eventos em ``api/resumos.py`` a cada
+    inserção, atualização ou remoção de transações. ``categoria_id = 0``
+    representa as transações sem categoria, já que colunas de chave primária
+    não aceitam NULL.
+    """
+    __tablename__ = 'resumos_mensais'
+
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id', ondelete='CASCADE'), primary_key=True)
+    ano_mes = db.Column(db.String(7), primary_key=True)  # YYYY-MM
+    categoria_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    tipo = db.Column(db.Enum('receita', 'despesa', create_constraint=True), primary_key=True)
+    total = db.Column(Dinheiro(14, 2), nullable=False, default=0)
+    quantidade = db.Column(db.Integer, nullable=False, default=0)
+
+class TransacaoArquivada(db.Model):
+    """Transações de anos encerrados, movidas de ``transacoes`` por ``api/arquivo.py``.
+
+    Mesmas colunas, sem FKs e só com o índice de cobertura dos relatórios;
+    no MariaDB a tabela é comprimida. Os totais continuam em
+    ``resumos_mensais`` e os relatórios leem as duas tabelas.
+    """
+    __tablename__ = 'transacoes_arquivo'
+    __table_args__ = (
+        db.Index('ix_transacoes_arquivo_usuario_data', 'usuario_id', 'data_transacao', 'tipo', 'categoria_id', 'valor'),
+        {'mysql_row_format': 'COMPRESSED'},
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    valor = db.Column(Dinheiro(10, 2), nullable=False)
+    tipo = db.Column(db.Enum('receita', 'despesa', create_constraint=True), nullable=False)
+    descricao = db.Column(db.Text)
+    data_transacao = db.Column(db.Date, nullable=False)
+    categoria_id = db.Column(db.Integer)
+    usuario_id = db.Column(db.Integer)
+    data_criacao = db.Column(db.DateTime)
+
+class Arquivamento(db.Model):
+    """Anos já movidos para ``transacoes_arquivo`` (um registro por ano)."""
+    __tablename__ = 'arquivamentos'
+
+    ano = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    transacoes = db.Column(db.Integer, nullable=False)
+    arquivado_em = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,70 @@
+import base64
+import binascii
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+
+class CursorInvalido(ValueError):
+    """Erro lançado quando o cursor de paginação não pode ser decodificado."""
+
+
+def codificar_cursor(data_transacao, transacao_id):
+    """Gera o token opaco que aponta para a posição após (data_transacao, id)."""
+    bruto = f"{data_transacao.strftime('%Y-%m-%d')}:{transacao_id}".encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Converte o token opaco de volta para a tupla (data_transacao, id)."""
+    try:
+        preenchimento = '=' * (-len(cursor) % 4)
+        bruto = base64.urlsafe_b64decode(cursor + preenchimento).decode()
+        data, transacao_id = bruto.split(':')
+        return datetime.strptime(data, '%Y-%m-%d').date(), int(transacao_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise CursorInvalido('Cursor de paginação inválido.')
+
+
+def codificar_cursor_busca(posicao):
+    """Token opaco da próxima página da busca textual (quantas linhas já foram entregues).
+
+    A ordem por relevância não tem uma chave estável para keyset; as buscas
+    raramente passam das primeiras páginas, então a posição basta.
+    """
+    return base64.urlsafe_b64encode(f'busca:{posicao}'.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor_busca(cursor):
+    """Converte o token da busca textual de volta para a posição."""
+    try:
+        preenchimento = '=' * (-len(cursor) % 4)
+        prefixo, posicao = base64.urlsafe_b64decode(cursor + preenchimento).decode().split(':')
+        if prefixo != 'busca' or int(posicao) < 0:
+            raise ValueError
+        return int(posicao)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise CursorInvalido('Cursor de paginação inválido.')
+
+
+def obter_limite(valor, padrao, maximo):
+    """Valida o parâmetro limit, aplicando o padrão e o teto configurados."""
+    if valor is None:
+        return padrao
+    limite = int(valor)  # ValueError para valores não numéricos
+    if limite < 1:
+        raise ValueError('O limite deve ser maior que zero.')
+    return min(limite, maximo)
+
+
+def filtro_apos_cursor(coluna_data, coluna_id, data_transacao, transacao_id):
+    """Condição keyset para (data, id) > cursor.
+
+    O termo redundante ``data >= cursor`` permite ao otimizador usar um range
+    scan no índice (usuario_id, data_transacao, id) em vez de avaliar o OR
+    linha a linha, de modo que cada página custa o mesmo independente da
+    profundidade.
+    """
+    return and_(
+        coluna_data >= data_transacao,
+        or_(coluna_data > data_transacao, coluna_id > transacao_id)
+    )
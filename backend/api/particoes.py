@@ -0,0 +1,147 @@
+"""Particionamento de ``transacoes`` por intervalo de ``data_transacao`` (MariaDB).
+
+``python manutencao.py particionar`` converte a tabela, uma única vez, para
+``PARTITION BY RANGE COLUMNS(data_transacao)``: uma partição por ano (ou
+por mês, com ``PARTICOES_INTERVALO=mes``) desde a transação mais antiga e a
+partição ``pfuturo`` para as datas além da última. ``python manutencao.py
+particoes``, agendado no cron, abre a partir de ``pfuturo`` as partições
+até ``PARTICOES_A_FRENTE`` intervalos adiante; com ``pfuturo`` vazia a
+reorganização não copia linhas.
+
+As consultas com intervalo de datas (relatórios, listagem e exportação com
+filtro de data) leem só as partições do intervalo, e o arquivamento
+(``api/arquivo.py``) remove as partições que esvazia. O InnoDB exige a
+coluna de partição em toda chave única e não aceita chaves estrangeiras em
+tabelas particionadas: a conversão troca a chave primária por
+(id, data_transacao) e remove as FKs de ``transacoes``, cuja integridade
+passa a ficar com a aplicação (o ORM desvincula as transações de
+categorias removidas). A busca textual já fica fora da tabela
+(``api/busca.py``).
+
+O SQLite não tem particionamento: as funções levantam
+ParticionamentoIndisponivel.
+"""
+from collections import namedtuple
+from datetime import date
+from sqlalchemy import func, inspect, select, text
+from .models import Transacao
+
+INTERVALOS = ('ano', 'mes')
+PARTICAO_FUTURO = 'pfuturo'
+
+Particao = namedtuple('Particao', 'nome limite linhas')  # limite None em pfuturo (MAXVALUE)
+
+_transacoes = Transacao.__table__
+
+
+class ParticionamentoIndisponivel(Exception):
+    """O banco da conexão não suporta particionamento (SQLite)."""
+
+
+def _verificar(conexao):
+    if conexao.dialect.name not in ('mysql', 'mariadb'):
+        raise ParticionamentoIndisponivel('O particionamento de transacoes só existe no MariaDB.')
+
+
+def inicio_intervalo(data, intervalo):
+    """Primeiro dia do ano ou do mês da data."""
+    return date(data.year, 1, 1) if intervalo == 'ano' else date(data.year, data.month, 1)
+
+
+def proximo_intervalo(inicio, intervalo):
+    """Primeiro dia do intervalo seguinte."""
+    if intervalo == 'ano':
+        return date(inicio.year + 1, 1, 1)
+    return date(inicio.year + inicio.month // 12, inicio.month % 12 + 1, 1)
+
+
+def _inicios(primeiro, intervalo, a_frente):
+    """Inícios dos intervalos de ``primeiro`` até ``a_frente`` intervalos depois do atual."""
+    ultimo = inicio_intervalo(date.today(), intervalo)
+    for _ in range(a_frente):
+        ultimo = proximo_intervalo(ultimo, intervalo)
+    inicios = []
+    while primeiro <= ultimo:
+        inicios.append(primeiro)
+        primeiro = proximo_intervalo(primeiro, intervalo)
+    return inicios
+
+
+def _definicao(inicio, intervalo):
+    nome = f'p{inicio.year}' if intervalo == 'ano' else f'p{inicio:%Y_%m}'
+    return f"PARTITION {nome} VALUES LESS THAN ('{proximo_intervalo(inicio, intervalo).isoformat()}')"
+
+
+def _definicao_futuro():
+    return f'PARTITION {PARTICAO_FUTURO} VALUES LESS THAN (MAXVALUE)'
+
+
+def listar_particoes(conexao):
+    """Partições de ``transacoes`` em ordem; lista vazia se a tabela não é particionada."""
+    _verificar(conexao)
+    linhas = conexao.execute(text(
+        "SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'transacoes' AND PARTITION_NAME IS NOT NULL "
+        "ORDER BY PARTITION_ORDINAL_POSITION"
+    ))
+    return [
+        Particao(nome, None if descricao == 'MAXVALUE' else date.fromisoformat(descricao.strip("'")), quantidade)
+        for nome, descricao, quantidade in linhas
+    ]
+
+
+def particionar(conexao, intervalo, a_frente):
+    """Converte ``transacoes`` em tabela particionada.
+
+    Retorna as definições das partições criadas. Levanta ValueError se a
+    tabela já for particionada.
+    """
+    if listar_particoes(conexao):
+        raise ValueError('A tabela transacoes já é particionada.')
+    mais_antiga = conexao.execute(select(func.min(_transacoes.c.data_transacao))).scalar() or date.today()
+    definicoes = [_definicao(inicio, intervalo)
+                  for inicio in _inicios(inicio_intervalo(mais_antiga, intervalo), intervalo, a_frente)]
+
+    for chave in inspect(conexao).get_foreign_keys('transacoes'):
+        conexao.exec_driver_sql(f"ALTER TABLE transacoes DROP FOREIGN KEY {chave['name']}")
+    conexao.exec_driver_sql('ALTER TABLE transacoes DROP PRIMARY KEY, ADD PRIMARY KEY (id, data_transacao)')
+    conexao.exec_driver_sql(
+        'ALTER TABLE transacoes PARTITION BY RANGE COLUMNS(data_transacao) '
+        f"({', '.join(definicoes + [_definicao_futuro()])})"
+    )
+    return definicoes
+
+
+def criar_particoes_futuras(conexao, intervalo, a_frente):
+    """Cria as partições até ``a_frente`` intervalos adiante, dividindo ``pfuturo``.
+
+    Retorna as definições criadas (vazia se já existiam todas).
+    """
+    particoes = listar_particoes(conexao)
+    if not particoes:
+        raise ValueError('A tabela transacoes não é particionada; use "python manutencao.py particionar".')
+    limites = [p.limite for p in particoes if p.limite is not None]
+    primeiro = max(limites) if limites else inicio_intervalo(date.today(), intervalo)
+    definicoes = [_definicao(inicio, intervalo) for inicio in _inicios(primeiro, intervalo, a_frente)]
+    if definicoes:
+        conexao.exec_driver_sql(
+            f'ALTER TABLE transacoes REORGANIZE PARTITION {PARTICAO_FUTURO} '
+            f"INTO ({', '.join(definicoes + [_definicao_futuro()])})"
+        )
+    return definicoes
+
+
+def remover_particoes_vazias(conexao, corte):
+    """Remove as partições vazias inteiramente anteriores a ``corte``.
+
+    Usada após o arquivamento; as datas abaixo do novo primeiro limite
+    passam a cair na primeira partição restante. Retorna os nomes removidos.
+    """
+    vazias = [
+        p.nome for p in listar_particoes(conexao)
+        if p.limite is not None and p.limite <= corte
+        and conexao.exec_driver_sql(f'SELECT 1 FROM transacoes PARTITION ({p.nome}) LIMIT 1').first() is None
+    ]
+    if vazias:
+        conexao.exec_driver_sql(f"ALTER TABLE transacoes DROP PARTITION {', '.join(vazias)}")
+    return vazias
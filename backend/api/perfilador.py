@@ -0,0 +1,236 @@
+"""Perfil sob demanda de uma única requisição, para investigar lentidão em produção.
+
+Um usuário listado em ``PERFILADOR_USUARIOS`` (ids separados por vírgula)
+pede o perfil de qualquer rota do blueprint ``api`` com o cabeçalho
+``X-Perfilar`` ou o argumento ``perfilar``:
+
+* ``cprofile`` (ou ``1``): perfil determinístico com ``cProfile``;
+* ``amostragem``: uma thread amostra a pilha da requisição a cada
+  ``PERFILADOR_INTERVALO_MS`` ms, com custo menor em rotas com muitas chamadas.
+
+O relatório traz a árvore de chamadas (estatísticas do ``pstats`` ou pilhas
+agregadas) e cada comando SQL com a duração. Com ``PERFILADOR_DIR`` ele é
+gravado nesse diretório (mais o ``.prof`` do cProfile ou o ``.folded`` da
+amostragem, para snakeviz/flamegraph) e a resposta traz o nome no cabeçalho
+``X-Perfil``; sem diretório, o relatório substitui o corpo da resposta.
+
+Com a lista vazia (padrão) o hook retorna na primeira linha. Pedidos de quem
+não está na lista são atendidos normalmente, sem perfil. Um perfil por vez
+por processo: um segundo pedido simultâneo recebe ``X-Perfil: ocupado``.
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from flask import current_app, g, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+from .detector_sql import rastrear_sql
+
+MODOS = ('cprofile', 'amostragem')
+
+_em_uso = threading.Lock()
+
+
+class _PerfilDeterministico:
+    extensao = '.prof'
+
+    def __init__(self, app):
+        self._perfil = cProfile.Profile()
+        self._linhas = app.config.get('PERFILADOR_LINHAS', 40)
+
+    def iniciar(self):
+        self._perfil.enable()
+
+    def parar(self):
+        self._perfil.disable()
+
+    def texto(self):
+        saida = io.StringIO()
+        estatisticas = pstats.Stats(self._perfil, stream=saida).strip_dirs()
+        estatisticas.sort_stats('cumulative').print_stats(self._linhas)
+        estatisticas.print_callees(self._linhas // 2)  # Árvore: quem chama quem
+        return saida.getvalue()
+
+    def gravar(self, caminho):
+        self._perfil.dump_stats(caminho)
+
+
+class _PerfilAmostragem:
+    """Amostra periodicamente a pilha da thread da requisição."""
+    extensao = '.folded'
+
+    def __init__(self, app):
+        self._intervalo = app.config.get('PERFILADOR_INTERVALO_MS', 5) / 1000
+        self._linhas = app.config.get('PERFILADOR_LINHAS', 40)
+        self._alvo = threading.get_ident()
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._amostrar, name='perfilador', daemon=True)
+        self.pilhas = Counter()
+
+    def _amostrar(self):
+        while not self._parar.wait(self._intervalo):
+            quadro = sys._current_frames().get(self._alvo)
+            pilha = []
+            while quadro is not None:
+                codigo = quadro.f_code
+                pilha.append(f'{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})')
+                quadro = quadro.f_back
+            if pilha:
+                self.pilhas[';'.join(reversed(pilha))] += 1
+
+    def iniciar(self):
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        self._thread.join()
+
+    def texto(self):
+        total = sum(self.pilhas.values())
+        if not total:
+            return 'Nenhuma amostra (requisição mais curta que o intervalo).\n'
+        # Tempo inclusivo por função: amostras em que ela aparece na pilha
+        inclusivo, proprio = Counter(), Counter()
+        for pilha, n in self.pilhas.items():
+            funcoes = pilha.split(';')
+            for funcao in set(funcoes):
+                inclusivo[funcao] += n
+            proprio[funcoes[-1]] += n
+        linhas = [f'{total} amostras a cada {self._intervalo * 1000:g} ms', '', '  incl%  própr%  função']
+        for funcao, n in inclusivo.most_common(self._linhas):
+            linhas.append(f'{100 * n / total:6.1f}  {100 * proprio[funcao] / total:6.1f}  {funcao}')
+        return '\n'.join(linhas) + '\n'
+
+    def gravar(self, caminho):
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            for pilha, n in self.pilhas.most_common():
+                arquivo.write(f'{pilha} {n}\n')
+
+
+_PERFIS = {'cprofile': _PerfilDeterministico, 'amostragem': _PerfilAmostragem}
+
+
+def perfilando():
+    """Indica se a requisição atual está sendo perfilada."""
+    return g.get('perfil') is not None
+
+
+def _modo_pedido():
+    valor = request.headers.get('X-Perfilar') or request.args.get('perfilar')
+    if not valor:
+        return None
+    valor = valor.strip().lower()
+    return valor if valor in MODOS else 'cprofile'
+
+
+def _usuario_autorizado(autorizados):
+    try:
+        verify_jwt_in_request(optional=True)
+    except (JWTExtendedException, PyJWTError):
+        return None  # A própria rota responde ao token inválido
+    usuario_id = get_jwt_identity()
+    return usuario_id if usuario_id is not None and str(usuario_id) in autorizados else None
+
+
+def _relatorio(dados, response, duracao):
+    rastreio = dados['rastreio']
+    sql = sum(d for _, _, d in rastreio.consultas)
+    linhas = [
+        f'{request.method} {request.full_path.rstrip("?")} ({request.endpoint}), usuário {dados["usuario_id"]}',
+        f'{datetime.now().isoformat(timespec="seconds")}, modo {dados["modo"]}',
+        f'Status {response.status_code}, {duracao * 1000:.1f} ms, '
+        f'{len(rastreio)} comandos SQL em {sql * 1000:.1f} ms',
+        '',
+        'SQL (ms, na ordem de execução):',
+    ]
+    linhas += [f'{d * 1000:9.2f}  {" ".join(instrucao.split())}' for instrucao, _, d in rastreio.consultas]
+    linhas += ['', 'Perfil:', dados['perfil'].texto()]
+    return '\n'.join(linhas)
+
+
+def _nome_arquivo(usuario_id):
+    carimbo = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    return f'{carimbo}_{request.endpoint or "rota"}_u{usuario_id}'.replace('.', '-')
+
+
+def _liberar(dados):
+    g.perfil = None
+    try:
+        dados['perfil'].parar()
+        dados['contexto'].__exit__(None, None, None)
+    finally:
+        _em_uso.release()
+
+
+def instrumentar(blueprint):
+    """Registra o perfil sob demanda nas requisições do blueprint."""
+
+    @blueprint.before_request
+    def _iniciar_perfil():
+        autorizados = current_app.config.get('PERFILADOR_USUARIOS')
+        if not autorizados:
+            return
+        modo = _modo_pedido()
+        if modo is None:
+            return
+        usuario_id = _usuario_autorizado(autorizados)
+        if usuario_id is None:
+            return
+        if not _em_uso.acquire(blocking=False):
+            g.perfil_ocupado = True
+            return
+
+        perfil = _PERFIS[modo](current_app)
+        contexto = rastrear_sql(rota=f'{request.method} {request.path} (perfil)')
+        g.perfil = {
+            'modo': modo, 'usuario_id': usuario_id, 'perfil': perfil,
+            'contexto': contexto, 'rastreio': contexto.__enter__(), 'inicio': time.perf_counter(),
+        }
+        perfil.iniciar()
+
+    @blueprint.after_request
+    def _encerrar_perfil(response):
+        if g.get('perfil_ocupado'):
+            response.headers['X-Perfil'] = 'ocupado'
+            return response
+        dados = g.get('perfil')
+        if dados is None:
+            return response
+        try:
+            if response.is_streamed:
+                response.get_data()  # O corpo transmitido também entra no perfil
+        finally:
+            _liberar(dados)
+        duracao = time.perf_counter() - dados['inicio']
+
+        perfil = dados['perfil']
+        texto = _relatorio(dados, response, duracao)
+        diretorio = current_app.config.get('PERFILADOR_DIR')
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+            nome = _nome_arquivo(dados['usuario_id'])
+            with open(os.path.join(diretorio, nome + '.txt'), 'w', encoding='utf-8') as arquivo:
+                arquivo.write(texto)
+            perfil.gravar(os.path.join(diretorio, nome + perfil.extensao))
+            response.headers['X-Perfil'] = nome
+        else:
+            response.set_data(texto)
+            response.mimetype = 'text/plain'
+            response.headers.pop('ETag', None)
+            response.headers['X-Perfil'] = 'inline'
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    @blueprint.teardown_request
+    def _liberar_perfil(erro):
+        # Exceção antes do after_request: não deixa o perfil ativo nem o lock preso
+        dados = g.get('perfil')
+        if dados is not None:
+            _liberar(dados)
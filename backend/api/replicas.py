@@ -0,0 +1,173 @@
+"""Leituras em réplicas do banco (``DB_REPLICAS``).
+
+As rotas de leitura marcadas com ``@ler_da_replica`` (listagens,
+exportação, relatórios e dashboard) executam as consultas em uma réplica,
+escolhida por requisição conforme ``DB_REPLICAS_POLITICA``:
+
+* ``rodizio``: uma réplica de cada vez, em ordem;
+* ``menos_ocupada``: a réplica com menos conexões em uso no pool deste
+  worker (empates em rodízio).
+
+Escritas, flushes e todas as demais rotas continuam no primário
+(``SQLALCHEMY_DATABASE_URI``). Depois de uma escrita bem sucedida, as
+leituras do mesmo usuário ficam no primário por
+``DB_REPLICAS_ADERENCIA_S`` segundos, o bastante para a réplica alcançá-lo:
+quem acabou de lançar uma transação a vê na listagem seguinte. O instante
+da última escrita fica na memória do processo ou, com
+``DB_REPLICAS_ADERENCIA_CAMINHO``, em um arquivo SQLite compartilhado pelos
+workers do host (como ``CACHE_BACKEND=sqlite``).
+
+A réplica usada sai no cabeçalho ``X-Banco-Leitura`` (``replica-<n>`` ou
+``primario``). Sem ``DB_REPLICAS`` nada muda.
+"""
+import itertools
+import sqlite3
+import threading
+import time
+from functools import wraps
+from flask import current_app, g, make_response
+from flask_jwt_extended import get_jwt_identity
+
+POLITICAS = ('rodizio', 'menos_ocupada')
+CABECALHO = 'X-Banco-Leitura'
+
+
+class EscritasMemoria:
+    """Instante da última escrita de cada usuário, na memória do processo."""
+
+    def __init__(self):
+        self._instantes = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, usuario_id, instante):
+        with self._lock:
+            self._instantes[usuario_id] = instante
+
+    def ultima(self, usuario_id):
+        return self._instantes.get(usuario_id, 0.0)
+
+
+class EscritasSQLite:
+    """Instante da última escrita de cada usuário em um arquivo SQLite compartilhado."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._local = threading.local()
+        self._conexao().execute(
+            'CREATE TABLE IF NOT EXISTS escritas (usuario_id INTEGER PRIMARY KEY, instante REAL NOT NULL)'
+        )
+
+    def _conexao(self):
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=5, isolation_level=None)
+            conexao.execute('PRAGMA journal_mode=WAL')
+            conexao.execute('PRAGMA synchronous=NORMAL')
+            self._local.conexao = conexao
+        return conexao
+
+    def registrar(self, usuario_id, instante):
+        self._conexao().execute(
+            'INSERT OR REPLACE INTO escritas (usuario_id, instante) VALUES (?, ?)', (usuario_id, instante)
+        )
+
+    def ultima(self, usuario_id):
+        linha = self._conexao().execute(
+            'SELECT instante FROM escritas WHERE usuario_id = ?', (usuario_id,)
+        ).fetchone()
+        return linha[0] if linha else 0.0
+
+
+class Replicas:
+    """Engines das réplicas, política de escolha e registro de escritas."""
+
+    def __init__(self, engines, politica='rodizio', aderencia_s=5.0, escritas=None):
+        if politica not in POLITICAS:
+            raise ValueError(f"DB_REPLICAS_POLITICA inválida: {politica}. Use {' ou '.join(POLITICAS)}.")
+        self.engines = engines
+        self.politica = politica
+        self.aderencia_s = aderencia_s
+        self.escritas = escritas or EscritasMemoria()
+        self._ordem = itertools.count()
+        self._lock = threading.Lock()
+
+    def _proxima(self):
+        with self._lock:
+            return next(self._ordem)
+
+    def escolher(self):
+        """Índice da réplica para a próxima leitura."""
+        inicio = self._proxima()
+        indices = [(inicio + i) % len(self.engines) for i in range(len(self.engines))]
+        if self.politica == 'rodizio':
+            return indices[0]
+        # Menos conexões em uso; StaticPool (SQLite em memória) não informa e conta como 0
+        return min(indices, key=lambda i: getattr(self.engines[i].pool, 'checkedout', lambda: 0)())
+
+    def registrar_escrita(self, usuario_id):
+        if self.aderencia_s > 0:
+            self.escritas.registrar(usuario_id, time.time())
+
+    def aderente(self, usuario_id):
+        """Indica se o usuário escreveu há menos de ``aderencia_s`` segundos."""
+        return self.aderencia_s > 0 and time.time() - self.escritas.ultima(usuario_id) < self.aderencia_s
+
+
+def init_replicas(app, engines):
+    """Registra as réplicas na aplicação (nenhuma se ``engines`` for vazio)."""
+    replicas = None
+    if engines:
+        caminho = app.config.get('DB_REPLICAS_ADERENCIA_CAMINHO')
+        replicas = Replicas(
+            engines,
+            app.config.get('DB_REPLICAS_POLITICA', 'rodizio'),
+            app.config.get('DB_REPLICAS_ADERENCIA_S', 5.0),
+            EscritasSQLite(caminho) if caminho else None
+        )
+    app.extensions['replicas'] = replicas
+
+
+def _replicas():
+    return current_app.extensions.get('replicas')
+
+
+def registrar_escrita(usuario_id):
+    """Mantém as leituras do usuário no primário pela janela de aderência."""
+    replicas = _replicas()
+    if replicas is not None and usuario_id is not None:
+        replicas.registrar_escrita(usuario_id)
+
+
+def ler_da_replica(view):
+    """Executa a rota GET autenticada com as leituras em uma réplica.
+
+    Deve ser aplicado abaixo de ``@jwt_required()`` e de ``@em_cache``
+    (respostas em cache não consultam o banco). A sessão passa a usar a
+    réplica pelo ``g.engine_leitura`` (ver ``api.database.SessaoRoteada``)
+    até o fim da requisição, inclusive nos corpos transmitidos (NDJSON,
+    exportação), que consultam o banco depois da rota.
+    """
+    @wraps(view)
+    def decorada(*args, **kwargs):
+        replicas = _replicas()
+        if replicas is None:
+            return view(*args, **kwargs)
+
+        banco = 'primario'
+        if not replicas.aderente(get_jwt_identity()):
+            indice = replicas.escolher()
+            g.engine_leitura = replicas.engines[indice]
+            banco = f'replica-{indice}'
+        resposta = make_response(view(*args, **kwargs))
+        resposta.headers[CABECALHO] = banco
+        return resposta
+    return decorada
+
+
+def instrumentar(blueprint):
+    """Devolve as leituras ao primário ao fim de cada requisição do blueprint."""
+
+    @blueprint.teardown_request
+    def _encerrar_leitura(excecao=None):
+        # Com stream_with_context roda só depois do último bloco do corpo
+        g.pop('engine_leitura', None)
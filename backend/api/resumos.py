@@ -0,0 +1,277 @@
+"""Manutenção incremental da tabela ``resumos_mensais``.
+
+Os totais por (usuário, mês, categoria, tipo) são ajustados por deltas:
+
+* inserções, atualizações e remoções via ORM (rotas e classmethods de
+  ``Transacao``) são acumuladas pelos eventos de mapper e gravadas uma vez
+  por flush;
+* operações em massa executadas pela sessão (``insert()`` com
+  executemany, ``query.update()`` e ``query.delete()``) são interceptadas
+  em ``do_orm_execute`` e ``after_bulk_update``.
+
+Escritas feitas fora da sessão (SQL manual, cascatas do banco, UPDATE
+Core sobre a tabela) não são vistas; ``reconstruir_resumos.py`` recalcula
+a tabela a partir das transações. É isso que permite ao arquivamento
+(``api/arquivo.py``) mover transações sem alterar os totais.
+"""
+from calendar import monthrange
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from sqlalchemy import event, func, select, inspect
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.orm import Session, object_session
+from .models import Transacao, TransacaoArquivada, ResumoMensal
+from .expressoes import inicio_periodo
+
+SEM_CATEGORIA = 0
+_LOTE_IDS = 1000
+_CHAVE_SESSAO = 'resumos_mensais_deltas'
+_CHAVE_IDS_ATUALIZADOS = 'resumos_mensais_ids_atualizados'
+
+
+def ano_mes(data):
+    """Mês (YYYY-MM) de uma data ou string YYYY-MM-DD."""
+    return str(data)[:7]
+
+
+def expressao_ano_mes(coluna):
+    """Expressão SQL equivalente a ``ano_mes`` para uma coluna de data."""
+    return func.substr(inicio_periodo(coluna, 'mes'), 1, 7)
+
+
+def dividir_periodo(data_inicio, data_fim):
+    """Separa o intervalo em meses completos e bordas parciais.
+
+    Retorna ``(meses, bordas)``: ``meses`` é a tupla (YYYY-MM inicial,
+    YYYY-MM final) atendida pelo resumo, ou None se não houver mês
+    completo; ``bordas`` é a lista de intervalos (inicio, fim) que precisam
+    ser lidos das transações. Datas None significam intervalo aberto.
+    """
+    inicio_meses = fim_meses = None
+    if data_inicio is not None:
+        inicio_meses = data_inicio
+        if data_inicio.day != 1:
+            inicio_meses = data_inicio.replace(day=1) + timedelta(days=monthrange(data_inicio.year, data_inicio.month)[1])
+    if data_fim is not None:
+        fim_meses = data_fim
+        if data_fim.day != monthrange(data_fim.year, data_fim.month)[1]:
+            fim_meses = data_fim.replace(day=1) - timedelta(days=1)
+
+    if inicio_meses is not None and fim_meses is not None and inicio_meses > fim_meses:
+        return None, [(data_inicio, data_fim)]
+
+    bordas = []
+    if data_inicio is not None and data_inicio < inicio_meses:
+        bordas.append((data_inicio, inicio_meses - timedelta(days=1)))
+    if data_fim is not None and fim_meses < data_fim:
+        bordas.append((fim_meses + timedelta(days=1), data_fim))
+    meses = (
+        ano_mes(inicio_meses) if inicio_meses is not None else None,
+        ano_mes(fim_meses) if fim_meses is not None else None
+    )
+    return meses, bordas
+
+
+def _acumular(deltas, usuario_id, data_transacao, categoria_id, tipo, valor, sinal):
+    if usuario_id is None or data_transacao is None or tipo is None or valor is None:
+        return
+    chave = (int(usuario_id), ano_mes(data_transacao), int(categoria_id or SEM_CATEGORIA), tipo)
+    deltas[chave][0] += sinal * Decimal(str(valor))
+    deltas[chave][1] += sinal
+
+
+def novos_deltas():
+    """Deltas vazios no formato de ``aplicar_deltas``."""
+    return defaultdict(lambda: [Decimal('0'), 0])
+
+
+def aplicar_deltas(conexao, deltas):
+    """Soma os deltas {(usuario, ano_mes, categoria, tipo): [total, quantidade]}."""
+    linhas = [
+        {'usuario_id': u, 'ano_mes': m, 'categoria_id': c, 'tipo': t, 'total': total, 'quantidade': qtd}
+        for (u, m, c, t), (total, qtd) in deltas.items()
+        if total or qtd
+    ]
+    if not linhas:
+        return
+    tabela = ResumoMensal.__table__
+    dialeto = conexao.dialect.name
+    if dialeto in ('mysql', 'mariadb'):
+        stmt = mysql.insert(tabela)
+        stmt = stmt.on_duplicate_key_update(
+            total=tabela.c.total + stmt.inserted.total,
+            quantidade=tabela.c.quantidade + stmt.inserted.quantidade
+        )
+        conexao.execute(stmt, linhas)
+    elif dialeto == 'sqlite':
+        stmt = sqlite.insert(tabela)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[c.name for c in tabela.primary_key],
+            set_={
+                'total': tabela.c.total + stmt.excluded.total,
+                'quantidade': tabela.c.quantidade + stmt.excluded.quantidade
+            }
+        )
+        conexao.execute(stmt, linhas)
+    else:
+        for linha in linhas:
+            chave = [tabela.c[c] == linha[c] for c in ('usuario_id', 'ano_mes', 'categoria_id', 'tipo')]
+            atualizadas = conexao.execute(tabela.update().where(*chave).values(
+                total=tabela.c.total + linha['total'],
+                quantidade=tabela.c.quantidade + linha['quantidade']
+            )).rowcount
+            if not atualizadas:
+                conexao.execute(tabela.insert(), linha)
+
+
+def agregar_totais(conexao, tabela, condicao, deltas, sinal):
+    """Acumula os totais das linhas de ``tabela`` (transacoes ou transacoes_arquivo) que atendem à condição."""
+    mes = expressao_ano_mes(tabela.c.data_transacao)
+    consulta = select(
+        tabela.c.usuario_id, mes, tabela.c.categoria_id, tabela.c.tipo,
+        func.sum(tabela.c.valor), func.count()
+    ).where(condicao).group_by(tabela.c.usuario_id, mes, tabela.c.categoria_id, tabela.c.tipo)
+    for usuario_id, mes_valor, categoria_id, tipo, total, quantidade in conexao.execute(consulta):
+        if usuario_id is None:
+            continue
+        chave = (usuario_id, mes_valor, categoria_id or SEM_CATEGORIA, tipo)
+        deltas[chave][0] += sinal * Decimal(str(total))
+        deltas[chave][1] += sinal * quantidade
+
+
+def _agregar_por_ids(conexao, ids, deltas, sinal):
+    """Acumula os totais atuais das transações informadas."""
+    tabela = Transacao.__table__
+    for i in range(0, len(ids), _LOTE_IDS):
+        agregar_totais(conexao, tabela, tabela.c.id.in_(ids[i:i + _LOTE_IDS]), deltas, sinal)
+
+
+def reconstruir(conexao, usuario_id=None):
+    """Recalcula os resumos a partir das transações (de um usuário ou de todos).
+
+    As transações arquivadas (``transacoes_arquivo``) também entram nos totais.
+    """
+    tabela = ResumoMensal.__table__
+    remocao = tabela.delete()
+    if usuario_id is not None:
+        remocao = remocao.where(tabela.c.usuario_id == usuario_id)
+    conexao.execute(remocao)
+
+    mes = expressao_ano_mes(Transacao.data_transacao)
+    categoria = func.coalesce(Transacao.categoria_id, SEM_CATEGORIA)
+    origem = select(
+        Transacao.usuario_id, mes, categoria, Transacao.tipo,
+        func.sum(Transacao.valor), func.count()
+    ).where(Transacao.usuario_id.isnot(None))
+    if usuario_id is not None:
+        origem = origem.where(Transacao.usuario_id == usuario_id)
+    origem = origem.group_by(Transacao.usuario_id, mes, categoria, Transacao.tipo)
+    conexao.execute(tabela.insert().from_select(
+        ['usuario_id', 'ano_mes', 'categoria_id', 'tipo', 'total', 'quantidade'], origem
+    ))
+
+    arquivo = TransacaoArquivada.__table__
+    if not inspect(conexao).has_table(arquivo.name):
+        return  # Migrações anteriores à 0006, que cria o arquivo
+    condicao = arquivo.c.usuario_id.isnot(None)
+    if usuario_id is not None:
+        condicao = arquivo.c.usuario_id == usuario_id
+    deltas = novos_deltas()
+    agregar_totais(conexao, arquivo, condicao, deltas, 1)
+    aplicar_deltas(conexao, deltas)
+
+
+# Eventos de mapper: alterações de objetos Transacao via unit of work
+
+def _deltas_da_sessao(target):
+    session = object_session(target)
+    return session.info.setdefault(_CHAVE_SESSAO, novos_deltas())
+
+
+@event.listens_for(Transacao, 'after_insert')
+def _apos_inserir(mapper, conexao, target):
+    _acumular(_deltas_da_sessao(target), target.usuario_id, target.data_transacao,
+              target.categoria_id, target.tipo, target.valor, 1)
+
+
+@event.listens_for(Transacao, 'after_delete')
+def _apos_remover(mapper, conexao, target):
+    estado = inspect(target)
+    _acumular(_deltas_da_sessao(target), *(_valor_anterior(estado, c) for c in (
+        'usuario_id', 'data_transacao', 'categoria_id', 'tipo', 'valor'
+    )), -1)
+
+
+@event.listens_for(Transacao, 'after_update')
+def _apos_atualizar(mapper, conexao, target):
+    estado = inspect(target)
+    colunas = ('usuario_id', 'data_transacao', 'categoria_id', 'tipo', 'valor')
+    deltas = _deltas_da_sessao(target)
+    _acumular(deltas, *(_valor_anterior(estado, c) for c in colunas), -1)
+    _acumular(deltas, *(getattr(target, c) for c in colunas), 1)
+
+
+def _valor_anterior(estado, coluna):
+    """Valor da coluna antes das alterações pendentes neste flush."""
+    historico = estado.attrs[coluna].history
+    if historico.deleted:
+        return historico.deleted[0]
+    return estado.attrs[coluna].value
+
+
+@event.listens_for(Session, 'after_flush')
+def _gravar_deltas(session, flush_context):
+    deltas = session.info.pop(_CHAVE_SESSAO, None)
+    if deltas:
+        aplicar_deltas(session.connection(), deltas)
+
+
+# Operações em massa executadas pela sessão
+
+def _afeta_transacoes(statement):
+    tabela = getattr(statement, 'table', None)
+    return tabela is not None and getattr(tabela, 'name', None) == Transacao.__tablename__
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _operacao_em_massa(estado):
+    """Ajusta os resumos antes de um INSERT/UPDATE/DELETE em massa.
+
+    Os deltas são gravados na mesma transação, antes do comando; para
+    UPDATE os novos totais são somados em ``after_bulk_update``, quando os
+    valores atualizados já estão no banco.
+    """
+    if estado.is_select or not _afeta_transacoes(estado.statement):
+        return
+    conexao = estado.session.connection()
+    deltas = novos_deltas()
+
+    if estado.is_insert:
+        parametros = estado.parameters
+        if isinstance(parametros, dict):
+            parametros = [parametros]
+        for linha in parametros or []:
+            _acumular(deltas, linha.get('usuario_id'), linha.get('data_transacao'),
+                      linha.get('categoria_id'), linha.get('tipo'), linha.get('valor'), 1)
+
+    elif estado.is_delete or (estado.is_update and estado.is_orm_statement):
+        consulta = select(Transacao.id)
+        if estado.statement.whereclause is not None:
+            consulta = consulta.where(estado.statement.whereclause)
+        ids = conexao.execute(consulta).scalars().all()
+        _agregar_por_ids(conexao, ids, deltas, -1)
+        if estado.is_update:
+            estado.session.info[_CHAVE_IDS_ATUALIZADOS] = ids
+
+    aplicar_deltas(conexao, deltas)
+
+
+@event.listens_for(Session, 'after_bulk_update')
+def _apos_atualizacao_em_massa(contexto):
+    ids = contexto.session.info.pop(_CHAVE_IDS_ATUALIZADOS, None)
+    if ids:
+        deltas = novos_deltas()
+        conexao = contexto.session.connection()
+        _agregar_por_ids(conexao, ids, deltas, 1)
+        aplicar_deltas(conexao, deltas)
@@ -1,17 +1,70 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, g
 from flask_jwt_extended import jwt_required, get_jwt_identity, create_access_token
-from datetime import datetime
+from datetime import datetime, timedelta
+from decimal import Decimal
 from .models import Usuario, Transacao, Categoria
-from .database import get_db_session, verificar_conexao  # Importa as funções para gerenciar a conexão
+from .database import get_db_session, estatisticas_pool  # Importa as funções para gerenciar a conexão
+from .cache import em_cache, invalidar_cache
+from .replicas import ler_da_replica, registrar_escrita
+from .consultas import (
+    consulta_selecao, consulta_listagem, consulta_busca, consulta_transacoes_periodo,
+    consulta_fluxo, consulta_categorias, consulta_arvore_categorias, consulta_exportacao,
+    consulta_estatisticas, consulta_dashboard, ler_em_lotes
+)
+from .expressoes import GRANULARIDADES
+from .validacao import ErroValidacao, validar_data, validar_transacao, validar_selecao, filtros_da_consulta
+from .importacao import FORMATOS as FORMATOS_IMPORTACAO, detectar_formato, importar_transacoes as importar
+from .paginacao import (
+    CursorInvalido, codificar_cursor, decodificar_cursor, codificar_cursor_busca,
+    decodificar_cursor_busca, obter_limite
+)
+from .busca import BuscaInvalida, interpretar_busca
+from .transmissao import pedido_ndjson, resposta_ndjson
+from .arvore import eh_descendente, remover_subarvore
+from .arquivo import arquivo_no_periodo
+from .exportacao import FORMATOS as FORMATOS_EXPORTACAO, FormatoIndisponivel, gerador_exportacao, resposta_exportacao
+from .serializacao import formato_valores
+from .dashboard import interpretar_periodo, montar_dashboard
+from .estatisticas import (
+    NumpyIndisponivel, calcular_estatisticas, carregar_colunas, inicio_consulta, verificar_numpy
+)
+from . import metricas, detector_sql, perfilador, replicas
 from urllib.parse import quote  # Importa a função para codificar URLs
 
 api = Blueprint('api', __name__)
+metricas.instrumentar(api)  # Latência, SQL e bytes por rota em /metrics; registrado primeiro para medir os demais hooks
+detector_sql.instrumentar(api)  # N+1 e consultas lentas (DETECTOR_SQL)
+perfilador.instrumentar(api)  # Perfil sob demanda (PERFILADOR_USUARIOS); registrado por último para envolver só a rota
+replicas.instrumentar(api)  # Leituras de volta ao primário ao fim da requisição (DB_REPLICAS)
+
+@api.after_request
+def invalidar_cache_apos_escrita(response):
+    """Invalida o cache do usuário após qualquer escrita bem sucedida.
+
+    As leituras seguintes do usuário também ficam no primário pela janela
+    de aderência das réplicas.
+    """
+    if request.method in ('POST', 'PUT', 'PATCH', 'DELETE') and response.status_code < 400:
+        try:
+            usuario_id = get_jwt_identity()
+        except RuntimeError:
+            usuario_id = None  # Rotas sem autenticação (login, registro)
+        invalidar_cache(usuario_id)
+        registrar_escrita(usuario_id)
+    return response
+
+@api.before_request
+def validar_formato_valores():
+    """Rejeita um formato de valores monetários desconhecido (?valores= ou X-Formato-Valores)."""
+    try:
+        formato_valores()
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 422
 
 @api.route('/auth/registro', methods=['POST'])
 def registro():
     dados = request.get_json()
     
-    verificar_conexao()  # Verifica e fecha a conexão se necessário
     session = get_db_session()  # Obtém a sessão do banco de dados
 
     if Usuario.query.filter_by(email=dados['email']).first():
@@ -31,7 +84,6 @@ def registro():
 @api.route('/auth/login', methods=['POST'])
 def login():
     dados = request.get_json()
-    verificar_conexao()  # Verifica e fecha a conexão se necessário
     session = get_db_session()  # Obtém a sessão do banco de dados
 
     usuario = Usuario.query.filter_by(email=dados['email']).first()
@@ -48,59 +100,191 @@ def criar_transacao():
     usuario_id = get_jwt_identity()
     dados = request.get_json()
     
-    verificar_conexao()  # Verifica e fecha a conexão se necessário
     session = get_db_session()  # Obtém a sessão do banco de dados
 
-    transacao = Transacao(
-        valor=dados['valor'],
-        tipo=dados['tipo'],
-        descricao=dados.get('descricao'),
-        data_transacao=datetime.strptime(dados['data_transacao'], '%Y-%m-%d').date(),
-        categoria_id=dados.get('categoria_id'),
-        usuario_id=usuario_id
-    )
+    try:
+        campos = validar_transacao(dados)
+    except ErroValidacao as e:
+        return jsonify({'erro': str(e)}), 422
+
+    transacao = Transacao(usuario_id=usuario_id, **campos)
     
     session.add(transacao)
     session.commit()
     
     return jsonify({'mensagem': 'Transação criada com sucesso'}), 201
 
+@api.route('/transacoes/importar', methods=['POST'])
+@jwt_required()
+def importar_transacoes():
+    usuario_id = get_jwt_identity()
+    session = get_db_session()  # Obtém a sessão do banco de dados
+
+    # Aceita upload multipart (campo "arquivo") ou o arquivo no corpo da requisição
+    arquivo = request.files.get('arquivo')
+    formato = request.args.get('formato') or detectar_formato(
+        arquivo.filename if arquivo else None,
+        arquivo.mimetype if arquivo else request.mimetype
+    )
+    if formato not in FORMATOS_IMPORTACAO:
+        return jsonify({'erro': f"Formato inválido. Use {'|'.join(FORMATOS_IMPORTACAO)}."}), 422
+
+    try:
+        tamanho_lote = obter_limite(
+            request.args.get('lote'),
+            current_app.config['IMPORTACAO_LOTE_PADRAO'],
+            current_app.config['IMPORTACAO_LOTE_MAXIMO']
+        )
+    except ValueError:
+        return jsonify({'erro': 'Parâmetro lote inválido.'}), 422
+
+    resultado = importar(
+        session,
+        usuario_id,
+        arquivo.stream if arquivo else request.stream,
+        formato,
+        tamanho_lote,
+        current_app.config['IMPORTACAO_MAX_ERROS']
+    )
+    return jsonify(resultado), 200
+
+def _transacao_listagem(id, valor, tipo, descricao, data_transacao, categoria_id):
+    """Serializa uma linha de ``consulta_listagem``; o valor segue como Decimal até o JSON."""
+    return {
+        'id': id,
+        'valor': valor,
+        'tipo': tipo,
+        'descricao': descricao,
+        'data_transacao': data_transacao.strftime('%Y-%m-%d'),
+        'categoria_id': categoria_id
+    }
+
 @api.route('/transacoes', methods=['GET'])
 @jwt_required()
+@em_cache
+@ler_da_replica
 def listar_transacoes():
     usuario_id = get_jwt_identity()
     
-    verificar_conexao()  # Verifica e fecha a conexão se necessário
     session = get_db_session()  # Obtém a sessão do banco de dados
 
-    filtros = request.args
-    query = Transacao.query.filter_by(usuario_id=usuario_id)
+    try:
+        filtros = filtros_da_consulta(request.args)
+        limite = obter_limite(
+            request.args.get('limit'),
+            current_app.config['PAGINACAO_LIMITE_PADRAO'],
+            current_app.config['PAGINACAO_LIMITE_MAXIMO']
+        )
+    except ErroValidacao as e:
+        return jsonify({'erro': str(e)}), 422
+    except ValueError:
+        return jsonify({'erro': 'Parâmetro limit inválido.'}), 422
+
+    if request.args.get('q'):
+        return _buscar_transacoes(session, usuario_id, filtros, limite)
+
+    # Paginação por cursor (keyset): continua a partir do último (data, id) visto
+    cursor = None
+    if request.args.get('cursor'):
+        try:
+            cursor = decodificar_cursor(request.args['cursor'])
+        except CursorInvalido as e:
+            return jsonify({'erro': str(e)}), 422
+
+    tamanho_lote = current_app.config['LEITURA_TAMANHO_LOTE']
+
+    # Modo NDJSON: todo o histórico (a partir do cursor, se houver) em uma
+    # única resposta, lida do cursor do servidor e enviada em blocos
+    if pedido_ndjson():
+        linhas = ler_em_lotes(session, consulta_listagem(session, usuario_id, filtros, cursor), tamanho_lote)
+        return resposta_ndjson((_transacao_listagem(*linha) for linha in linhas), tamanho_lote)
+
+    # Busca um registro a mais para saber se existe próxima página; as
+    # linhas são tuplas de colunas, serializadas sem criar objetos do ORM
+    linhas = ler_em_lotes(
+        session,
+        consulta_listagem(session, usuario_id, filtros, cursor, limite + 1),
+        tamanho_lote
+    )
+    transacoes = []
+    next_cursor = None
+    for linha in linhas:
+        if len(transacoes) == limite:
+            # Linha extra (a última do LIMIT): só indica que há próxima página
+            next_cursor = codificar_cursor(ultima_data, transacoes[-1]['id'])
+            continue
+        transacoes.append(_transacao_listagem(*linha))
+        ultima_data = linha.data_transacao
+
+    return jsonify({
+        'transacoes': transacoes,
+        'next_cursor': next_cursor
+    }), 200
+
+def _buscar_transacoes(session, usuario_id, filtros, limite):
+    """Busca textual (q=) em GET /transacoes: resultados por relevância, com os mesmos filtros."""
+    try:
+        termos = interpretar_busca(request.args['q'])
+        posicao = decodificar_cursor_busca(request.args['cursor']) if request.args.get('cursor') else 0
+    except (BuscaInvalida, CursorInvalido) as e:
+        return jsonify({'erro': str(e)}), 422
+
+    # Só as transações vivas estão no índice de busca: se o período alcança
+    # anos arquivados, a resposta informa até quando nada foi pesquisado
+    corte = arquivo_no_periodo(session, filtros.get('data_inicio'))
+    arquivado_ate = (corte - timedelta(days=1)).strftime('%Y-%m-%d') if corte else None
+
+    tamanho_lote = current_app.config['LEITURA_TAMANHO_LOTE']
+    if pedido_ndjson():
+        linhas = ler_em_lotes(session, consulta_busca(session, usuario_id, filtros, termos, posicao), tamanho_lote)
+        resposta = resposta_ndjson((_resultado_busca(*linha) for linha in linhas), tamanho_lote)
+        if arquivado_ate:
+            resposta.headers['X-Arquivado-Ate'] = arquivado_ate
+        return resposta
+
+    linhas = session.execute(consulta_busca(session, usuario_id, filtros, termos, posicao, limite + 1)).all()
+    return jsonify({
+        'transacoes': [_resultado_busca(*linha) for linha in linhas[:limite]],
+        'next_cursor': codificar_cursor_busca(posicao + limite) if len(linhas) > limite else None,
+        'arquivado_ate': arquivado_ate
+    }), 200
+
+def _resultado_busca(*linha):
+    """Linha de ``consulta_busca``: a transação da listagem mais a relevância."""
+    transacao = _transacao_listagem(*linha[:-1])
+    transacao['relevancia'] = round(float(linha[-1]), 6)
+    return transacao
+
+@api.route('/transacoes/exportar', methods=['GET'])
+@jwt_required()
+@ler_da_replica
+def exportar_transacoes():
+    """Arquivo CSV, Parquet ou XLSX com as transações filtradas, transmitido do cursor."""
+    usuario_id = get_jwt_identity()
+    formato = request.args.get('formato', 'csv').lower()
+    if formato not in FORMATOS_EXPORTACAO:
+        return jsonify({'erro': f"Formato inválido. Use {'|'.join(FORMATOS_EXPORTACAO)}."}), 422
+    try:
+        filtros = filtros_da_consulta(request.args)
+    except ErroValidacao as e:
+        return jsonify({'erro': str(e)}), 422
+    try:
+        gerar = gerador_exportacao(formato)
+    except FormatoIndisponivel as e:
+        return jsonify({'erro': str(e)}), 501
     
-    if 'data_inicio' in filtros:
-        query = query.filter(Transacao.data_transacao >= filtros['data_inicio'])
-    if 'data_fim' in filtros:
-        query = query.filter(Transacao.data_transacao <= filtros['data_fim'])
-    if 'categoria_id' in filtros:
-        query = query.filter_by(categoria_id=filtros['categoria_id'])
-    if 'tipo' in filtros:
-        query = query.filter_by(tipo=filtros['tipo'])
-        
-    transacoes = query.all()
-    return jsonify([{
-        'id': t.id,
-        'valor': float(t.valor),
-        'tipo': t.tipo,
-        'descricao': t.descricao,
-        'data_transacao': t.data_transacao.strftime('%Y-%m-%d'),
-        'categoria_id': t.categoria_id
-    } for t in transacoes]), 200
+    session = get_db_session()  # Obtém a sessão do banco de dados
+
+    # Mesmos filtros da listagem; o nome da categoria vem no JOIN
+    tamanho_lote = current_app.config['EXPORTACAO_TAMANHO_LOTE']
+    linhas = ler_em_lotes(session, consulta_exportacao(session, usuario_id, filtros), tamanho_lote)
+    return resposta_exportacao(formato, gerar(linhas.partitions(tamanho_lote)))
 
 @api.route('/transacoes/<int:id>', methods=['PUT'])
 @jwt_required()
 def atualizar_transacao(id):
     usuario_id = get_jwt_identity()
     
-    verificar_conexao()  # Verifica e fecha a conexão se necessário
     session = get_db_session()  # Obtém a sessão do banco de dados
 
     transacao = Transacao.query.filter_by(id=id, usuario_id=usuario_id).first()
@@ -108,14 +292,13 @@ def atualizar_transacao(id):
     if not transacao:
         return jsonify({'erro': 'Transação não encontrada'}), 404
         
-    dados = request.get_json()
+    try:
+        campos = validar_transacao(request.get_json(), parcial=True)
+    except ErroValidacao as e:
+        return jsonify({'erro': str(e)}), 422
     
-    transacao.valor = dados.get('valor', transacao.valor)
-    transacao.tipo = dados.get('tipo', transacao.tipo)
-    transacao.descricao = dados.get('descricao', transacao.descricao)
-    if 'data_transacao' in dados:
-        transacao.data_transacao = datetime.strptime(dados['data_transacao'], '%Y-%m-%d').date()
-    transacao.categoria_id = dados.get('categoria_id', transacao.categoria_id)
+    for campo, valor in campos.items():
+        setattr(transacao, campo, valor)
     
     session.commit()
     return jsonify({'mensagem': 'Transação atualizada com sucesso'}), 200
@@ -125,7 +308,6 @@ def atualizar_transacao(id):
 def deletar_transacao(id):
     usuario_id = get_jwt_identity()
     
-    verificar_conexao()  # Verifica e fecha a conexão se necessário
     session = get_db_session()  # Obtém a sessão do banco de dados
 
     transacao = Transacao.query.filter_by(id=id, usuario_id=usuario_id).first()
@@ -137,18 +319,72 @@ def deletar_transacao(id):
     session.commit()
     return jsonify({'mensagem': 'Transação deletada com sucesso'}), 200
 
+@api.route('/transacoes', methods=['PATCH'])
+@jwt_required()
+def atualizar_transacoes():
+    """Atualiza em massa as transações selecionadas com um único UPDATE."""
+    usuario_id = get_jwt_identity()
+    dados = request.get_json()
+    
+    session = get_db_session()  # Obtém a sessão do banco de dados
+
+    try:
+        ids, filtros = validar_selecao(dados, current_app.config['OPERACAO_MASSA_MAX_IDS'])
+        campos = validar_transacao(dados.get('campos') or {}, parcial=True)
+    except ErroValidacao as e:
+        return jsonify({'erro': str(e)}), 422
+    if not campos:
+        return jsonify({'erro': 'Informe os campos a atualizar.'}), 422
+
+    if campos.get('categoria_id') is not None and not Categoria.query.filter_by(
+        id=campos['categoria_id'], usuario_id=usuario_id
+    ).first():
+        return jsonify({'erro': 'Categoria não encontrada'}), 404
+
+    atualizadas = consulta_selecao(session, usuario_id, ids, filtros).update(
+        campos, synchronize_session=False
+    )
+    session.commit()
+    return jsonify({'mensagem': 'Transações atualizadas com sucesso', 'afetadas': atualizadas}), 200
+
+@api.route('/transacoes', methods=['DELETE'])
+@jwt_required()
+def deletar_transacoes():
+    """Remove em massa as transações selecionadas com um único DELETE."""
+    usuario_id = get_jwt_identity()
+    dados = request.get_json()
+    
+    session = get_db_session()  # Obtém a sessão do banco de dados
+
+    try:
+        ids, filtros = validar_selecao(dados, current_app.config['OPERACAO_MASSA_MAX_IDS'])
+    except ErroValidacao as e:
+        return jsonify({'erro': str(e)}), 422
+
+    removidas = consulta_selecao(session, usuario_id, ids, filtros).delete(
+        synchronize_session=False
+    )
+    session.commit()
+    return jsonify({'mensagem': 'Transações deletadas com sucesso', 'afetadas': removidas}), 200
+
 @api.route('/categorias', methods=['POST'])
 @jwt_required()
 def criar_categoria():
     usuario_id = get_jwt_identity()
     dados = request.get_json()
     
-    verificar_conexao()  # Verifica e fecha a conexão se necessário
     session = get_db_session()  # Obtém a sessão do banco de dados
 
+    # A categoria pai precisa ser do mesmo usuário: a árvore é por usuário
+    categoria_pai_id = dados.get('categoria_pai_id')
+    if categoria_pai_id is not None and not Categoria.query.filter_by(
+        id=categoria_pai_id, usuario_id=usuario_id
+    ).first():
+        return jsonify({'erro': 'Categoria pai não encontrada'}), 404
+
     categoria = Categoria(
         nome=dados['nome'],
-        categoria_pai_id=dados.get('categoria_pai_id'),
+        categoria_pai_id=categoria_pai_id,
         usuario_id=usuario_id
     )
     
@@ -157,11 +393,53 @@ def criar_categoria():
     
     return jsonify({'mensagem': 'Categoria criada com sucesso'}), 201
 
+@api.route('/categorias/<int:id>', methods=['PUT'])
+@jwt_required()
+def atualizar_categoria(id):
+    """Renomeia e/ou move a categoria (com a subárvore) para outro pai."""
+    usuario_id = get_jwt_identity()
+    dados = request.get_json() or {}
+    
+    session = get_db_session()  # Obtém a sessão do banco de dados
+
+    categoria = Categoria.query.filter_by(id=id, usuario_id=usuario_id).first()
+    if not categoria:
+        return jsonify({'erro': 'Categoria não encontrada'}), 404
+
+    if dados.get('nome'):
+        categoria.nome = dados['nome']
+    if 'categoria_pai_id' in dados:
+        categoria_pai_id = dados['categoria_pai_id']
+        if categoria_pai_id is not None:
+            if not Categoria.query.filter_by(id=categoria_pai_id, usuario_id=usuario_id).first():
+                return jsonify({'erro': 'Categoria pai não encontrada'}), 404
+            if eh_descendente(session, categoria_pai_id, categoria.id):
+                return jsonify({'erro': 'A categoria não pode ficar abaixo de si mesma ou de uma subcategoria.'}), 422
+        categoria.categoria_pai_id = categoria_pai_id  # Os caminhos são ajustados no flush (api/arvore.py)
+    
+    session.commit()
+    return jsonify({'mensagem': 'Categoria atualizada com sucesso'}), 200
+
+@api.route('/categorias/<int:id>', methods=['DELETE'])
+@jwt_required()
+def deletar_categoria(id):
+    """Remove a categoria e as subcategorias; as transações delas ficam sem categoria."""
+    usuario_id = get_jwt_identity()
+    
+    session = get_db_session()  # Obtém a sessão do banco de dados
+
+    if not Categoria.query.filter_by(id=id, usuario_id=usuario_id).first():
+        return jsonify({'erro': 'Categoria não encontrada'}), 404
+
+    removidas = remover_subarvore(session, id)
+    session.commit()
+    return jsonify({'mensagem': 'Categoria deletada com sucesso', 'afetadas': removidas}), 200
+
 @api.route('/categorias', methods=['GET'])
 @jwt_required()
+@ler_da_replica
 def listar_categorias():
     usuario_id = get_jwt_identity()  # Obtém o ID do usuário do token
-    verificar_conexao()  # Verifica e fecha a conexão se necessário
     session = get_db_session()  # Obtém a sessão do banco de dados
 
     categorias = Categoria.query.filter_by(usuario_id=usuario_id).all()
@@ -171,12 +449,20 @@ def listar_categorias():
         'categoria_pai_id': c.categoria_pai_id
     } for c in categorias]), 200
 
+def _parametro_booleano(valor):
+    """Interpreta parâmetros de query string como 1/true/sim."""
+    return str(valor).lower() in ('1', 'true', 'sim')
+
 @api.route('/relatorios/fluxo', methods=['GET'])
 @jwt_required()
+@em_cache
+@ler_da_replica
 def relatorio_fluxo():
     usuario_id = get_jwt_identity()
     data_inicio = request.args.get('data_inicio')
     data_fim = request.args.get('data_fim')
+    granularidade = request.args.get('granularidade', 'dia')
+    incluir_transacoes = _parametro_booleano(request.args.get('incluir_transacoes'))
     
     # Verifica se as datas estão no formato correto
     if not data_inicio or not data_fim:
@@ -184,73 +470,264 @@ def relatorio_fluxo():
 
     try:
         # Tente converter as datas para o formato correto
-        data_inicio = datetime.strptime(data_inicio, '%Y-%m-%d')
-        data_fim = datetime.strptime(data_fim, '%Y-%m-%d')
+        data_inicio = datetime.strptime(data_inicio, '%Y-%m-%d').date()
+        data_fim = datetime.strptime(data_fim, '%Y-%m-%d').date()
     except ValueError:
         return jsonify({'erro': 'Formato de data inválido. Use YYYY-MM-DD.'}), 422
 
-    verificar_conexao()  # Verifica e fecha a conexão se necessário
+    if granularidade not in GRANULARIDADES:
+        return jsonify({'erro': f"Granularidade inválida. Use {'|'.join(GRANULARIDADES)}."}), 422
+
     session = get_db_session()  # Obtém a sessão do banco de dados
+    tamanho_lote = current_app.config['LEITURA_TAMANHO_LOTE']
+
+    # Agrega por período no banco; o saldo acumulado vem de SUM() OVER
+    consulta = consulta_fluxo(session, usuario_id, data_inicio, data_fim, granularidade)
 
-    # Obtém as transações do banco de dados
-    transacoes = Transacao.query.filter_by(usuario_id=usuario_id).filter(
-        Transacao.data_transacao >= data_inicio,
-        Transacao.data_transacao <= data_fim
-    ).all()
+    if pedido_ndjson():
+        registros = _registros_fluxo(
+            session, consulta, usuario_id, data_inicio, data_fim,
+            granularidade, incluir_transacoes, tamanho_lote
+        )
+        return resposta_ndjson(registros, tamanho_lote)
+
+    serie = consulta.all()
 
     # Verifica se as transações estão vazias
-    if not transacoes:
+    if not serie:
         return jsonify({'mensagem': 'Nenhuma transação encontrada para o período especificado.'}), 200
 
-    receitas = sum(float(t.valor) for t in transacoes if t.tipo == 'receita')
-    despesas = sum(float(t.valor) for t in transacoes if t.tipo == 'despesa')
+    # Totais em Decimal: a soma é exata e a conversão fica para o JSON
+    receitas = sum((p.receitas for p in serie), Decimal('0'))
+    despesas = sum((p.despesas for p in serie), Decimal('0'))
     saldo = receitas - despesas
     
-    return jsonify({
+    resultado = {
         'receitas': receitas,
         'despesas': despesas,
         'saldo': saldo,
-        'transacoes': [{
-            'id': t.id,
-            'valor': float(t.valor),
-            'tipo': t.tipo,
-            'data': t.data_transacao.strftime('%Y-%m-%d')
-        } for t in transacoes]
-    }), 200
+        'granularidade': granularidade,
+        'serie': [_ponto_fluxo(p) for p in serie]
+    }
+
+    # A lista de transações individuais só é enviada quando solicitada
+    if incluir_transacoes:
+        linhas = ler_em_lotes(
+            session,
+            consulta_transacoes_periodo(session, usuario_id, data_inicio, data_fim),
+            tamanho_lote
+        )
+        resultado['transacoes'] = [_transacao_periodo(*linha) for linha in linhas]
+    
+    return jsonify(resultado), 200
+
+@api.route('/relatorios/estatisticas', methods=['GET'])
+@jwt_required()
+@em_cache
+@ler_da_replica
+def relatorio_estatisticas():
+    """Saldo acumulado, médias móveis, variação mensal por categoria e percentis (NumPy)."""
+    usuario_id = get_jwt_identity()
+    granularidade = request.args.get('granularidade', 'dia')
+    if not request.args.get('data_inicio') or not request.args.get('data_fim'):
+        return jsonify({'erro': 'As datas de início e fim são obrigatórias.'}), 422
+    try:
+        data_inicio = validar_data(request.args['data_inicio'])
+        data_fim = validar_data(request.args['data_fim'])
+    except ErroValidacao as e:
+        return jsonify({'erro': str(e)}), 422
+    if data_fim < data_inicio:
+        return jsonify({'erro': 'data_fim deve ser igual ou posterior a data_inicio.'}), 422
+    if granularidade not in GRANULARIDADES:
+        return jsonify({'erro': f"Granularidade inválida. Use {'|'.join(GRANULARIDADES)}."}), 422
+    try:
+        verificar_numpy()
+    except NumpyIndisponivel as e:
+        return jsonify({'erro': str(e)}), 501
+
+    session = get_db_session()  # Obtém a sessão do banco de dados
+
+    # Uma única leitura das transações, já como colunas inteiras
+    primeiro = inicio_consulta(data_inicio)
+    matriz = carregar_colunas(
+        session.connection(), consulta_estatisticas(session, usuario_id, primeiro, data_fim),
+        current_app.config['LEITURA_TAMANHO_LOTE']
+    )
+    nomes = dict(session.query(Categoria.id, Categoria.nome).filter(Categoria.usuario_id == usuario_id))
+
+    return jsonify(calcular_estatisticas(matriz, primeiro, data_inicio, data_fim, granularidade, nomes)), 200
+
+def _ponto_fluxo(ponto):
+    """Serializa um período da série de ``consulta_fluxo``."""
+    return {
+        'periodo': ponto.periodo,
+        'receitas': ponto.receitas,
+        'despesas': ponto.despesas,
+        'saldo': ponto.saldo
+    }
+
+def _transacao_periodo(id, valor, tipo, data_transacao):
+    """Serializa uma linha de ``consulta_transacoes_periodo``."""
+    return {
+        'id': id,
+        'valor': valor,
+        'tipo': tipo,
+        'data': data_transacao.strftime('%Y-%m-%d')
+    }
+
+def _registros_fluxo(session, consulta, usuario_id, data_inicio, data_fim,
+                     granularidade, incluir_transacoes, tamanho_lote):
+    """Linhas do relatório de fluxo no modo NDJSON.
+
+    Cada linha tem o campo ``registro``: ``periodo`` para os pontos da
+    série, ``transacao`` para as transações (com incluir_transacoes) e, por
+    último, ``total`` com os totais do período.
+    """
+    receitas = despesas = Decimal('0')
+    for ponto in ler_em_lotes(session, consulta.statement, tamanho_lote):
+        receitas += ponto.receitas
+        despesas += ponto.despesas
+        yield {'registro': 'periodo', **_ponto_fluxo(ponto)}
+
+    if incluir_transacoes:
+        linhas = ler_em_lotes(
+            session,
+            consulta_transacoes_periodo(session, usuario_id, data_inicio, data_fim),
+            tamanho_lote
+        )
+        for linha in linhas:
+            yield {'registro': 'transacao', **_transacao_periodo(*linha)}
+
+    yield {
+        'registro': 'total',
+        'receitas': receitas,
+        'despesas': despesas,
+        'saldo': receitas - despesas,
+        'granularidade': granularidade
+    }
 
 @api.route('/relatorios/categorias', methods=['GET'])
 @jwt_required()
+@em_cache
+@ler_da_replica
 def relatorio_categorias():
     usuario_id = get_jwt_identity()
-    data_inicio = request.args.get('data_inicio')
-    data_fim = request.args.get('data_fim')
+    try:
+        data_inicio = request.args.get('data_inicio')
+        data_inicio = validar_data(data_inicio) if data_inicio else None
+        data_fim = request.args.get('data_fim')
+        data_fim = validar_data(data_fim) if data_fim else None
+    except ErroValidacao as e:
+        return jsonify({'erro': str(e)}), 422
     
-    verificar_conexao()  # Verifica e fecha a conexão se necessário
     session = get_db_session()  # Obtém a sessão do banco de dados
 
-    categorias = Categoria.query.filter_by(usuario_id=usuario_id).all()
-    resultado = []
-    
-    for categoria in categorias:
-        query = Transacao.query.filter_by(
-            usuario_id=usuario_id,
-            categoria_id=categoria.id
-        )
-        
-        if data_inicio:
-            query = query.filter(Transacao.data_transacao >= data_inicio)
-        if data_fim:
-            query = query.filter(Transacao.data_transacao <= data_fim)
-            
-        transacoes = query.all()
-        
-        total_receitas = sum(float(t.valor) for t in transacoes if t.tipo == 'receita')
-        total_despesas = sum(float(t.valor) for t in transacoes if t.tipo == 'despesa')
-        
-        resultado.append({
-            'categoria': categoria.nome,
-            'total_receitas': total_receitas,
-            'total_despesas': total_despesas
+    # Uma única consulta agregada por (categoria, tipo)
+    query = consulta_categorias(session, usuario_id, data_inicio, data_fim)
+
+    # Os totais chegam como Decimal exato; apenas agrupamos receitas e
+    # despesas de cada categoria em uma única entrada
+    totais = {}
+    for categoria_id, nome, tipo, total in query:
+        item = totais.setdefault(categoria_id, {
+            'categoria_id': categoria_id,
+            'categoria': nome if categoria_id is not None else 'Sem categoria',
+            'total_receitas': Decimal('0.00'),
+            'total_despesas': Decimal('0.00')
         })
+        item['total_receitas' if tipo == 'receita' else 'total_despesas'] += total
+
+    resultado = sorted(totais.values(), key=lambda item: (item['categoria_id'] is None, item['categoria']))
+    return jsonify(resultado), 200
+
+@api.route('/relatorios/categorias/arvore', methods=['GET'])
+@jwt_required()
+@em_cache
+@ler_da_replica
+def relatorio_arvore_categorias():
+    """Árvore de categorias com os totais de cada uma e os acumulados das subcategorias."""
+    usuario_id = get_jwt_identity()
+    try:
+        data_inicio = request.args.get('data_inicio')
+        data_inicio = validar_data(data_inicio) if data_inicio else None
+        data_fim = request.args.get('data_fim')
+        data_fim = validar_data(data_fim) if data_fim else None
+    except ErroValidacao as e:
+        return jsonify({'erro': str(e)}), 422
     
-    return jsonify(resultado), 200 
\ No newline at end of file
+    session = get_db_session()  # Obtém a sessão do banco de dados
+
+    # Os acumulados já vêm somados do banco; aqui só se monta o aninhamento
+    nos, sem_categoria = {}, None
+    for id, nome, categoria_pai_id, receitas, despesas, receitas_diretas, despesas_diretas in \
+            consulta_arvore_categorias(session, usuario_id, data_inicio, data_fim):
+        no = {
+            'categoria_id': id,
+            'categoria': nome,
+            'categoria_pai_id': categoria_pai_id,
+            'total_receitas': receitas,
+            'total_despesas': despesas,
+            'receitas_diretas': receitas_diretas,
+            'despesas_diretas': despesas_diretas,
+        }
+        if id is None:
+            sem_categoria = no
+        else:
+            no['subcategorias'] = []
+            nos[id] = no
+
+    raizes = []
+    for no in sorted(nos.values(), key=lambda no: no['categoria']):
+        pai = nos.get(no['categoria_pai_id'])
+        (pai['subcategorias'] if pai is not None else raizes).append(no)
+    if sem_categoria is not None and (sem_categoria['total_receitas'] or sem_categoria['total_despesas']):
+        raizes.append(sem_categoria)
+    
+    return jsonify(raizes), 200
+
+def _data_dashboard():
+    """Último dia da janela do dashboard, fixado uma vez por requisição.
+
+    Entra também na chave do cache: depois da meia-noite a resposta
+    guardada no dia anterior deixa de ser servida (ou confirmada com 304).
+    """
+    if 'data_dashboard' not in g:
+        g.data_dashboard = datetime.now().date()
+    return g.data_dashboard
+
+@api.route('/dashboard', methods=['GET'])
+@jwt_required()
+@em_cache(chave=_data_dashboard)
+@ler_da_replica
+def dashboard():
+    """Totais, série de saldo reduzida e despesas por categoria dos últimos N dias, em uma consulta."""
+    usuario_id = get_jwt_identity()
+    try:
+        dias = interpretar_periodo(
+            request.args.get('periodo', '30d'), current_app.config['DASHBOARD_PERIODO_MAXIMO_DIAS']
+        )
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 422
+    try:
+        pontos = obter_limite(
+            request.args.get('pontos'),
+            current_app.config['DASHBOARD_PONTOS'],
+            current_app.config['DASHBOARD_PERIODO_MAXIMO_DIAS']
+        )
+    except ValueError:
+        return jsonify({'erro': 'Parâmetro pontos inválido.'}), 422
+
+    session = get_db_session()  # Obtém a sessão do banco de dados
+
+    data_fim = _data_dashboard()
+    data_inicio = data_fim - timedelta(days=dias - 1)
+    linhas = session.execute(consulta_dashboard(session, usuario_id, data_inicio, data_fim))
+    resultado = montar_dashboard(linhas, data_inicio, data_fim, pontos)
+    resultado['periodo'] = f'{dias}d'
+    return jsonify(resultado), 200
+
+@api.route('/status/pool', methods=['GET'])
+@jwt_required()
+def status_pool():
+    """Estatísticas do pool de conexões deste worker."""
+    return jsonify(estatisticas_pool()), 200
@@ -0,0 +1,86 @@
+"""Serialização JSON das respostas da API.
+
+``CodificadorJSON`` é o ``json_encoder`` da aplicação, usado por ``jsonify``
+e pelo modo NDJSON. Com o pacote opcional ``orjson`` instalado a codificação
+é feita por ele (várias vezes mais rápido em listagens grandes); sem ele,
+pelo ``json`` da biblioteca padrão. O JSON é equivalente nos dois casos, mas
+o orjson envia caracteres não ASCII em UTF-8 em vez de escapes ``\\uXXXX``.
+
+Valores monetários circulam como ``Decimal`` desde o banco e só são
+convertidos na serialização, no formato pedido com ``?valores=`` ou com o
+cabeçalho ``X-Formato-Valores``:
+
+* ``numero`` (padrão, compatível com os clientes existentes): número JSON;
+* ``texto``: string exata com duas casas (``"1234.50"``);
+* ``centavos``: inteiro em centavos (``123450``).
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from flask import current_app, has_request_context, request
+from flask.json import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # Dependência opcional
+    orjson = None
+
+CABECALHO_FORMATO = 'X-Formato-Valores'
+
+_CENTAVO = Decimal('0.01')
+
+
+def _centavos(valor):
+    return int((valor * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def _texto(valor):
+    return str(valor.quantize(_CENTAVO, rounding=ROUND_HALF_UP))
+
+
+FORMATOS_VALORES = {
+    'numero': float,
+    'texto': _texto,
+    'centavos': _centavos,
+}
+
+
+def formato_valores():
+    """Formato dos valores monetários pedido na requisição atual.
+
+    Levanta ValueError para um formato desconhecido.
+    """
+    if not has_request_context():
+        return 'numero'
+    formato = request.args.get('valores') or request.headers.get(CABECALHO_FORMATO)
+    if not formato:
+        return current_app.config.get('VALORES_FORMATO_PADRAO', 'numero')
+    formato = formato.strip().lower()
+    if formato not in FORMATOS_VALORES:
+        raise ValueError(f"Formato de valores inválido. Use {'|'.join(FORMATOS_VALORES)}.")
+    return formato
+
+
+class CodificadorJSON(JSONEncoder):
+    """JSONEncoder do Flask com Decimal no formato pedido e codificação pelo orjson."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        try:
+            self._converter_valor = FORMATOS_VALORES[formato_valores()]
+        except ValueError:
+            self._converter_valor = float  # A rota já respondeu 422; mensagens de erro usam o padrão
+
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return self._converter_valor(o)
+        return super().default(o)  # Datas, UUID, dataclasses: mesmo tratamento do Flask
+
+    def encode(self, o):
+        if orjson is None or self.indent is not None:
+            return super().encode(o)
+        opcoes = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            opcoes |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(o, default=self.default, option=opcoes).decode()
+        except orjson.JSONEncodeError:
+            return super().encode(o)  # Ex.: inteiros acima de 64 bits; o json padrão decide
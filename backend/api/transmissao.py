@@ -0,0 +1,43 @@
+"""Respostas NDJSON transmitidas em blocos para listagens grandes.
+
+O cliente pede o modo com ``?stream=1`` ou ``Accept: application/x-ndjson``.
+Cada registro vira uma linha JSON e as linhas são enviadas em blocos
+conforme são lidas do cursor, sem montar a lista inteira em memória.
+"""
+from flask import Response, current_app, request, stream_with_context
+
+MIMETYPE_NDJSON = 'application/x-ndjson'
+
+
+def pedido_ndjson():
+    """Indica se a requisição pediu o modo NDJSON."""
+    if str(request.args.get('stream')).lower() in ('1', 'true', 'sim'):
+        return True
+    return request.accept_mimetypes.best_match(['application/json', MIMETYPE_NDJSON]) == MIMETYPE_NDJSON
+
+
+def resposta_ndjson(registros, linhas_por_bloco):
+    """Response chunked que serializa ``registros`` (iterável de dicts) sob demanda.
+
+    O gerador roda com o contexto da requisição ativo, então a sessão do
+    banco e o cursor continuam abertos até a última linha ser enviada.
+    """
+    # Um codificador para a resposta inteira, com as opções que o jsonify usaria
+    codificador = current_app.json_encoder(
+        ensure_ascii=current_app.config['JSON_AS_ASCII'],
+        sort_keys=current_app.config['JSON_SORT_KEYS']
+    )
+
+    def gerar():
+        bloco = []
+        for registro in registros:
+            bloco.append(codificador.encode(registro))
+            if len(bloco) >= linhas_por_bloco:
+                yield '\n'.join(bloco) + '\n'
+                bloco = []
+        if bloco:
+            yield '\n'.join(bloco) + '\n'
+
+    resposta = Response(stream_with_context(gerar()), mimetype=MIMETYPE_NDJSON)
+    resposta.headers['X-Accel-Buffering'] = 'no'  # Proxies não devem acumular o corpo
+    return resposta
@@ -0,0 +1,130 @@
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+TIPOS_TRANSACAO = ('receita', 'despesa')
+VALOR_MAXIMO = Decimal('99999999.99')  # Limite de Numeric(10,2)
+
+
+class ErroValidacao(ValueError):
+    """Erro lançado quando os dados de uma transação são inválidos."""
+
+
+def validar_data(valor):
+    """Converte uma data no formato YYYY-MM-DD."""
+    try:
+        return datetime.strptime(str(valor), '%Y-%m-%d').date()
+    except ValueError:
+        raise ErroValidacao('Formato de data inválido. Use YYYY-MM-DD.')
+
+
+def validar_tipo(valor):
+    """Garante que o tipo seja um dos valores do ENUM da tabela."""
+    if valor not in TIPOS_TRANSACAO:
+        raise ErroValidacao(f"Tipo inválido. Use {' ou '.join(TIPOS_TRANSACAO)}.")
+    return valor
+
+
+def validar_valor(valor):
+    """Converte o valor para Decimal com duas casas."""
+    try:
+        decimal = Decimal(str(valor)).quantize(Decimal('0.01'))
+    except (InvalidOperation, ValueError):
+        raise ErroValidacao('Valor inválido.')
+    if not decimal.is_finite() or abs(decimal) > VALOR_MAXIMO:
+        raise ErroValidacao('Valor fora do intervalo permitido.')
+    return decimal
+
+
+def validar_categoria_id(valor):
+    """Converte o id da categoria, aceitando ausência como NULL."""
+    if valor in (None, ''):
+        return None
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ErroValidacao('categoria_id inválido.')
+
+
+def validar_descricao(valor):
+    """Aceita texto ou ausência (NULL); listas, objetos e números são recusados."""
+    if valor is not None and not isinstance(valor, str):
+        raise ErroValidacao('descricao deve ser um texto.')
+    return valor
+
+
+def validar_transacao(dados, parcial=False):
+    """Valida e normaliza os campos de uma transação.
+
+    Com ``parcial=True`` apenas os campos presentes são validados (uso em
+    atualizações); caso contrário valor, tipo e data_transacao são obrigatórios.
+    """
+    if not isinstance(dados, dict):
+        raise ErroValidacao('Os dados da transação devem ser um objeto.')
+    if not parcial:
+        faltando = [c for c in ('valor', 'tipo', 'data_transacao') if dados.get(c) in (None, '')]
+        if faltando:
+            raise ErroValidacao(f"Campos obrigatórios ausentes: {', '.join(faltando)}.")
+
+    campos = {}
+    if 'valor' in dados:
+        campos['valor'] = validar_valor(dados['valor'])
+    if 'tipo' in dados:
+        campos['tipo'] = validar_tipo(dados['tipo'])
+    if 'data_transacao' in dados:
+        campos['data_transacao'] = validar_data(dados['data_transacao'])
+    if 'descricao' in dados:
+        campos['descricao'] = validar_descricao(dados['descricao'])
+    if 'categoria_id' in dados:
+        campos['categoria_id'] = validar_categoria_id(dados['categoria_id'])
+    return campos
+
+
+CAMPOS_FILTRO = ('data_inicio', 'data_fim', 'categoria_id', 'tipo')
+
+
+def validar_filtros(filtros):
+    """Valida os filtros de listagem (data_inicio, data_fim, categoria_id, tipo)."""
+    if not isinstance(filtros, dict):
+        raise ErroValidacao('Os filtros devem ser um objeto.')
+    desconhecidos = set(filtros) - set(CAMPOS_FILTRO)
+    if desconhecidos:
+        raise ErroValidacao(f"Filtros desconhecidos: {', '.join(sorted(desconhecidos))}.")
+    validados = {}
+    if 'data_inicio' in filtros:
+        validados['data_inicio'] = validar_data(filtros['data_inicio'])
+    if 'data_fim' in filtros:
+        validados['data_fim'] = validar_data(filtros['data_fim'])
+    if 'categoria_id' in filtros:
+        validados['categoria_id'] = validar_categoria_id(filtros['categoria_id'])
+    if 'tipo' in filtros:
+        validados['tipo'] = validar_tipo(filtros['tipo'])
+    return validados
+
+
+def filtros_da_consulta(parametros):
+    """Valida os filtros presentes na query string; os demais parâmetros são ignorados."""
+    return validar_filtros({campo: parametros[campo] for campo in CAMPOS_FILTRO if campo in parametros})
+
+
+def validar_selecao(dados, max_ids):
+    """Lê a seleção de uma operação em massa: lista de ``ids`` e/ou ``filtros``.
+
+    Retorna a tupla (ids, filtros). Exige ao menos um critério para evitar
+    que uma requisição vazia afete todas as transações do usuário.
+    """
+    if not isinstance(dados, dict):
+        raise ErroValidacao('O corpo da requisição deve ser um objeto.')
+    ids = dados.get('ids')
+    if ids is not None:
+        if not isinstance(ids, list) or not ids:
+            raise ErroValidacao('ids deve ser uma lista não vazia.')
+        if len(ids) > max_ids:
+            raise ErroValidacao(f'No máximo {max_ids} ids por requisição.')
+        try:
+            ids = [int(i) for i in ids]
+        except (TypeError, ValueError):
+            raise ErroValidacao('ids deve conter apenas inteiros.')
+    filtros = validar_filtros(dados.get('filtros') or {})
+    if ids is None and not filtros:
+        raise ErroValidacao('Informe ids ou ao menos um filtro.')
+    return ids, filtros
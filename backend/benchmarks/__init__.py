@@ -0,0 +1,10 @@
+"""Benchmarks da API.
+
+Executar a partir do diretório ``backend``: ``python -m benchmarks.<nome>``.
+
+* ``rotas``: suíte de todas as rotas (test client e HTTP) com resultado em JSON;
+* ``gerador``: razão sintético (usuários, categorias e transações) usado pela suíte;
+* ``leitura``: micro-benchmark da listagem via ORM x SELECT Core;
+* ``serializacao``: vazão da codificação JSON de uma listagem (antes e depois do orjson);
+* ``carga``: teste de carga contra uma instância já em execução.
+"""
@@ -0,0 +1,87 @@
+"""Teste de carga simples contra uma instância da API em execução.
+
+Uso: python -m benchmarks.carga --url http://127.0.0.1:8000 --email E --senha S
+                                [--caminho /api/transacoes?limit=100]
+                                [--clientes 16] [--duracao 10]
+
+Faz login uma vez e dispara GETs autenticados a partir de ``--clientes``
+threads, cada uma com sua conexão keep-alive, durante ``--duracao``
+segundos. Mostra requisições por segundo e latências p50/p95/p99.
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def obter_token(url, email, senha):
+    partes = urlsplit(url)
+    conexao = http.client.HTTPConnection(partes.hostname, partes.port or 80, timeout=30)
+    corpo = json.dumps({'email': email, 'senha': senha})
+    conexao.request('POST', '/api/auth/login', corpo, {'Content-Type': 'application/json'})
+    resposta = conexao.getresponse()
+    dados = json.loads(resposta.read())
+    if resposta.status != 200:
+        raise SystemExit(f"Falha no login ({resposta.status}): {dados}")
+    return dados['token']
+
+
+def cliente(url, caminho, token, fim, latencias, erros):
+    partes = urlsplit(url)
+    conexao = http.client.HTTPConnection(partes.hostname, partes.port or 80, timeout=30)
+    cabecalhos = {'Authorization': f'Bearer {token}'}
+    while time.perf_counter() < fim:
+        inicio = time.perf_counter()
+        try:
+            conexao.request('GET', caminho, headers=cabecalhos)
+            resposta = conexao.getresponse()
+            resposta.read()
+            if resposta.status >= 400:
+                erros.append(resposta.status)
+                continue
+        except (OSError, http.client.HTTPException) as e:
+            erros.append(type(e).__name__)
+            conexao.close()
+            continue
+        latencias.append(time.perf_counter() - inicio)
+
+
+def percentil(valores, p):
+    return valores[min(len(valores) - 1, int(len(valores) * p))] if valores else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--email', required=True)
+    parser.add_argument('--senha', required=True)
+    parser.add_argument('--caminho', default='/api/transacoes?limit=100')
+    parser.add_argument('--clientes', type=int, default=16)
+    parser.add_argument('--duracao', type=float, default=10)
+    args = parser.parse_args()
+
+    token = obter_token(args.url, args.email, args.senha)
+    latencias, erros = [], []  # list.append é atômico entre threads
+    fim = time.perf_counter() + args.duracao
+    threads = [
+        threading.Thread(target=cliente, args=(args.url, args.caminho, token, fim, latencias, erros))
+        for _ in range(args.clientes)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencias.sort()
+    print(f'{len(latencias)} requisições em {args.duracao:.0f}s com {args.clientes} clientes '
+          f'({len(erros)} erros)')
+    print(f'{len(latencias) / args.duracao:.1f} req/s  '
+          f'p50 {percentil(latencias, 0.50) * 1000:.1f} ms  '
+          f'p95 {percentil(latencias, 0.95) * 1000:.1f} ms  '
+          f'p99 {percentil(latencias, 0.99) * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""Gerador de razão sintético para benchmarks.
+
+Cria usuários, uma árvore de categorias por usuário e transações com
+distribuições realistas: salário mensal, despesas fixas mensais e gastos
+variáveis com valores log-normais, mais frequentes nos fins de semana. A
+carga é feita em lotes com ``executemany`` direto na tabela (sem passar pela
+sessão do ORM) e os resumos mensais e os caminhos das categorias são
+recalculados ao final.
+
+A mesma ``semente`` gera sempre os mesmos dados.
+"""
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from sqlalchemy import func, select
+from werkzeug.security import generate_password_hash
+from api.models import Usuario, Categoria, Transacao
+from api.resumos import reconstruir
+from api.arvore import reconstruir_caminhos
+from api.validacao import VALOR_MAXIMO
+
+SENHA = 'benchmark'
+_LOTE = 10000
+
+# Categoria raiz -> {subcategoria: (peso, mu, sigma)} dos gastos variáveis;
+# o valor é lognormvariate(mu, sigma), então exp(mu) é a mediana em reais
+ARVORE_CATEGORIAS = {
+    'Moradia': {'Energia': (2, 5.0, 0.3), 'Água': (1, 4.3, 0.3), 'Internet': (1, 4.6, 0.1), 'Manutenção': (1, 5.0, 0.9)},
+    'Alimentação': {'Mercado': (20, 4.5, 0.7), 'Restaurantes': (12, 4.0, 0.5), 'Delivery': (10, 3.7, 0.4)},
+    'Transporte': {'Combustível': (6, 5.0, 0.3), 'Aplicativos': (10, 3.2, 0.5), 'Estacionamento': (3, 2.8, 0.4)},
+    'Saúde': {'Farmácia': (4, 4.0, 0.7), 'Consultas': (1, 5.5, 0.4)},
+    'Lazer': {'Streaming': (2, 3.5, 0.3), 'Cinema': (2, 3.6, 0.3), 'Viagens': (1, 7.0, 0.6)},
+    'Educação': {'Cursos': (1, 5.5, 0.6), 'Livros': (2, 4.0, 0.4)},
+    'Renda': {'Freelance': (2, 6.5, 0.6), 'Rendimentos': (2, 3.5, 1.0)},
+}
+_RECEITAS = {'Renda'}
+
+# Despesas e receitas fixas mensais: subcategoria -> (raiz, dia do mês, faixa de valor)
+FIXAS_MENSAIS = {
+    'Salário': ('Renda', 5, (3000, 15000)),
+    'Aluguel': ('Moradia', 10, (900, 4000)),
+    'Plano de saúde': ('Saúde', 15, (250, 900)),
+}
+
+
+def _proximo_id(conexao, coluna):
+    return (conexao.execute(select(func.max(coluna))).scalar() or 0) + 1
+
+
+def _dias_ponderados(inicio, dias):
+    """Datas do período com peso 1.4 para sábados e domingos."""
+    datas = [inicio + timedelta(days=d) for d in range(dias)]
+    pesos = [1.4 if d.weekday() >= 5 else 1.0 for d in datas]
+    return datas, pesos
+
+
+def _valor(aleatorio, mu, sigma):
+    valor = min(max(aleatorio.lognormvariate(mu, sigma), 0.01), float(VALOR_MAXIMO))
+    return Decimal(f'{valor:.2f}')
+
+
+def _categorias_usuario(usuario_id, proximo_id):
+    """Linhas das categorias (raízes e subcategorias) de um usuário.
+
+    Retorna (linhas, ids por nome da subcategoria).
+    """
+    linhas, ids = [], {}
+    for raiz, filhas in ARVORE_CATEGORIAS.items():
+        id_raiz = proximo_id
+        linhas.append({'id': id_raiz, 'nome': raiz, 'categoria_pai_id': None, 'usuario_id': usuario_id})
+        proximo_id += 1
+        nomes = list(filhas) + [n for n, (r, _, _) in FIXAS_MENSAIS.items() if r == raiz]
+        for nome in nomes:
+            linhas.append({'id': proximo_id, 'nome': nome, 'categoria_pai_id': id_raiz, 'usuario_id': usuario_id})
+            ids[nome] = proximo_id
+            proximo_id += 1
+    return linhas, ids
+
+
+def _transacoes_usuario(aleatorio, usuario_id, ids_categorias, quantidade, data_fim, dias):
+    """Gera as transações de um usuário (fixas mensais + variáveis)."""
+    inicio = data_fim - timedelta(days=dias - 1)
+
+    # Fixas: uma por mês e por subcategoria; o valor de cada usuário é
+    # sorteado na faixa e varia até 3% de um mês para outro
+    bases = {nome: aleatorio.uniform(*faixa) for nome, (_, _, faixa) in FIXAS_MENSAIS.items()}
+    fixas = 0
+    mes = date(inicio.year, inicio.month, 1)
+    while mes <= data_fim and fixas < quantidade:
+        for nome, (raiz, dia, _) in FIXAS_MENSAIS.items():
+            data = mes.replace(day=dia)
+            if inicio <= data <= data_fim and fixas < quantidade:
+                yield {
+                    'valor': Decimal(f'{bases[nome] * aleatorio.uniform(0.97, 1.03):.2f}'),
+                    'tipo': 'receita' if raiz in _RECEITAS else 'despesa',
+                    'descricao': nome,
+                    'data_transacao': data,
+                    'categoria_id': ids_categorias[nome],
+                    'usuario_id': usuario_id,
+                }
+                fixas += 1
+        mes = (mes + timedelta(days=32)).replace(day=1)
+
+    # Variáveis: subcategoria sorteada pelo peso, data com peso no fim de semana
+    subcategorias = [(raiz, nome, params) for raiz, filhas in ARVORE_CATEGORIAS.items() for nome, params in filhas.items()]
+    pesos = [params[0] for _, _, params in subcategorias]
+    datas, pesos_datas = _dias_ponderados(inicio, dias)
+    restantes = quantidade - fixas
+    while restantes > 0:
+        bloco = min(restantes, _LOTE)
+        escolhas = aleatorio.choices(subcategorias, weights=pesos, k=bloco)
+        dias_sorteados = aleatorio.choices(datas, weights=pesos_datas, k=bloco)
+        for (raiz, nome, (_, mu, sigma)), data in zip(escolhas, dias_sorteados):
+            yield {
+                'valor': _valor(aleatorio, mu, sigma),
+                'tipo': 'receita' if raiz in _RECEITAS else 'despesa',
+                'descricao': f'{nome} {aleatorio.randint(1, 9999)}' if aleatorio.random() < 0.8 else None,
+                'data_transacao': data,
+                # Parte dos gastos fica sem categoria, como acontece na prática
+                'categoria_id': ids_categorias[nome] if aleatorio.random() < 0.9 else None,
+                'usuario_id': usuario_id,
+            }
+        restantes -= bloco
+
+
+def gerar_razao(engine, usuarios=3, transacoes_por_usuario=100000, dias=3 * 365,
+                data_fim=None, semente=42, prefixo_email='benchmark'):
+    """Popula o banco e retorna a lista de usuários criados.
+
+    Cada item é ``{'id', 'email', 'senha', 'categorias': {nome: id}}``. Os
+    e-mails são ``<prefixo_email><n>@exemplo.com``; todos usam ``SENHA``.
+    """
+    aleatorio = random.Random(semente)
+    data_fim = data_fim or date.today()
+    senha_hash = generate_password_hash(SENHA)  # Um hash para todos: o PBKDF2 é lento
+    criados = []
+
+    with engine.begin() as conexao:
+        proximo_usuario = _proximo_id(conexao, Usuario.id)
+        proxima_categoria = _proximo_id(conexao, Categoria.id)
+        for n in range(usuarios):
+            usuario_id = proximo_usuario + n
+            email = f'{prefixo_email}{usuario_id}@exemplo.com'
+            conexao.execute(Usuario.__table__.insert(), {
+                'id': usuario_id, 'nome': f'Usuário {usuario_id}', 'email': email, 'senha': senha_hash
+            })
+            categorias, ids = _categorias_usuario(usuario_id, proxima_categoria)
+            proxima_categoria += len(categorias)
+            conexao.execute(Categoria.__table__.insert(), categorias)
+
+            lote = []
+            for linha in _transacoes_usuario(aleatorio, usuario_id, ids, transacoes_por_usuario, data_fim, dias):
+                lote.append(linha)
+                if len(lote) >= _LOTE:
+                    conexao.execute(Transacao.__table__.insert(), lote)  # executemany
+                    lote = []
+            if lote:
+                conexao.execute(Transacao.__table__.insert(), lote)
+
+            reconstruir(conexao, usuario_id)
+            reconstruir_caminhos(conexao, usuario_id)  # As categorias entraram sem passar pelo ORM
+            criados.append({'id': usuario_id, 'email': email, 'senha': SENHA, 'categorias': ids})
+    return criados
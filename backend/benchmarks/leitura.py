@@ -0,0 +1,122 @@
+"""Compara a listagem via ORM (objetos Transacao) com o SELECT Core por colunas.
+
+Uso: python -m benchmarks.leitura [--url URL] [--linhas N] [--repeticoes R] [--lote L]
+
+Sem ``--url`` usa um SQLite em memória populado com transações sintéticas.
+Para medir no MariaDB informe a URL de um banco de teste: as tabelas são
+criadas se não existirem e os dados do usuário do benchmark são recriados.
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import date, timedelta
+from decimal import Decimal
+from sqlalchemy import create_engine, delete
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from api.database import db
+from api.models import Usuario, Transacao
+from api.consultas import consulta_listagem, ler_em_lotes
+
+USUARIO_ID = 1
+
+
+def popular(engine, linhas):
+    """Cria o usuário do benchmark e insere ``linhas`` transações sintéticas."""
+    db.metadata.create_all(engine)
+    aleatorio = random.Random(42)
+    inicio = date(2020, 1, 1)
+    with engine.begin() as conexao:
+        conexao.execute(delete(Transacao.__table__).where(Transacao.usuario_id == USUARIO_ID))
+        conexao.execute(delete(Usuario.__table__).where(Usuario.id == USUARIO_ID))
+        conexao.execute(Usuario.__table__.insert(), {
+            'id': USUARIO_ID, 'nome': 'benchmark', 'email': 'benchmark@exemplo.com', 'senha': '-'
+        })
+        for i in range(0, linhas, 10000):
+            conexao.execute(Transacao.__table__.insert(), [{
+                'valor': Decimal(aleatorio.randint(100, 500000)) / 100,
+                'tipo': aleatorio.choice(('receita', 'despesa')),
+                'descricao': 'Transação sintética ' + 'x' * aleatorio.randint(0, 200),
+                'data_transacao': inicio + timedelta(days=aleatorio.randint(0, 1500)),
+                'categoria_id': None,
+                'usuario_id': USUARIO_ID
+            } for _ in range(min(10000, linhas - i))])
+
+
+def listar_orm(session, limite, lote):
+    """Caminho anterior: hidrata objetos Transacao e copia para dicts."""
+    query = session.query(Transacao).filter(
+        Transacao.usuario_id == USUARIO_ID
+    ).order_by(Transacao.data_transacao, Transacao.id)
+    if limite is not None:
+        query = query.limit(limite)
+    return [{
+        'id': t.id,
+        'valor': float(t.valor),
+        'tipo': t.tipo,
+        'descricao': t.descricao,
+        'data_transacao': t.data_transacao.strftime('%Y-%m-%d'),
+        'categoria_id': t.categoria_id
+    } for t in query.all()]
+
+
+def listar_core(session, limite, lote):
+    """Caminho atual das rotas: SELECT das colunas, lido em lotes."""
+    linhas = ler_em_lotes(session, consulta_listagem(session, USUARIO_ID, {}, limite=limite), lote)
+    return [{
+        'id': id,
+        'valor': valor,  # Decimal até o JSON
+        'tipo': tipo,
+        'descricao': descricao,
+        'data_transacao': data_transacao.strftime('%Y-%m-%d'),
+        'categoria_id': categoria_id
+    } for id, valor, tipo, descricao, data_transacao, categoria_id in linhas]
+
+
+def medir(engine, funcao, limite, lote, repeticoes):
+    """Retorna (melhor tempo em ms, pico de memória em KiB, linhas)."""
+    tempos = []
+    for _ in range(repeticoes):
+        with Session(engine) as session:  # Sessão nova: identity map vazio
+            inicio = time.perf_counter()
+            resultado = funcao(session, limite, lote)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+
+    with Session(engine) as session:
+        tracemalloc.start()
+        funcao(session, limite, lote)
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return min(tempos), pico / 1024, len(resultado)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='URL SQLAlchemy do banco de teste (padrão: SQLite em memória)')
+    parser.add_argument('--linhas', type=int, default=50000, help='transações sintéticas a inserir')
+    parser.add_argument('--limite', type=int, default=None, help='LIMIT da listagem (padrão: todas)')
+    parser.add_argument('--lote', type=int, default=500, help='linhas por busca no cursor (yield_per)')
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.url:
+        engine = create_engine(args.url)
+    else:
+        engine = create_engine('sqlite://', poolclass=StaticPool)
+    popular(engine, args.linhas)
+
+    print(f"{'caminho':<8} {'linhas':>8} {'tempo (ms)':>12} {'pico (KiB)':>12}")
+    resultados = {}
+    for nome, funcao in (('orm', listar_orm), ('core', listar_core)):
+        tempo, pico, linhas = medir(engine, funcao, args.limite, args.lote, args.repeticoes)
+        resultados[nome] = (tempo, pico)
+        print(f'{nome:<8} {linhas:>8} {tempo:>12.1f} {pico:>12.0f}')
+
+    tempo_orm, pico_orm = resultados['orm']
+    tempo_core, pico_core = resultados['core']
+    print(f'core/orm: tempo {tempo_core / tempo_orm:.2f}x, memória {pico_core / pico_orm:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,321 @@
+"""Benchmark reproduzível das rotas da API.
+
+Uso: python -m benchmarks.rotas [--usuarios 3] [--transacoes 100000]
+                                [--repeticoes 50] [--modo cliente|http|ambos]
+                                [--clientes 4] [--url-banco URL]
+                                [--saida resultado.json] [--comparar anterior.json]
+
+Gera um razão sintético (``benchmarks.gerador``), cria uma instância isolada
+da aplicação e executa cada cenário pelo test client do Flask (``cliente``)
+e/ou por um servidor HTTP real em uma thread (``http``, com ``--clientes``
+conexões keep-alive simultâneas). Para cada cenário mede latências
+p50/p95/p99, vazão, consultas SQL por requisição e o pico de RSS do
+processo, e grava tudo em JSON para comparar execuções ao longo do tempo.
+
+Sem ``--url-banco`` usa um arquivo SQLite temporário. O cache de respostas
+fica desligado para que cada requisição chegue ao banco.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from urllib.parse import quote
+import sqlalchemy
+from sqlalchemy import event
+from werkzeug.serving import WSGIRequestHandler, make_server
+from api import create_app, db
+from api.migracoes import migrar
+from .gerador import gerar_razao
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class ContadorSQL:
+    """Conta os comandos executados pelo engine (evento before_cursor_execute)."""
+
+    def __init__(self, engine):
+        self._lock = threading.Lock()
+        self.total = 0
+        event.listen(engine, 'before_cursor_execute', self._contar)
+
+    def _contar(self, *args):
+        with self._lock:
+            self.total += 1
+
+
+class _HandlerSilencioso(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass  # Uma linha de log por requisição distorceria a medição
+
+
+def rss_pico_kib():
+    """Pico de memória residente do processo em KiB (None se indisponível)."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico // 1024 if sys.platform == 'darwin' else pico  # macOS informa em bytes
+
+
+def percentil(ordenados, p):
+    if not ordenados:
+        return None
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def cenarios(cliente, usuario, hoje):
+    """Lista de (nome, método, caminho, corpo) cobrindo todas as rotas de leitura e o login."""
+    ultimo_mes = {'data_inicio': (hoje - timedelta(days=30)).isoformat(), 'data_fim': hoje.isoformat()}
+    ultimo_ano = {'data_inicio': (hoje - timedelta(days=365)).isoformat(), 'data_fim': hoje.isoformat()}
+    categoria = usuario['categorias']['Mercado']
+    pagina = cliente('GET', '/api/transacoes?limit=100')
+    cursor = json.loads(pagina)['next_cursor']
+    frase = quote('"mercado 4321"')
+
+    def q(**params):
+        return '&'.join(f'{k}={v}' for k, v in params.items())
+
+    return [
+        ('login', 'POST', '/api/auth/login', {'email': usuario['email'], 'senha': usuario['senha']}),
+        ('transacoes', 'GET', '/api/transacoes', None),
+        ('transacoes limit=1000', 'GET', '/api/transacoes?limit=1000', None),
+        ('transacoes cursor', 'GET', f'/api/transacoes?{q(cursor=cursor, limit=100)}', None),
+        ('transacoes datas', 'GET', f'/api/transacoes?{q(**ultimo_mes)}', None),
+        ('transacoes categoria', 'GET', f'/api/transacoes?{q(categoria_id=categoria)}', None),
+        ('transacoes tipo', 'GET', f'/api/transacoes?{q(tipo="receita")}', None),
+        ('busca palavra', 'GET', f'/api/transacoes?{q(q="mercado")}', None),
+        ('busca frase', 'GET', f'/api/transacoes?{q(q=frase)}', None),
+        ('busca prefixo + datas', 'GET', f'/api/transacoes?{q(q="merc*", **ultimo_mes)}', None),
+        ('fluxo dia 30d', 'GET', f'/api/relatorios/fluxo?{q(granularidade="dia", **ultimo_mes)}', None),
+        ('fluxo mes 1a', 'GET', f'/api/relatorios/fluxo?{q(granularidade="mes", **ultimo_ano)}', None),
+        ('fluxo semana 1a + transacoes', 'GET',
+         f'/api/relatorios/fluxo?{q(granularidade="semana", incluir_transacoes=1, **ultimo_ano)}', None),
+        ('estatisticas 30d', 'GET', f'/api/relatorios/estatisticas?{q(**ultimo_mes)}', None),
+        ('estatisticas semana 1a', 'GET',
+         f'/api/relatorios/estatisticas?{q(granularidade="semana", **ultimo_ano)}', None),
+        ('dashboard 30d', 'GET', '/api/dashboard?periodo=30d', None),
+        ('dashboard 365d', 'GET', '/api/dashboard?periodo=365d', None),
+        ('categorias 30d', 'GET', f'/api/relatorios/categorias?{q(**ultimo_mes)}', None),
+        ('categorias 1a', 'GET', f'/api/relatorios/categorias?{q(**ultimo_ano)}', None),
+    ]
+
+
+def cliente_flask(app, token):
+    """Função (método, caminho, corpo) -> corpo da resposta, via test client."""
+    cliente = app.test_client()
+    cabecalhos = {'Authorization': f'Bearer {token}'}
+
+    def executar(metodo, caminho, corpo=None):
+        resposta = cliente.open(caminho, method=metodo, json=corpo, headers=cabecalhos)
+        if resposta.status_code >= 400:
+            raise RuntimeError(f'{metodo} {caminho}: {resposta.status_code}')
+        return resposta.get_data()
+    return executar
+
+
+def cliente_http(porta, token):
+    """Função (método, caminho, corpo) -> corpo da resposta, via HTTP keep-alive."""
+    conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=60)
+    cabecalhos = {'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'}
+
+    def executar(metodo, caminho, corpo=None):
+        conexao.request(metodo, caminho, json.dumps(corpo) if corpo is not None else None, cabecalhos)
+        resposta = conexao.getresponse()
+        dados = resposta.read()
+        if resposta.status >= 400:
+            raise RuntimeError(f'{metodo} {caminho}: {resposta.status}')
+        return dados
+    return executar
+
+
+def medir(fabrica_cliente, cenario, repeticoes, clientes, contador, aquecimento=3):
+    """Executa o cenário ``repeticoes`` vezes divididas entre ``clientes`` threads."""
+    nome, metodo, caminho, corpo = cenario
+    latencias, erros = [], []
+    restantes = [repeticoes]
+    lock = threading.Lock()
+
+    def trabalhar():
+        try:
+            executar = fabrica_cliente()
+            for _ in range(aquecimento):
+                executar(metodo, caminho, corpo)
+        except Exception:
+            barreira.abort()  # Libera a thread principal, que propaga o erro
+            raise
+        barreira.wait()
+        while True:
+            with lock:
+                if restantes[0] <= 0:
+                    return
+                restantes[0] -= 1
+            inicio = time.perf_counter()
+            try:
+                executar(metodo, caminho, corpo)
+            except (RuntimeError, OSError, http.client.HTTPException) as e:
+                erros.append(str(e))
+                continue
+            latencias.append(time.perf_counter() - inicio)
+
+    marco = {}
+
+    def iniciar_medicao():
+        # Executada uma vez, depois de todos os aquecimentos e antes de liberar as threads
+        marco['consultas'] = contador.total
+        marco['inicio'] = time.perf_counter()
+
+    barreira = threading.Barrier(clientes + 1, action=iniciar_medicao)
+    threads = [threading.Thread(target=trabalhar) for _ in range(clientes)]
+    for thread in threads:
+        thread.start()
+    barreira.wait()
+    for thread in threads:
+        thread.join()
+    duracao = time.perf_counter() - marco['inicio']
+    consultas = contador.total - marco['consultas']
+
+    latencias.sort()
+    ms = lambda v: round(v * 1000, 3) if v is not None else None
+    return {
+        'cenario': nome,
+        'requisicoes': len(latencias),
+        'erros': len(erros),
+        'p50_ms': ms(percentil(latencias, 0.50)),
+        'p95_ms': ms(percentil(latencias, 0.95)),
+        'p99_ms': ms(percentil(latencias, 0.99)),
+        'media_ms': ms(sum(latencias) / len(latencias)) if latencias else None,
+        'req_s': round(len(latencias) / duracao, 2) if duracao else None,
+        'consultas_sql_por_req': round(consultas / max(len(latencias) + len(erros), 1), 2),
+        'rss_pico_kib': rss_pico_kib(),
+    }
+
+
+def _commit_git():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(anterior, atual):
+    """Imprime a variação de p50, p95 e req/s em relação a uma execução anterior."""
+    base = {(r['modo'], r['cenario']): r for r in anterior['resultados']}
+    print(f"\nComparação com {anterior['meta'].get('commit') or 'execução anterior'}:")
+    for r in atual['resultados']:
+        a = base.get((r['modo'], r['cenario']))
+        if not a or not a['p50_ms'] or not r['p50_ms']:
+            continue
+        print(f"  {r['modo']:<8} {r['cenario']:<30} "
+              f"p50 {r['p50_ms'] / a['p50_ms']:.2f}x  p95 {r['p95_ms'] / a['p95_ms']:.2f}x  "
+              f"req/s {r['req_s'] / a['req_s']:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--usuarios', type=int, default=3)
+    parser.add_argument('--transacoes', type=int, default=100000, help='transações por usuário')
+    parser.add_argument('--dias', type=int, default=3 * 365, help='período coberto pelas transações')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--repeticoes', type=int, default=50, help='requisições medidas por cenário')
+    parser.add_argument('--modo', choices=('cliente', 'http', 'ambos'), default='ambos')
+    parser.add_argument('--clientes', type=int, default=4, help='conexões simultâneas no modo http')
+    parser.add_argument('--url-banco', help='URL SQLAlchemy de um banco de teste vazio')
+    parser.add_argument('--saida', help='arquivo JSON de resultado')
+    parser.add_argument('--comparar', help='JSON de uma execução anterior')
+    args = parser.parse_args()
+
+    arquivo_temporario = None
+    url = args.url_banco
+    if not url:
+        descritor, arquivo_temporario = tempfile.mkstemp(suffix='.sqlite3', prefix='pyfinance_bench_')
+        os.close(descritor)
+        url = f'sqlite:///{arquivo_temporario}'
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': url, 'CACHE_BACKEND': 'nenhum'})
+    try:
+        with app.app_context():
+            engine = db.engine
+            db.create_all()
+            migrar(engine)
+            inicio = time.perf_counter()
+            usuarios = gerar_razao(engine, args.usuarios, args.transacoes, args.dias, semente=args.semente)
+            tempo_geracao = time.perf_counter() - inicio
+            contador = ContadorSQL(engine)
+        print(f'{args.usuarios * args.transacoes} transações geradas em {tempo_geracao:.1f}s')
+
+        usuario = usuarios[0]
+        token = json.loads(app.test_client().post('/api/auth/login', json={
+            'email': usuario['email'], 'senha': usuario['senha']
+        }).get_data())['token']
+        hoje = date.today()
+
+        resultados = []
+        modos = ('cliente', 'http') if args.modo == 'ambos' else (args.modo,)
+        for modo in modos:
+            servidor = None
+            if modo == 'http':
+                servidor = make_server('127.0.0.1', 0, app, threaded=True, request_handler=_HandlerSilencioso)
+                threading.Thread(target=servidor.serve_forever, daemon=True).start()
+                fabrica = lambda: cliente_http(servidor.port, token)
+                clientes = args.clientes
+            else:
+                fabrica = lambda: cliente_flask(app, token)
+                clientes = 1  # O test client roda na thread de quem chama
+            try:
+                for cenario in cenarios(fabrica(), usuario, hoje):
+                    resultado = {'modo': modo, **medir(fabrica, cenario, args.repeticoes, clientes, contador)}
+                    resultados.append(resultado)
+                    print(f"{modo:<8} {resultado['cenario']:<30} p50 {resultado['p50_ms']:>9.2f} ms  "
+                          f"p95 {resultado['p95_ms']:>9.2f} ms  p99 {resultado['p99_ms']:>9.2f} ms  "
+                          f"{resultado['req_s']:>8.1f} req/s  {resultado['consultas_sql_por_req']:>5} SQL/req")
+            finally:
+                if servidor is not None:
+                    servidor.shutdown()
+
+        relatorio = {
+            'meta': {
+                'data': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'commit': _commit_git(),
+                'python': platform.python_version(),
+                'sqlalchemy': sqlalchemy.__version__,
+                'banco': engine.dialect.name,
+                'usuarios': args.usuarios,
+                'transacoes_por_usuario': args.transacoes,
+                'dias': args.dias,
+                'semente': args.semente,
+                'repeticoes': args.repeticoes,
+                'clientes_http': args.clientes,
+                'geracao_s': round(tempo_geracao, 2),
+                'rss_pico_kib': rss_pico_kib(),
+            },
+            'resultados': resultados,
+        }
+        if args.saida:
+            with open(args.saida, 'w', encoding='utf-8') as arquivo:
+                json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+            print(f'Resultado gravado em {args.saida}')
+        if args.comparar:
+            with open(args.comparar, encoding='utf-8') as arquivo:
+                comparar(json.load(arquivo), relatorio)
+    finally:
+        with app.app_context():
+            db.engine.dispose()
+        if arquivo_temporario:
+            for sufixo in ('', '-wal', '-shm'):
+                if os.path.exists(arquivo_temporario + sufixo):
+                    os.remove(arquivo_temporario + sufixo)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Vazão da serialização JSON de uma listagem de transações, antes e depois do CodificadorJSON.
+
+Uso: python -m benchmarks.serializacao [--linhas N] [--repeticoes R]
+
+Monta o corpo de ``GET /api/transacoes`` com N linhas sintéticas (sem
+banco) e mede separadamente a montagem dos dicts e a codificação em JSON:
+
+* ``antes``: ``float(valor)`` nas linhas e o JSONEncoder padrão do Flask;
+* ``json/<formato>``: CodificadorJSON com o ``json`` da biblioteca padrão;
+* ``orjson/<formato>``: CodificadorJSON com orjson (se instalado).
+"""
+import argparse
+import gc
+import random
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import date, timedelta
+from decimal import Decimal
+from flask import Flask, json
+from flask.json import JSONEncoder
+from api import serializacao
+from api.serializacao import CodificadorJSON, FORMATOS_VALORES
+
+
+def linhas_sinteticas(quantidade, semente=42):
+    """Tuplas com as colunas de ``consulta_listagem``."""
+    aleatorio = random.Random(semente)
+    inicio = date(2020, 1, 1)
+    return [(
+        i,
+        Decimal(aleatorio.randint(1, 500000)) / 100,
+        aleatorio.choice(('receita', 'despesa')),
+        f'Transação {aleatorio.randint(1, 9999)}' if aleatorio.random() < 0.8 else None,
+        inicio + timedelta(days=aleatorio.randint(0, 1500)),
+        aleatorio.choice((None, 1, 2, 3))
+    ) for i in range(1, quantidade + 1)]
+
+
+def _corpo(linhas, converter):
+    return {'transacoes': [{
+        'id': id,
+        'valor': converter(valor),
+        'tipo': tipo,
+        'descricao': descricao,
+        'data_transacao': data_transacao.strftime('%Y-%m-%d'),
+        'categoria_id': categoria_id
+    } for id, valor, tipo, descricao, data_transacao, categoria_id in linhas], 'next_cursor': None}
+
+
+@contextmanager
+def _sem_orjson():
+    original = serializacao.orjson
+    serializacao.orjson = None
+    try:
+        yield
+    finally:
+        serializacao.orjson = original
+
+
+def medir(app, linhas, codificador, converter, formato, repeticoes):
+    """Retorna (melhor montagem em ms, melhor codificação em ms, bytes do corpo)."""
+    app.json_encoder = codificador
+    montagem, codificacao = [], []
+    with app.test_request_context(query_string={'valores': formato}):
+        for _ in range(repeticoes):
+            gc.collect()
+            inicio = time.perf_counter()
+            corpo = _corpo(linhas, converter)
+            meio = time.perf_counter()
+            texto = json.dumps(corpo)
+            fim = time.perf_counter()
+            montagem.append((meio - inicio) * 1000)
+            codificacao.append((fim - meio) * 1000)
+            del corpo
+    return min(montagem), min(codificacao), len(texto.encode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=100000)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    linhas = linhas_sinteticas(args.linhas)
+    identidade = lambda valor: valor
+
+    cenarios = [('antes', JSONEncoder, float, 'numero', None)]
+    cenarios += [(f'json/{f}', CodificadorJSON, identidade, f, _sem_orjson) for f in FORMATOS_VALORES]
+    if serializacao.orjson is not None:
+        cenarios += [(f'orjson/{f}', CodificadorJSON, identidade, f, None) for f in FORMATOS_VALORES]
+    else:
+        print('orjson não instalado: cenários orjson/* omitidos')
+
+    print(f"{'cenário':<18} {'montagem (ms)':>14} {'codificação (ms)':>17} {'linhas/s':>10} "
+          f"{'MiB/s':>7} {'corpo (KiB)':>12}")
+    base = None
+    for nome, codificador, converter, formato, contexto in cenarios:
+        with contexto() if contexto is not None else nullcontext():
+            montagem, tempo, tamanho = medir(app, linhas, codificador, converter, formato, args.repeticoes)
+        base = base or tempo
+        print(f'{nome:<18} {montagem:>14.1f} {tempo:>17.1f} {len(linhas) / tempo * 1000:>10.0f} '
+              f'{tamanho / 1048576 / tempo * 1000:>7.1f} {tamanho / 1024:>12.0f}  ({base / tempo:.2f}x)')
+    print('linhas/s, MiB/s e o ganho (x) referem-se à codificação')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -14,8 +15,126 @@ class Config:
     # String de conexão SQLAlchemy
     SQLALCHEMY_DATABASE_URI = f"mariadb://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    
+    # Pool de conexões (por processo); dimensione DB_POOL_SIZE + DB_MAX_OVERFLOW
+    # de acordo com o número de threads por worker
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '5'))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '280'))  # Abaixo do wait_timeout do servidor
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', '1').lower() in ('1', 'true', 'sim')
+    DB_POOL_ALERTA_ESPERA_MS = float(os.getenv('DB_POOL_ALERTA_ESPERA_MS', '100'))
     SQLALCHEMY_ENGINE_OPTIONS = {
-        'pool_size': 1,  # Limitar o pool a 1 conexão
-        'max_overflow': 0,  # Não permitir conexões adicionais
-        'pool_timeout': 30,  # Tempo de espera para uma conexão disponível
-    } 
\ No newline at end of file
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,  # Tempo de espera para uma conexão disponível
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': DB_POOL_PRE_PING,
+    }
+    
+    # Réplicas de leitura (ver api/replicas.py): URLs separadas por vírgula; vazio
+    # deixa tudo no primário. Política: rodizio | menos_ocupada
+    DB_REPLICAS = [u.strip() for u in os.getenv('DB_REPLICAS', '').split(',') if u.strip()]
+    DB_REPLICAS_POLITICA = os.getenv('DB_REPLICAS_POLITICA', 'rodizio')
+    DB_REPLICAS_ADERENCIA_S = float(os.getenv('DB_REPLICAS_ADERENCIA_S', '5'))  # Leituras no primário após uma escrita
+    DB_REPLICAS_ADERENCIA_CAMINHO = os.getenv('DB_REPLICAS_ADERENCIA_CAMINHO')  # SQLite compartilhado pelos workers
+    
+    # Paginação por cursor em GET /api/transacoes
+    PAGINACAO_LIMITE_PADRAO = int(os.getenv('PAGINACAO_LIMITE_PADRAO', '100'))
+    PAGINACAO_LIMITE_MAXIMO = int(os.getenv('PAGINACAO_LIMITE_MAXIMO', '1000'))
+    
+    # Linhas buscadas do cursor por vez nas rotas de leitura (yield_per)
+    LEITURA_TAMANHO_LOTE = int(os.getenv('LEITURA_TAMANHO_LOTE', '500'))
+    
+    # Exportação (GET /api/transacoes/exportar): linhas por bloco enviado e por row group do Parquet
+    EXPORTACAO_TAMANHO_LOTE = int(os.getenv('EXPORTACAO_TAMANHO_LOTE', '10000'))
+    
+    # Importação em massa (POST /api/transacoes/importar)
+    IMPORTACAO_LOTE_PADRAO = int(os.getenv('IMPORTACAO_LOTE_PADRAO', '1000'))
+    IMPORTACAO_LOTE_MAXIMO = int(os.getenv('IMPORTACAO_LOTE_MAXIMO', '10000'))
+    IMPORTACAO_MAX_ERROS = int(os.getenv('IMPORTACAO_MAX_ERROS', '1000'))
+    
+    # Atualização/remoção em massa (PATCH/DELETE /api/transacoes)
+    OPERACAO_MASSA_MAX_IDS = int(os.getenv('OPERACAO_MASSA_MAX_IDS', '10000'))
+    
+    # Cache de respostas por usuário: memoria (um processo) | sqlite (vários
+    # workers; padrão do gunicorn.conf.py com WEB_WORKERS > 1) | nenhum
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memoria')
+    CACHE_MAX_ITENS = int(os.getenv('CACHE_MAX_ITENS', '1024'))
+    CACHE_TTL = int(os.getenv('CACHE_TTL', '300'))  # segundos
+    CACHE_CAMINHO = os.getenv('CACHE_CAMINHO', os.path.join(tempfile.gettempdir(), 'pyfinance_cache.sqlite'))
+    
+    # Métricas em /metrics (Prometheus). Com vários workers, METRICAS_DIR é
+    # um diretório compartilhado onde cada worker grava seu snapshot. A rota
+    # só existe com METRICAS_TOKEN e/ou METRICAS_IPS (ex.: 10.0.0.0/8,127.0.0.1)
+    METRICAS_HABILITADAS = os.getenv('METRICAS_HABILITADAS', '1').lower() in ('1', 'true', 'sim')
+    METRICAS_TOKEN = os.getenv('METRICAS_TOKEN')
+    METRICAS_IPS = os.getenv('METRICAS_IPS')
+    METRICAS_DIR = os.getenv('METRICAS_DIR')
+    METRICAS_INTERVALO_S = float(os.getenv('METRICAS_INTERVALO_S', '5'))
+    
+    # Dashboard (GET /api/dashboard): maior período aceito e pontos da série de saldo
+    DASHBOARD_PERIODO_MAXIMO_DIAS = int(os.getenv('DASHBOARD_PERIODO_MAXIMO_DIAS', '366'))
+    DASHBOARD_PONTOS = int(os.getenv('DASHBOARD_PONTOS', '60'))
+    
+    # Particionamento de transacoes no MariaDB (python manutencao.py): ano | mes,
+    # e quantos intervalos adiante manter com partição criada
+    PARTICOES_INTERVALO = os.getenv('PARTICOES_INTERVALO', 'ano')
+    PARTICOES_A_FRENTE = int(os.getenv('PARTICOES_A_FRENTE', '2'))
+    # Segundos até cada processo reler a data de corte do arquivo de transações
+    ARQUIVO_CORTE_TTL_S = float(os.getenv('ARQUIVO_CORTE_TTL_S', '300'))
+    
+    # Formato padrão dos valores monetários no JSON: numero | texto | centavos
+    # (o cliente pode pedir outro com ?valores= ou X-Formato-Valores)
+    VALORES_FORMATO_PADRAO = os.getenv('VALORES_FORMATO_PADRAO', 'numero')
+    
+    # Detector de N+1 e consultas lentas (desenvolvimento e CI; ver api/detector_sql.py)
+    DETECTOR_SQL = os.getenv('DETECTOR_SQL', '0').lower() in ('1', 'true', 'sim')
+    DETECTOR_SQL_REPETICOES = int(os.getenv('DETECTOR_SQL_REPETICOES', '5'))
+    DETECTOR_SQL_LENTA_MS = float(os.getenv('DETECTOR_SQL_LENTA_MS', '100'))
+    
+    # Perfil sob demanda de uma requisição (ver api/perfilador.py): ids dos
+    # usuários autorizados, separados por vírgula; vazio desliga
+    PERFILADOR_USUARIOS = [u.strip() for u in os.getenv('PERFILADOR_USUARIOS', '').split(',') if u.strip()]
+    PERFILADOR_DIR = os.getenv('PERFILADOR_DIR')  # Sem diretório o relatório volta no corpo da resposta
+    PERFILADOR_INTERVALO_MS = float(os.getenv('PERFILADOR_INTERVALO_MS', '5'))  # Modo amostragem
+    PERFILADOR_LINHAS = int(os.getenv('PERFILADOR_LINHAS', '40'))
+    
+    # Pragmas aplicados a cada conexão quando o banco é SQLite (perfil sqlite)
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',  # Leitores não bloqueiam o escritor
+        'synchronous': 'NORMAL',  # Seguro com WAL; fsync só nos checkpoints
+        'foreign_keys': 'ON',  # Mesmo comportamento das FKs do InnoDB
+        'busy_timeout': 5000,  # ms esperando o lock de escrita antes de falhar
+        'cache_size': -64000,  # 64 MiB de cache de páginas por conexão
+        'temp_store': 'MEMORY',
+        'mmap_size': 268435456,
+    }
+
+
+class ConfigSQLite(Config):
+    """Perfil local: SQLite em arquivo ou em memória, sem acesso à rede.
+
+    ``SQLITE_CAMINHO=:memory:`` usa um banco em memória compartilhado pelas
+    threads do processo (ver ``api.database.init_db``).
+    """
+    SQLITE_CAMINHO = os.getenv(
+        'SQLITE_CAMINHO', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pyfinance.sqlite3')
+    )
+    SQLALCHEMY_DATABASE_URI = 'sqlite://' if SQLITE_CAMINHO == ':memory:' else f'sqlite:///{SQLITE_CAMINHO}'
+
+
+# Perfil selecionado por DB_PERFIL
+PERFIS = {
+    'mariadb': Config,
+    'sqlite': ConfigSQLite,
+}
+
+
+def obter_config(perfil=None):
+    """Classe de configuração do perfil informado ou de DB_PERFIL (padrão mariadb)."""
+    perfil = perfil or os.getenv('DB_PERFIL', 'mariadb')
+    try:
+        return PERFIS[perfil]
+    except KeyError:
+        raise ValueError(f"DB_PERFIL inválido: {perfil}. Use {' ou '.join(PERFIS)}.")
\ No newline at end of file
@@ -0,0 +1,109 @@
+"""Configuração do gunicorn para produção.
+
+Uso (a partir de ``backend``): ``gunicorn -c gunicorn.conf.py wsgi:app``
+
+Variáveis de ambiente:
+
+* ``WEB_BIND``: endereço de escuta (padrão ``0.0.0.0:8000``);
+* ``WEB_WORKERS``: processos (padrão ``2 * CPUs + 1``);
+* ``WEB_THREADS``: threads por processo (padrão 4; acima de 1 usa gthread);
+* ``WEB_TIMEOUT`` / ``WEB_GRACEFUL_TIMEOUT``: segundos até matar um worker
+  travado / para concluir as requisições em andamento ao encerrar;
+* ``WEB_MAX_REQUESTS``: recicla o worker após N requisições (0 desativa);
+* ``CACHE_BACKEND``: com mais de um worker o padrão passa a ser ``sqlite``
+  (arquivo em ``CACHE_CAMINHO``, compartilhado pelos workers); ``memoria``
+  só é aceito com um worker, pois guarda as versões de cada processo;
+* ``DB_REPLICAS_ADERENCIA_CAMINHO``: com réplicas e mais de um worker, o
+  padrão passa a ser ``pyfinance_escritas.sqlite`` no diretório temporário,
+  para que a escrita atendida por um worker mantenha no primário as
+  leituras do usuário em todos os outros;
+* ``METRICAS_DIR``: diretório para os snapshots de métricas de cada worker,
+  somados em ``/metrics`` (limpo ao iniciar o servidor);
+* ``DB_MAX_CONEXOES``: conexões com o banco somadas entre todos os workers.
+  Quando definido (e DB_POOL_SIZE não), o pool de cada worker é dimensionado
+  para que workers * (pool + overflow) não passe desse limite.
+"""
+import multiprocessing
+import os
+import tempfile
+
+bind = os.getenv('WEB_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('WEB_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('WEB_THREADS', '4'))
+worker_class = 'gthread' if threads > 1 else 'sync'
+timeout = int(os.getenv('WEB_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('WEB_KEEPALIVE', '5'))
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+
+# Cada worker importa a aplicação depois do fork e abre o próprio pool;
+# conexões herdadas do processo mestre seriam compartilhadas entre processos
+preload_app = False
+
+accesslog = os.getenv('WEB_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.getenv('WEB_LOG_LEVEL', 'info')
+
+
+def _dimensionar_pool():
+    """Define DB_POOL_SIZE/DB_MAX_OVERFLOW por worker a partir do limite global.
+
+    Uma thread usa no máximo uma conexão por vez, então o pool não precisa
+    ser maior que o número de threads do worker.
+    """
+    if 'DB_POOL_SIZE' in os.environ:
+        return
+    limite = int(os.getenv('DB_MAX_CONEXOES', '0'))
+    por_worker = limite // workers if limite else threads
+    tamanho = max(1, min(threads, por_worker))
+    os.environ['DB_POOL_SIZE'] = str(tamanho)
+    os.environ.setdefault('DB_MAX_OVERFLOW', str(max(0, por_worker - tamanho)))
+
+
+_dimensionar_pool()
+
+
+def _cache_compartilhado():
+    """Com vários workers, o cache de respostas precisa ser visto por todos."""
+    if workers == 1:
+        return
+    backend = os.environ.setdefault('CACHE_BACKEND', 'sqlite')
+    if backend == 'memoria':
+        raise RuntimeError(
+            'CACHE_BACKEND=memoria não invalida o cache dos outros workers; '
+            'use sqlite ou nenhum com WEB_WORKERS > 1.'
+        )
+
+
+_cache_compartilhado()
+
+
+def _aderencia_compartilhada():
+    """Com réplicas e vários workers, o instante das escritas fica em um arquivo comum."""
+    if workers > 1 and os.getenv('DB_REPLICAS'):
+        os.environ.setdefault(
+            'DB_REPLICAS_ADERENCIA_CAMINHO', os.path.join(tempfile.gettempdir(), 'pyfinance_escritas.sqlite')
+        )
+
+
+_aderencia_compartilhada()
+
+
+def on_starting(server):
+    # Snapshots de métricas de uma execução anterior não devem ser somados
+    diretorio = os.getenv('METRICAS_DIR')
+    if diretorio and os.path.isdir(diretorio):
+        for nome in os.listdir(diretorio):
+            if nome.startswith('metricas_'):
+                os.remove(os.path.join(diretorio, nome))
+    server.log.info(
+        'Iniciando %d worker(s) %s com %d thread(s); pool por worker: %s + %s overflow',
+        workers, worker_class, threads, os.environ['DB_POOL_SIZE'], os.environ.get('DB_MAX_OVERFLOW', '5')
+    )
+
+
+def worker_exit(server, worker):
+    # Encerramento gracioso: devolve as conexões ao banco antes de sair
+    from wsgi import encerrar
+    encerrar()
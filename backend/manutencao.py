@@ -0,0 +1,73 @@
+import sys
+from api import app, db
+from api.arquivo import arquivar, data_corte
+from api.particoes import (
+    INTERVALOS, ParticionamentoIndisponivel, particionar, criar_particoes_futuras,
+    remover_particoes_vazias, listar_particoes
+)
+
+def _intervalo():
+    intervalo = app.config['PARTICOES_INTERVALO']
+    if intervalo not in INTERVALOS:
+        raise SystemExit(f"PARTICOES_INTERVALO inválido: {intervalo}. Use {' ou '.join(INTERVALOS)}.")
+    return intervalo
+
+def converter():
+    with app.app_context():
+        with db.engine.begin() as conexao:
+            criadas = particionar(conexao, _intervalo(), app.config['PARTICOES_A_FRENTE'])
+        print(f"Tabela transacoes particionada em {len(criadas)} partições (mais pfuturo).")
+
+def particoes():
+    with app.app_context():
+        with db.engine.begin() as conexao:
+            criadas = criar_particoes_futuras(conexao, _intervalo(), app.config['PARTICOES_A_FRENTE'])
+        if not criadas:
+            print("Nenhuma partição nova.")
+        for definicao in criadas:
+            print(f"Criada: {definicao}")
+
+def arquivar_ate(ano):
+    with app.app_context():
+        for atual, quantidade in arquivar(db.engine, ano):
+            print(f"Ano {atual} arquivado: {quantidade} transações.")
+        with db.engine.begin() as conexao:
+            try:
+                removidas = remover_particoes_vazias(conexao, data_corte(conexao))
+            except ParticionamentoIndisponivel:
+                removidas = []
+        for nome in removidas:
+            print(f"Partição removida: {nome}")
+
+def status():
+    with app.app_context():
+        with db.engine.connect() as conexao:
+            corte = data_corte(conexao)
+            print(f"Arquivadas as transações anteriores a {corte}." if corte else "Nenhum ano arquivado.")
+            try:
+                lista = listar_particoes(conexao)
+            except ParticionamentoIndisponivel as e:
+                print(e)
+                return
+        if not lista:
+            print("A tabela transacoes não é particionada.")
+        for particao in lista:
+            limite = particao.limite or 'MAXVALUE'
+            print(f"    {particao.nome}  < {limite}  (~{particao.linhas} linhas)")
+
+if __name__ == '__main__':
+    # Uso: python manutencao.py [status | particionar | particoes | arquivar <ano>]
+    comando = sys.argv[1] if len(sys.argv) > 1 else 'status'
+    try:
+        if comando == 'particionar':
+            converter()
+        elif comando == 'particoes':
+            particoes()
+        elif comando == 'arquivar':
+            if len(sys.argv) < 3:
+                raise SystemExit("Uso: python manutencao.py arquivar <ano>")
+            arquivar_ate(int(sys.argv[2]))
+        else:
+            status()
+    except (ValueError, ParticionamentoIndisponivel) as e:
+        raise SystemExit(str(e))
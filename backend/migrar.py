@@ -0,0 +1,43 @@
+import sys
+from api import app, db
+from api.migracoes import migrar, migracoes_pendentes
+from api.migracoes.verificacao import relatorio_indices
+
+def aplicar():
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            # O perfil SQLite não usa database/schema.sql: cria as tabelas
+            # a partir dos modelos antes das migrações
+            db.create_all()
+        aplicadas = migrar(db.engine)
+        if not aplicadas:
+            print("Nenhuma migração pendente.")
+        for migracao in aplicadas:
+            print(f"Migração {migracao.VERSAO:04d} aplicada: {migracao.DESCRICAO}")
+
+def status():
+    with app.app_context():
+        pendentes = migracoes_pendentes(db.engine)
+        if not pendentes:
+            print("Esquema atualizado.")
+        for migracao in pendentes:
+            print(f"Pendente {migracao.VERSAO:04d}: {migracao.DESCRICAO}")
+
+def explain(usuario_id):
+    with app.app_context():
+        for item in relatorio_indices(db.session, usuario_id):
+            print(item['consulta'])
+            for plano in item['planos']:
+                indice = plano['indice'] or '-'
+                tabela = f"{plano['tabela']}: " if plano['tabela'] else ''
+                print(f"    {tabela}{indice}  ({plano['detalhe']})")
+
+if __name__ == '__main__':
+    # Uso: python migrar.py [status | explain <usuario_id>]
+    comando = sys.argv[1] if len(sys.argv) > 1 else 'aplicar'
+    if comando == 'status':
+        status()
+    elif comando == 'explain':
+        explain(int(sys.argv[2]) if len(sys.argv) > 2 else 1)
+    else:
+        aplicar()
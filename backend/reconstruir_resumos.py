@@ -0,0 +1,16 @@
+import sys
+from api import app, db
+from api.resumos import reconstruir
+
+def reconstruir_resumos(usuario_id=None):
+    with app.app_context():
+        with db.engine.begin() as conexao:
+            reconstruir(conexao, usuario_id)
+        if usuario_id is None:
+            print("Resumos mensais reconstruídos para todos os usuários.")
+        else:
+            print(f"Resumos mensais reconstruídos para o usuário {usuario_id}.")
+
+if __name__ == '__main__':
+    # Uso: python reconstruir_resumos.py [usuario_id]
+    reconstruir_resumos(int(sys.argv[1]) if len(sys.argv) > 1 else None)
@@ -1,4 +1,6 @@
 from api import app
 
 if __name__ == '__main__':
+    # Servidor de desenvolvimento (um processo, com reloader). Em produção
+    # use o gunicorn: gunicorn -c gunicorn.conf.py wsgi:app
     app.run(debug=True) 
\ No newline at end of file
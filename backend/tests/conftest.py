@@ -0,0 +1,44 @@
+"""Fixtures comuns: uma aplicação isolada por teste, com SQLite em memória."""
+import pytest
+from api import create_app, db
+from api.models import Usuario
+
+EMAIL = 'teste@exemplo.com'
+SENHA = 'senha'
+
+
+@pytest.fixture
+def configuracao():
+    """Configuração da aplicação de teste; um módulo pode sobrescrever a fixture."""
+    return {'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'CACHE_BACKEND': 'nenhum'}
+
+
+@pytest.fixture
+def app(configuracao):
+    app = create_app(configuracao)
+    with app.app_context():
+        db.create_all()
+        usuario = Usuario(nome='Teste', email=EMAIL)
+        usuario.set_senha(SENHA)
+        db.session.add(usuario)
+        db.session.commit()
+    # Banco novo, sem arquivo: a primeira requisição não relê a data de corte
+    app.extensions['corte_arquivo'].atualizar(None)
+    return app
+
+
+@pytest.fixture
+def usuario_id(app):
+    with app.app_context():
+        return Usuario.query.filter_by(email=EMAIL).one().id
+
+
+@pytest.fixture
+def cliente(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def cabecalhos(cliente):
+    resposta = cliente.post('/api/auth/login', json={'email': EMAIL, 'senha': SENHA})
+    return {'Authorization': f"Bearer {resposta.get_json()['token']}"}
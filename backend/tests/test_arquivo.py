@@ -0,0 +1,95 @@
+"""Arquivamento de anos encerrados (``api/arquivo.py``)."""
+from datetime import date
+from decimal import Decimal
+from api import db
+from api.arquivo import arquivar
+from api.models import Transacao, TransacaoArquivada
+
+ANO = date.today().year - 3
+
+
+def _lancar(usuario_id, data, valor):
+    transacao = Transacao(usuario_id=usuario_id, tipo='despesa', valor=Decimal(valor), data_transacao=data)
+    db.session.add(transacao)
+    db.session.commit()
+    return transacao.id
+
+
+def test_ids_apagados_pelo_arquivamento_nao_sao_reutilizados(app, usuario_id, cliente, cabecalhos):
+    with app.app_context():
+        ids = [_lancar(usuario_id, date(ANO, mes, 10), '10.00') for mes in (1, 2, 3)]
+        arquivar(db.engine, ANO)
+
+        # O arquivamento esvaziou transacoes; o id seguinte não pode repetir um arquivado
+        tardia = _lancar(usuario_id, date(ANO + 1, 6, 1), '5.50')
+        assert tardia > max(ids)
+
+        assert arquivar(db.engine, ANO + 1) == [(ANO + 1, 1)]
+        assert sorted(id for id, in db.session.query(TransacaoArquivada.id)) == ids + [tardia]
+
+    resposta = cliente.get(
+        f'/api/relatorios/fluxo?data_inicio={ANO}-01-01&data_fim={ANO + 1}-12-31&granularidade=ano',
+        headers=cabecalhos
+    )
+    assert [(p['periodo'], p['despesas']) for p in resposta.get_json()['serie']] == [
+        (f'{ANO}-01-01', 30.0), (f'{ANO + 1}-01-01', 5.5)
+    ]
+
+
+def _paginas(cliente, cabecalhos, caminho):
+    """Todas as transações da listagem, seguindo next_cursor."""
+    transacoes, cursor = [], None
+    while True:
+        corpo = cliente.get(f'{caminho}&cursor={cursor}' if cursor else caminho, headers=cabecalhos).get_json()
+        transacoes.extend(corpo['transacoes'])
+        cursor = corpo['next_cursor']
+        if cursor is None:
+            return transacoes
+
+
+def test_listagem_e_exportacao_incluem_o_arquivo(app, usuario_id, cliente, cabecalhos):
+    with app.app_context():
+        for mes in range(1, 13):
+            _lancar(usuario_id, date(ANO, mes, 10), '10.00')
+            _lancar(usuario_id, date(ANO + 1, mes, 10), '20.00')
+        arquivar(db.engine, ANO)
+        # Lançamento tardio em ano arquivado: fica em transacoes, entre as arquivadas
+        _lancar(usuario_id, date(ANO, 6, 15), '1.00')
+        esperadas = sorted(
+            (data.isoformat(), id) for modelo in (Transacao, TransacaoArquivada)
+            for data, id in db.session.query(modelo.data_transacao, modelo.id)
+        )
+    assert len(esperadas) == 25
+
+    listadas = _paginas(cliente, cabecalhos, '/api/transacoes?limit=7')
+    assert [(t['data_transacao'], t['id']) for t in listadas] == esperadas
+
+    corpo = cliente.get('/api/transacoes?stream=1', headers=cabecalhos).get_data(as_text=True)
+    assert len(corpo.splitlines()) == 25
+
+    filtradas = _paginas(
+        cliente, cabecalhos, f'/api/transacoes?limit=4&data_inicio={ANO}-06-01&data_fim={ANO + 1}-02-28'
+    )
+    assert [t['data_transacao'] for t in filtradas] == [
+        data for data, _ in esperadas if f'{ANO}-06-01' <= data <= f'{ANO + 1}-02-28'
+    ]
+    assert len(filtradas) == 10
+
+    exportado = cliente.get('/api/transacoes/exportar?formato=csv', headers=cabecalhos).get_data(as_text=True)
+    linhas = exportado.strip().splitlines()[1:]
+    assert [int(linha.split(',')[0]) for linha in linhas] == [id for _, id in esperadas]
+
+
+def test_busca_sinaliza_anos_arquivados(app, usuario_id, cliente, cabecalhos):
+    with app.app_context():
+        _lancar(usuario_id, date(ANO, 3, 10), '10.00')
+        arquivar(db.engine, ANO)
+
+    corpo = cliente.get('/api/transacoes?q=mercado', headers=cabecalhos).get_json()
+    assert corpo['arquivado_ate'] == f'{ANO}-12-31'
+
+    corpo = cliente.get(f'/api/transacoes?q=mercado&data_inicio={ANO + 1}-01-01', headers=cabecalhos).get_json()
+    assert corpo['arquivado_ate'] is None
+
+    resposta = cliente.get('/api/transacoes?q=mercado&stream=1', headers=cabecalhos)
+    assert resposta.headers['X-Arquivado-Ate'] == f'{ANO}-12-31'
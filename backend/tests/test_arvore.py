@@ -0,0 +1,114 @@
+"""Tabela de fechamento ``categorias_caminhos`` (``api/arvore.py``)."""
+from datetime import date
+from decimal import Decimal
+import pytest
+from api import db
+from api.arvore import remover_subarvore, reconstruir_caminhos
+from api.models import Categoria, CategoriaCaminho, Transacao
+
+# Um SELECT sem JOIN entre os aliases gera "cartesian product" no SQLAlchemy
+pytestmark = pytest.mark.filterwarnings('error::sqlalchemy.exc.SAWarning')
+
+
+def _caminhos():
+    return {
+        (c.ancestral_id, c.descendente_id, c.profundidade) for c in CategoriaCaminho.query
+    }
+
+
+def _esperados(arvore):
+    """Caminhos de um dicionário {categoria: pai}, calculados subindo pelos pais."""
+    caminhos = set()
+    for categoria in arvore:
+        atual, profundidade = categoria, 0
+        while atual is not None:
+            caminhos.add((atual, categoria, profundidade))
+            atual, profundidade = arvore[atual], profundidade + 1
+    return caminhos
+
+
+def _reconstruidos(usuario_id):
+    """Caminhos depois de ``reconstruir_caminhos``, para comparar com os mantidos pelos eventos."""
+    reconstruir_caminhos(db.session.connection(), usuario_id)
+    db.session.commit()
+    return _caminhos()
+
+
+@pytest.fixture
+def arvore(app, usuario_id):
+    """Casa > (Mercado > Feira, Luz) e Lazer > Cinema; retorna {nome: id}."""
+    with app.app_context():
+        ids = {}
+        for nome, pai in (
+            ('Casa', None), ('Mercado', 'Casa'), ('Feira', 'Mercado'), ('Luz', 'Casa'),
+            ('Lazer', None), ('Cinema', 'Lazer'),
+        ):
+            categoria = Categoria(nome=nome, usuario_id=usuario_id, categoria_pai_id=ids.get(pai))
+            db.session.add(categoria)
+            db.session.flush()
+            ids[nome] = categoria.id
+        db.session.commit()
+        return ids
+
+
+def _pais(ids):
+    return {c.id: c.categoria_pai_id for c in Categoria.query if c.id in ids.values()}
+
+
+def test_insercao_cria_caminhos_para_os_ancestrais(app, usuario_id, arvore):
+    with app.app_context():
+        assert _caminhos() == _esperados(_pais(arvore))
+        assert (arvore['Casa'], arvore['Feira'], 2) in _caminhos()
+        assert _reconstruidos(usuario_id) == _esperados(_pais(arvore))
+
+
+@pytest.mark.parametrize('categoria, novo_pai', [
+    ('Mercado', 'Lazer'),   # Subárvore com neta para outra raiz
+    ('Mercado', 'Cinema'),  # Para um nível mais fundo
+    ('Mercado', None),      # Para a raiz
+    ('Lazer', 'Feira'),     # Raiz com filha para dentro de outra árvore
+])
+def test_mover_subarvore(app, usuario_id, arvore, categoria, novo_pai):
+    with app.app_context():
+        movida = db.session.get(Categoria, arvore[categoria])
+        movida.categoria_pai_id = arvore.get(novo_pai)
+        db.session.commit()
+
+        esperados = _esperados(_pais(arvore))
+        assert _caminhos() == esperados
+        assert _reconstruidos(usuario_id) == esperados
+
+
+def test_remover_subarvore(app, usuario_id, arvore):
+    with app.app_context():
+        transacao = Transacao(
+            usuario_id=usuario_id, tipo='despesa', valor=Decimal('12.00'),
+            data_transacao=date(2024, 5, 1), categoria_id=arvore['Feira']
+        )
+        db.session.add(transacao)
+        db.session.commit()
+
+        assert remover_subarvore(db.session, arvore['Mercado']) == 2
+        db.session.commit()
+
+        restantes = {nome: id for nome, id in arvore.items() if nome not in ('Mercado', 'Feira')}
+        assert set(_pais(arvore)) == set(restantes.values())
+        assert _caminhos() == _esperados(_pais(arvore))
+        assert db.session.get(Transacao, transacao.id).categoria_id is None
+        assert remover_subarvore(db.session, arvore['Mercado']) == 0
+
+
+def test_reconstruir_caminhos(app, usuario_id, arvore):
+    with app.app_context():
+        esperados = _caminhos()
+        db.session.query(CategoriaCaminho).delete()
+        db.session.commit()
+        assert _reconstruidos(usuario_id) == esperados
+
+        # Ciclo feito por fora dos eventos: a reconstrução recusa a árvore
+        db.session.execute(Categoria.__table__.update().where(
+            Categoria.id == arvore['Casa']
+        ).values(categoria_pai_id=arvore['Feira']))
+        with pytest.raises(ValueError):
+            reconstruir_caminhos(db.session.connection(), usuario_id)
+        db.session.rollback()
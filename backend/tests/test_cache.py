@@ -0,0 +1,89 @@
+"""Cache de respostas (``api/cache.py``): ETag, 304 e invalidação após escritas."""
+from datetime import date
+from decimal import Decimal
+import pytest
+from api import db
+from api.detector_sql import verificar_consultas_rota
+from api.models import Transacao
+
+RELATORIO = '/api/relatorios/categorias?valores=texto'
+
+
+@pytest.fixture
+def configuracao():
+    return {'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'CACHE_BACKEND': 'memoria'}
+
+
+@pytest.fixture
+def transacao_id(app, usuario_id):
+    with app.app_context():
+        transacao = Transacao(
+            usuario_id=usuario_id, tipo='despesa', valor=Decimal('40.00'), data_transacao=date(2024, 6, 10)
+        )
+        db.session.add(transacao)
+        db.session.commit()
+        return transacao.id
+
+
+def _despesas(resposta):
+    return [item['total_despesas'] for item in resposta.get_json()]
+
+
+def test_resposta_em_cache_e_304(cliente, cabecalhos, transacao_id):
+    primeira = verificar_consultas_rota(cliente, 'GET', RELATORIO, 1, headers=cabecalhos)
+    assert primeira.status_code == 200 and _despesas(primeira) == ['40.00']
+    etag = primeira.headers['ETag']
+
+    # Mesma requisição: corpo do cache, sem consultar o banco
+    repetida = verificar_consultas_rota(cliente, 'GET', RELATORIO, 0, headers=cabecalhos)
+    assert repetida.get_data() == primeira.get_data()
+    assert repetida.headers['ETag'] == etag
+
+    condicional = verificar_consultas_rota(
+        cliente, 'GET', RELATORIO, 0, headers={**cabecalhos, 'If-None-Match': etag}
+    )
+    assert condicional.status_code == 304
+    assert condicional.get_data() == b''
+
+    # Outro formato de valores é outra entrada do cache
+    em_centavos = cliente.get('/api/relatorios/categorias?valores=centavos', headers=cabecalhos)
+    assert _despesas(em_centavos) == [4000]
+    assert em_centavos.headers['ETag'] != etag
+
+
+@pytest.mark.parametrize('metodo, caminho, corpo, esperado', [
+    ('POST', '/api/transacoes', lambda id: {
+        'tipo': 'despesa', 'valor': '2.50', 'data_transacao': '2024-06-11'
+    }, ['42.50']),
+    ('PUT', '/api/transacoes/{id}', lambda id: {'valor': '15.00'}, ['15.00']),
+    ('PATCH', '/api/transacoes', lambda id: {'ids': [id], 'campos': {'valor': '1.00'}}, ['1.00']),
+    ('DELETE', '/api/transacoes/{id}', lambda id: None, []),
+])
+def test_escrita_invalida_o_cache(cliente, cabecalhos, transacao_id, metodo, caminho, corpo, esperado):
+    antes = cliente.get(RELATORIO, headers=cabecalhos)
+    assert _despesas(antes) == ['40.00']
+    etag = antes.headers['ETag']
+
+    resposta = cliente.open(
+        caminho.format(id=transacao_id), method=metodo, json=corpo(transacao_id), headers=cabecalhos
+    )
+    assert resposta.status_code < 400
+
+    # O ETag antigo deixa de valer e a rota volta a consultar o banco
+    depois = verificar_consultas_rota(
+        cliente, 'GET', RELATORIO, 1, headers={**cabecalhos, 'If-None-Match': etag}
+    )
+    assert depois.status_code == 200
+    assert depois.headers['ETag'] != etag
+    assert _despesas(depois) == esperado
+
+
+def test_escrita_recusada_mantem_o_cache(cliente, cabecalhos, transacao_id):
+    etag = cliente.get(RELATORIO, headers=cabecalhos).headers['ETag']
+    resposta = cliente.post('/api/transacoes', json={'tipo': 'foo'}, headers=cabecalhos)
+    assert resposta.status_code == 422
+
+    condicional = verificar_consultas_rota(
+        cliente, 'GET', RELATORIO, 0, headers={**cabecalhos, 'If-None-Match': etag}
+    )
+    assert condicional.status_code == 304
@@ -0,0 +1,188 @@
+"""Orçamento de comandos SQL das rotas de relatório e de listagem.
+
+Cada rota de leitura deve responder com um número fixo de consultas,
+independente da quantidade de transações e categorias; uma rota que passa
+do orçamento indica N+1 ou uma consulta auxiliar nova no caminho da
+requisição. Executar a partir de ``backend``: ``python -m pytest tests``.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+import pytest
+from api import create_app, db
+from api.arquivo import arquivar
+from api.detector_sql import maximo_consultas, verificar_consultas_rota
+from api.models import Usuario, Categoria, Transacao
+
+ANO_ARQUIVADO = date.today().year - 2
+ANO_ATUAL = date.today().year - 1
+
+
+def _lancamentos():
+    """(data, tipo, valor, categoria) das transações do módulo; categoria None é sem categoria."""
+    for ano in (ANO_ARQUIVADO, ANO_ATUAL):
+        for mes in range(1, 13):
+            for dia, categoria in zip((3, 11, 19, 27), ('Casa', None, 'Aluguel', 'Mercado')):
+                if categoria is None:
+                    yield date(ano, mes, dia), 'receita', Decimal('1500.00'), None
+                else:
+                    yield date(ano, mes, dia), 'despesa', Decimal('12.34') * dia, categoria
+
+
+@pytest.fixture(scope='module')
+def app():
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'CACHE_BACKEND': 'nenhum'})
+    with app.app_context():
+        db.create_all()
+        usuario = Usuario(nome='Teste', email='teste@exemplo.com')
+        usuario.set_senha('senha')
+        db.session.add(usuario)
+        db.session.flush()
+
+        casa = Categoria(nome='Casa', usuario_id=usuario.id)
+        db.session.add(casa)
+        db.session.flush()
+        categorias = {'Casa': casa}
+        for nome in ('Aluguel', 'Mercado', 'Luz'):
+            categorias[nome] = Categoria(nome=nome, usuario_id=usuario.id, categoria_pai_id=casa.id)
+            db.session.add(categorias[nome])
+        db.session.flush()
+
+        # Dois anos de transações em várias categorias: um ano vai para o arquivo
+        for data, tipo, valor, categoria in _lancamentos():
+            db.session.add(Transacao(
+                usuario_id=usuario.id, tipo=tipo, valor=valor,
+                descricao=f'Lançamento {data.day}/{data.month}', data_transacao=data,
+                categoria_id=categorias[categoria].id if categoria else None
+            ))
+        db.session.commit()
+
+        # Os relatórios passam a combinar transacoes e transacoes_arquivo
+        arquivar(db.engine, ANO_ARQUIVADO)
+    return app
+
+
+@pytest.fixture(scope='module')
+def cabecalhos(app):
+    resposta = app.test_client().post(
+        '/api/auth/login', json={'email': 'teste@exemplo.com', 'senha': 'senha'}
+    )
+    return {'Authorization': f"Bearer {resposta.get_json()['token']}"}
+
+
+@pytest.fixture
+def cliente(app):
+    return app.test_client()
+
+
+PERIODO = f'data_inicio={ANO_ARQUIVADO}-03-15&data_fim={ANO_ATUAL}-10-20'
+
+
+@pytest.mark.parametrize('caminho, maximo', [
+    ('/api/transacoes', 1),
+    ('/api/transacoes?limit=5', 1),
+    (f'/api/transacoes?data_inicio={ANO_ATUAL}-02-01&data_fim={ANO_ATUAL}-06-30&tipo=despesa', 1),
+    ('/api/transacoes?q=lançamento', 1),
+    ('/api/transacoes?stream=1', 1),
+    ('/api/transacoes/exportar?formato=csv', 1),
+    ('/api/categorias', 1),
+    (f'/api/relatorios/fluxo?{PERIODO}', 1),
+    (f'/api/relatorios/fluxo?{PERIODO}&granularidade=dia', 1),
+    (f'/api/relatorios/fluxo?{PERIODO}&granularidade=semana', 1),
+    (f'/api/relatorios/fluxo?{PERIODO}&granularidade=ano', 1),
+    ('/api/relatorios/categorias', 1),
+    (f'/api/relatorios/categorias?{PERIODO}', 1),
+    (f'/api/relatorios/categorias/arvore?{PERIODO}', 1),
+    ('/api/dashboard', 1),
+    ('/api/dashboard?periodo=366d', 1),
+])
+def test_orcamento_de_consultas(cliente, cabecalhos, caminho, maximo):
+    resposta = verificar_consultas_rota(cliente, 'GET', caminho, maximo, headers=cabecalhos)
+    assert resposta.status_code == 200, resposta.get_data(as_text=True)
+
+
+def test_orcamento_estatisticas(cliente, cabecalhos):
+    pytest.importorskip('numpy')
+    # Transações do período e nomes das categorias
+    resposta = verificar_consultas_rota(
+        cliente, 'GET', f'/api/relatorios/estatisticas?{PERIODO}&granularidade=semana', 2, headers=cabecalhos
+    )
+    assert resposta.status_code == 200, resposta.get_data(as_text=True)
+
+
+def test_listagem_nao_cresce_com_as_paginas(cliente, cabecalhos):
+    proxima = '/api/transacoes?limit=10'
+    with maximo_consultas(5, 'Cinco páginas da listagem'):
+        for _ in range(5):
+            corpo = cliente.get(proxima, headers=cabecalhos).get_json()
+            proxima = f"/api/transacoes?limit=10&cursor={corpo['next_cursor']}"
+
+
+def _no_periodo(inicio, fim):
+    return [(data, tipo, valor, categoria) for data, tipo, valor, categoria in _lancamentos() if inicio <= data <= fim]
+
+
+INICIO, FIM = date(ANO_ARQUIVADO, 3, 15), date(ANO_ATUAL, 10, 20)
+
+
+def test_valores_do_fluxo(cliente, cabecalhos):
+    resposta = verificar_consultas_rota(
+        cliente, 'GET', f'/api/relatorios/fluxo?{PERIODO}&granularidade=ano&valores=texto', 1, headers=cabecalhos
+    )
+    esperado = defaultdict(lambda: {'receita': Decimal('0'), 'despesa': Decimal('0')})
+    for data, tipo, valor, _ in _no_periodo(INICIO, FIM):
+        esperado[f'{data.year}-01-01'][tipo] += valor
+    saldo = Decimal('0')
+    serie = []
+    for periodo in sorted(esperado):
+        saldo += esperado[periodo]['receita'] - esperado[periodo]['despesa']
+        serie.append((periodo, esperado[periodo]['receita'], esperado[periodo]['despesa'], saldo))
+    assert [
+        (p['periodo'], Decimal(p['receitas']), Decimal(p['despesas']), Decimal(p['saldo']))
+        for p in resposta.get_json()['serie']
+    ] == serie
+
+
+def test_valores_das_categorias(cliente, cabecalhos):
+    esperado = defaultdict(lambda: {'receita': Decimal('0'), 'despesa': Decimal('0')})
+    for _, tipo, valor, categoria in _no_periodo(INICIO, FIM):
+        esperado[categoria or 'Sem categoria'][tipo] += valor
+
+    resposta = verificar_consultas_rota(
+        cliente, 'GET', f'/api/relatorios/categorias?{PERIODO}&valores=texto', 1, headers=cabecalhos
+    )
+    assert {
+        item['categoria']: (Decimal(item['total_receitas']), Decimal(item['total_despesas']))
+        for item in resposta.get_json()
+    } == {nome: (t['receita'], t['despesa']) for nome, t in esperado.items()}
+
+    # Na árvore, Casa acumula as despesas das subcategorias; Luz não tem lançamentos
+    resposta = verificar_consultas_rota(
+        cliente, 'GET', f'/api/relatorios/categorias/arvore?{PERIODO}&valores=texto', 1, headers=cabecalhos
+    )
+    casa, sem_categoria = resposta.get_json()
+    assert casa['categoria'] == 'Casa'
+    assert Decimal(casa['despesas_diretas']) == esperado['Casa']['despesa']
+    assert Decimal(casa['total_despesas']) == sum(
+        esperado[nome]['despesa'] for nome in ('Casa', 'Aluguel', 'Mercado')
+    )
+    assert {
+        sub['categoria']: Decimal(sub['total_despesas']) for sub in casa['subcategorias']
+    } == {'Aluguel': esperado['Aluguel']['despesa'], 'Luz': 0, 'Mercado': esperado['Mercado']['despesa']}
+    assert Decimal(sem_categoria['total_receitas']) == esperado['Sem categoria']['receita']
+
+
+def test_valores_do_dashboard(cliente, cabecalhos):
+    resposta = verificar_consultas_rota(
+        cliente, 'GET', '/api/dashboard?periodo=366d&valores=texto', 1, headers=cabecalhos
+    )
+    corpo = resposta.get_json()
+    hoje = date.fromisoformat(corpo['data_fim'])
+    lancamentos = _no_periodo(hoje - timedelta(days=365), hoje)
+    receitas = sum(valor for _, tipo, valor, _ in lancamentos if tipo == 'receita')
+    despesas = sum(valor for _, tipo, valor, _ in lancamentos if tipo == 'despesa')
+    assert receitas and despesas
+    assert (Decimal(corpo['receitas']), Decimal(corpo['despesas']), Decimal(corpo['saldo'])) == (
+        receitas, despesas, receitas - despesas
+    )
+    assert {item['categoria'] for item in corpo['categorias']} == {'Casa', 'Aluguel', 'Mercado'}
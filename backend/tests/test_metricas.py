@@ -0,0 +1,44 @@
+"""Acesso a ``/metrics`` (``api/metricas.py``)."""
+import pytest
+from api import create_app
+
+BASE = {'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'CACHE_BACKEND': 'nenhum'}
+
+
+def _cliente(**config):
+    return create_app({**BASE, **config}).test_client()
+
+
+def test_sem_token_nem_ips_a_rota_nao_existe():
+    assert _cliente(METRICAS_TOKEN=None, METRICAS_IPS=None).get('/metrics').status_code == 404
+
+
+def test_token():
+    cliente = _cliente(METRICAS_TOKEN='segredo', METRICAS_IPS=None)
+    assert cliente.get('/metrics').status_code == 401
+    assert cliente.get('/metrics', headers={'Authorization': 'Bearer outro'}).status_code == 401
+    resposta = cliente.get('/metrics', headers={'Authorization': 'Bearer segredo'})
+    assert resposta.status_code == 200
+    assert 'pyfinance_http_requisicao_segundos' in resposta.get_data(as_text=True)
+
+
+def test_lista_de_ips():
+    cliente = _cliente(METRICAS_TOKEN=None, METRICAS_IPS='127.0.0.1, 10.1.0.0/16')
+    assert cliente.get('/metrics').status_code == 200
+    assert cliente.get('/metrics', environ_base={'REMOTE_ADDR': '10.1.2.3'}).status_code == 200
+    assert cliente.get('/metrics', environ_base={'REMOTE_ADDR': '10.2.0.1'}).status_code == 403
+
+
+def test_token_e_ips_sao_exigidos_juntos():
+    cliente = _cliente(METRICAS_TOKEN='segredo', METRICAS_IPS='10.1.0.0/16')
+    autorizado = {'Authorization': 'Bearer segredo'}
+    assert cliente.get('/metrics', headers=autorizado).status_code == 403
+    assert cliente.get('/metrics', environ_base={'REMOTE_ADDR': '10.1.0.7'}).status_code == 401
+    assert cliente.get(
+        '/metrics', headers=autorizado, environ_base={'REMOTE_ADDR': '10.1.0.7'}
+    ).status_code == 200
+
+
+def test_lista_de_ips_invalida():
+    with pytest.raises(ValueError):
+        create_app({**BASE, 'METRICAS_IPS': '10.0.0.300'})
@@ -0,0 +1,187 @@
+"""Totais de ``resumos_mensais`` contra um GROUP BY direto das transações.
+
+Depois de cada caminho de escrita (rotas individuais, operações em massa,
+importação, exclusão de categoria e arquivamento), a tabela de resumos e os
+relatórios que a leem devem bater com a soma das transações vivas e
+arquivadas.
+"""
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+import pytest
+from sqlalchemy import func, select, union_all
+from api import db
+from api.arquivo import arquivar
+from api.models import Categoria, Transacao, TransacaoArquivada, ResumoMensal
+
+ANO = date.today().year - 2
+PERIODO = f'data_inicio={ANO}-01-01&data_fim={ANO + 1}-12-31'
+
+
+@pytest.fixture
+def categorias(app, usuario_id):
+    with app.app_context():
+        casa = Categoria(nome='Casa', usuario_id=usuario_id)
+        lazer = Categoria(nome='Lazer', usuario_id=usuario_id)
+        db.session.add_all([casa, lazer])
+        db.session.flush()
+        mercado = Categoria(nome='Mercado', usuario_id=usuario_id, categoria_pai_id=casa.id)
+        db.session.add(mercado)
+        db.session.commit()
+        return {'casa': casa.id, 'mercado': mercado.id, 'lazer': lazer.id}
+
+
+@pytest.fixture
+def lancamentos(app, usuario_id, categorias):
+    with app.app_context():
+        for ano in (ANO, ANO + 1):
+            for mes in (1, 4, 7, 10):
+                for dia, tipo, valor, categoria in (
+                    (5, 'receita', '3000.00', None),
+                    (12, 'despesa', '450.10', categorias['mercado']),
+                    (20, 'despesa', '89.90', categorias['lazer']),
+                    (28, 'despesa', '120.35', categorias['casa']),
+                ):
+                    db.session.add(Transacao(
+                        usuario_id=usuario_id, tipo=tipo, valor=Decimal(valor),
+                        descricao=f'{tipo} {dia}/{mes}', data_transacao=date(ano, mes, dia),
+                        categoria_id=categoria
+                    ))
+        db.session.commit()
+
+
+def _agrupadas(usuario_id):
+    """GROUP BY (mês, categoria, tipo) direto sobre transacoes e transacoes_arquivo."""
+    tabelas = (Transacao.__table__, TransacaoArquivada.__table__)
+    unidas = union_all(*(
+        select(t.c.data_transacao, t.c.categoria_id, t.c.tipo, t.c.valor).where(t.c.usuario_id == usuario_id)
+        for t in tabelas
+    )).subquery()
+    mes = func.substr(unidas.c.data_transacao, 1, 7)
+    categoria = func.coalesce(unidas.c.categoria_id, 0)
+    linhas = db.session.execute(
+        select(mes, categoria, unidas.c.tipo, func.sum(unidas.c.valor), func.count())
+        .group_by(mes, categoria, unidas.c.tipo)
+    )
+    return {(mes, categoria, tipo): (Decimal(total), quantidade) for mes, categoria, tipo, total, quantidade in linhas}
+
+
+def _verificar(app, usuario_id, cliente, cabecalhos):
+    with app.app_context():
+        esperado = _agrupadas(usuario_id)
+        resumos = {
+            (r.ano_mes, r.categoria_id, r.tipo): (r.total, r.quantidade)
+            for r in ResumoMensal.query.filter_by(usuario_id=usuario_id)
+        }
+    assert esperado, 'cenário sem transações'
+    vazios = {chave: valor for chave, valor in resumos.items() if valor[1] == 0}
+    assert all(total == 0 for total, _ in vazios.values()), vazios
+    assert {chave: valor for chave, valor in resumos.items() if valor[1]} == esperado
+
+    # Relatórios atendidos pelos resumos (meses completos), valores exatos
+    por_categoria = defaultdict(lambda: {'receita': Decimal('0'), 'despesa': Decimal('0')})
+    por_mes = defaultdict(lambda: {'receita': Decimal('0'), 'despesa': Decimal('0')})
+    for (mes, categoria, tipo), (total, _) in esperado.items():
+        por_categoria[categoria or None][tipo] += total
+        por_mes[f'{mes}-01'][tipo] += total
+
+    corpo = cliente.get('/api/relatorios/categorias?valores=texto', headers=cabecalhos).get_json()
+    assert {
+        item['categoria_id']: (Decimal(item['total_receitas']), Decimal(item['total_despesas']))
+        for item in corpo
+    } == {categoria: (t['receita'], t['despesa']) for categoria, t in por_categoria.items()}
+
+    corpo = cliente.get(
+        f'/api/relatorios/fluxo?{PERIODO}&granularidade=mes&valores=texto', headers=cabecalhos
+    ).get_json()
+    assert {
+        ponto['periodo']: (Decimal(ponto['receitas']), Decimal(ponto['despesas']))
+        for ponto in corpo['serie']
+    } == {mes: (t['receita'], t['despesa']) for mes, t in por_mes.items()}
+
+
+def _ids(app, usuario_id, **filtros):
+    with app.app_context():
+        return [t.id for t in Transacao.query.filter_by(usuario_id=usuario_id, **filtros).order_by(Transacao.id)]
+
+
+def test_escritas_individuais(app, usuario_id, cliente, cabecalhos, categorias, lancamentos):
+    _verificar(app, usuario_id, cliente, cabecalhos)
+
+    resposta = cliente.post('/api/transacoes', headers=cabecalhos, json={
+        'tipo': 'despesa', 'valor': '77.77', 'data_transacao': f'{ANO}-02-14', 'categoria_id': categorias['lazer']
+    })
+    assert resposta.status_code == 201
+    _verificar(app, usuario_id, cliente, cabecalhos)
+
+    # Muda mês, categoria, tipo e valor de uma vez
+    primeiro, segundo = _ids(app, usuario_id, categoria_id=categorias['mercado'])[:2]
+    resposta = cliente.put(f'/api/transacoes/{primeiro}', headers=cabecalhos, json={
+        'tipo': 'receita', 'valor': '10.01', 'data_transacao': f'{ANO + 1}-03-31', 'categoria_id': None
+    })
+    assert resposta.status_code == 200
+    _verificar(app, usuario_id, cliente, cabecalhos)
+
+    assert cliente.delete(f'/api/transacoes/{segundo}', headers=cabecalhos).status_code == 200
+    _verificar(app, usuario_id, cliente, cabecalhos)
+
+
+def test_operacoes_em_massa(app, usuario_id, cliente, cabecalhos, categorias, lancamentos):
+    resposta = cliente.patch('/api/transacoes', headers=cabecalhos, json={
+        'filtros': {'tipo': 'despesa', 'data_inicio': f'{ANO}-04-01', 'data_fim': f'{ANO + 1}-04-30'},
+        'campos': {'categoria_id': categorias['casa']}
+    })
+    assert resposta.get_json()['afetadas'] == 15
+    _verificar(app, usuario_id, cliente, cabecalhos)
+
+    ids = _ids(app, usuario_id, tipo='receita')[:3]
+    resposta = cliente.patch('/api/transacoes', headers=cabecalhos, json={
+        'ids': ids, 'campos': {'valor': '1.23', 'data_transacao': f'{ANO}-12-25'}
+    })
+    assert resposta.get_json()['afetadas'] == 3
+    _verificar(app, usuario_id, cliente, cabecalhos)
+
+    resposta = cliente.delete('/api/transacoes', headers=cabecalhos, json={
+        'filtros': {'categoria_id': categorias['lazer']}
+    })
+    assert resposta.get_json()['afetadas'] == 3
+    _verificar(app, usuario_id, cliente, cabecalhos)
+
+
+def test_importacao(app, usuario_id, cliente, cabecalhos, categorias, lancamentos):
+    arquivo = '\n'.join([
+        'data_transacao,tipo,valor,descricao,categoria',
+        f'{ANO}-01-03,despesa,15.50,Feira,Mercado',
+        f'{ANO}-05-09,receita,200.00,Reembolso,',
+        f'{ANO + 1}-11-30,despesa,0.99,Taxa,Casa',
+        f'{ANO}-13-01,despesa,1.00,Data inválida,',
+        f'{ANO}-06-01,despesa,5.00,Categoria inexistente,Viagem',
+    ])
+    resposta = cliente.post(
+        '/api/transacoes/importar', headers=cabecalhos, data=arquivo, content_type='text/csv'
+    )
+    assert resposta.get_json()['importadas'] == 3
+    _verificar(app, usuario_id, cliente, cabecalhos)
+
+
+def test_exclusao_de_categoria(app, usuario_id, cliente, cabecalhos, categorias, lancamentos):
+    # Casa leva junto a subcategoria Mercado; as transações das duas ficam sem categoria
+    resposta = cliente.delete(f"/api/categorias/{categorias['casa']}", headers=cabecalhos)
+    assert resposta.status_code == 200
+    _verificar(app, usuario_id, cliente, cabecalhos)
+
+
+def test_arquivamento(app, usuario_id, cliente, cabecalhos, categorias, lancamentos):
+    with app.app_context():
+        arquivar(db.engine, ANO)
+    _verificar(app, usuario_id, cliente, cabecalhos)
+
+    # Lançamento tardio no ano arquivado e exclusão de categoria com transações arquivadas
+    resposta = cliente.post('/api/transacoes', headers=cabecalhos, json={
+        'tipo': 'despesa', 'valor': '9.99', 'data_transacao': f'{ANO}-07-01', 'categoria_id': categorias['mercado']
+    })
+    assert resposta.status_code == 201
+    _verificar(app, usuario_id, cliente, cabecalhos)
+
+    assert cliente.delete(f"/api/categorias/{categorias['mercado']}", headers=cabecalhos).status_code == 200
+    _verificar(app, usuario_id, cliente, cabecalhos)
@@ -0,0 +1,203 @@
+"""Rotas de transações: listagem, busca, exportação, importação e operações em massa.
+
+Cada rota é exercitada com ``verificar_consultas_rota``: a resposta é
+conferida junto com o orçamento de comandos SQL.
+"""
+import csv
+import io
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+import pytest
+from api import db
+from api.detector_sql import verificar_consultas_rota
+from api.models import Categoria, Transacao
+
+DESCRICOES = ('Mercado central', 'Conta de luz', 'Padaria', 'Mercado do bairro', 'Farmácia')
+
+
+@pytest.fixture
+def transacoes(app, usuario_id):
+    with app.app_context():
+        for dia, tipo in ((5, 'despesa'), (15, 'receita'), (25, 'despesa')):
+            db.session.add(Transacao(
+                usuario_id=usuario_id, tipo=tipo, valor=Decimal('10.00'),
+                descricao=f'Mercado dia {dia}', data_transacao=date(2024, 3, dia)
+            ))
+        db.session.commit()
+
+
+@pytest.mark.parametrize('caminho', [
+    '/api/transacoes',
+    '/api/transacoes?q=mercado',
+    '/api/transacoes/exportar',
+])
+@pytest.mark.parametrize('filtro, mensagem', [
+    ('data_inicio=ontem', 'Formato de data inválido'),
+    ('data_fim=2024-02-30', 'Formato de data inválido'),
+    ('tipo=foo', 'Tipo inválido'),
+    ('categoria_id=abc', 'categoria_id'),
+])
+def test_filtros_invalidos_retornam_422(cliente, cabecalhos, transacoes, caminho, filtro, mensagem):
+    separador = '&' if '?' in caminho else '?'
+    resposta = cliente.get(f'{caminho}{separador}{filtro}', headers=cabecalhos)
+    assert resposta.status_code == 422
+    assert mensagem in resposta.get_json()['erro']
+
+
+def test_filtros_validos_sao_aplicados(cliente, cabecalhos, transacoes):
+    resposta = cliente.get(
+        '/api/transacoes?data_inicio=2024-03-10&tipo=despesa&limit=10', headers=cabecalhos
+    )
+    assert resposta.status_code == 200
+    assert [t['data_transacao'] for t in resposta.get_json()['transacoes']] == ['2024-03-25']
+
+
+@pytest.fixture
+def historico(app, usuario_id):
+    """25 transações, três por dia (o id desempata a ordem); retorna [(data, id)] na ordem da listagem."""
+    with app.app_context():
+        mercado = Categoria(nome='Mercado', usuario_id=usuario_id)
+        db.session.add(mercado)
+        db.session.flush()
+        criadas = []
+        for i in range(25):
+            transacao = Transacao(
+                usuario_id=usuario_id, tipo='receita' if i % 5 == 0 else 'despesa',
+                valor=Decimal('1.00') * (i + 1), descricao=DESCRICOES[i % len(DESCRICOES)],
+                # Inseridas de trás para frente dentro do dia
+                data_transacao=date(2024, 1, 1) + timedelta(days=(24 - i) // 3),
+                categoria_id=mercado.id if 'Mercado' in DESCRICOES[i % len(DESCRICOES)] else None
+            )
+            db.session.add(transacao)
+            db.session.flush()
+            criadas.append((transacao.data_transacao.isoformat(), transacao.id))
+        db.session.commit()
+        return sorted(criadas)
+
+
+def test_paginacao_por_cursor(cliente, cabecalhos, historico):
+    vistas, caminho = [], '/api/transacoes?limit=10'
+    for _ in range(3):
+        resposta = verificar_consultas_rota(cliente, 'GET', caminho, 1, headers=cabecalhos)
+        corpo = resposta.get_json()
+        vistas.extend((t['data_transacao'], t['id']) for t in corpo['transacoes'])
+        if corpo['next_cursor'] is None:
+            break
+        caminho = f"/api/transacoes?limit=10&cursor={corpo['next_cursor']}"
+    assert corpo['next_cursor'] is None
+    assert vistas == historico
+
+    # Filtros e cursor combinados: só as despesas a partir do 3º dia
+    corpo = cliente.get('/api/transacoes?limit=4&tipo=despesa&data_inicio=2024-01-03', headers=cabecalhos).get_json()
+    assert len(corpo['transacoes']) == 4
+    assert all(t['tipo'] == 'despesa' and t['data_transacao'] >= '2024-01-03' for t in corpo['transacoes'])
+    seguinte = cliente.get(
+        f"/api/transacoes?limit=4&tipo=despesa&data_inicio=2024-01-03&cursor={corpo['next_cursor']}",
+        headers=cabecalhos
+    ).get_json()
+    assert (seguinte['transacoes'][0]['data_transacao'], seguinte['transacoes'][0]['id']) > (
+        corpo['transacoes'][-1]['data_transacao'], corpo['transacoes'][-1]['id']
+    )
+
+    resposta = cliente.get('/api/transacoes?cursor=invalido', headers=cabecalhos)
+    assert resposta.status_code == 422
+
+
+def test_stream_ndjson(cliente, cabecalhos, historico):
+    resposta = verificar_consultas_rota(cliente, 'GET', '/api/transacoes?stream=1', 1, headers=cabecalhos)
+    linhas = [json.loads(linha) for linha in resposta.get_data(as_text=True).splitlines()]
+    assert [(t['data_transacao'], t['id']) for t in linhas] == historico
+
+
+def test_busca_com_cursor(app, cliente, cabecalhos, historico):
+    with app.app_context():
+        esperadas = {t.id for t in Transacao.query.filter(Transacao.descricao.like('Mercado%'))}
+    assert len(esperadas) == 10
+
+    vistas, caminho = [], '/api/transacoes?q=mercado&limit=4'
+    while caminho:
+        corpo = verificar_consultas_rota(cliente, 'GET', caminho, 1, headers=cabecalhos).get_json()
+        assert all(t['descricao'].startswith('Mercado') and t['relevancia'] > 0 for t in corpo['transacoes'])
+        vistas.extend(t['id'] for t in corpo['transacoes'])
+        caminho = corpo['next_cursor'] and f"/api/transacoes?q=mercado&limit=4&cursor={corpo['next_cursor']}"
+    assert len(vistas) == len(esperadas) and set(vistas) == esperadas
+    assert corpo['arquivado_ate'] is None
+
+    corpo = cliente.get('/api/transacoes?q="conta de luz"&tipo=despesa', headers=cabecalhos).get_json()
+    assert {t['descricao'] for t in corpo['transacoes']} == {'Conta de luz'}
+    assert len(corpo['transacoes']) == 5
+
+    resposta = cliente.get('/api/transacoes?q=***', headers=cabecalhos)
+    assert resposta.status_code == 422
+
+
+def test_exportacao_csv(cliente, cabecalhos, historico):
+    resposta = verificar_consultas_rota(
+        cliente, 'GET', '/api/transacoes/exportar?formato=csv&data_fim=2024-01-04', 1, headers=cabecalhos
+    )
+    linhas = list(csv.DictReader(io.StringIO(resposta.get_data().decode('utf-8-sig'))))
+    assert [(linha['data_transacao'], int(linha['id'])) for linha in linhas] == [
+        (data, id) for data, id in historico if data <= '2024-01-04'
+    ]
+    assert {linha['categoria'] for linha in linhas if linha['descricao'].startswith('Mercado')} == {'Mercado'}
+    assert {linha['categoria'] for linha in linhas if not linha['descricao'].startswith('Mercado')} == {''}
+
+
+def test_importacao_informa_erros(app, usuario_id, cliente, cabecalhos):
+    with app.app_context():
+        db.session.add(Categoria(nome='Mercado', usuario_id=usuario_id))
+        db.session.commit()
+    app.config['IMPORTACAO_MAX_ERROS'] = 2
+
+    linhas = [
+        {'tipo': 'despesa', 'valor': '10.50', 'data_transacao': '2024-02-01', 'categoria': 'mercado'},
+        {'tipo': 'transferencia', 'valor': '1.00', 'data_transacao': '2024-02-02'},
+        {'tipo': 'receita', 'valor': '100.00', 'data_transacao': '2024-02-03', 'descricao': 'Salário'},
+        {'tipo': 'despesa', 'valor': '5.00', 'data_transacao': '2024-02-04', 'categoria': 'Viagem'},
+        {'tipo': 'despesa', 'valor': '5.00', 'data_transacao': '2024-02-31'},
+    ]
+    corpo = '\n'.join(json.dumps(linha) for linha in linhas) + '\n{sem json'
+    resposta = verificar_consultas_rota(
+        cliente, 'POST', '/api/transacoes/importar', 3,
+        headers=cabecalhos, data=corpo, content_type='application/x-ndjson'
+    )
+    resultado = resposta.get_json()
+    assert resposta.status_code == 200
+    assert (resultado['linhas'], resultado['importadas'], resultado['total_erros']) == (6, 2, 4)
+    # Só os primeiros IMPORTACAO_MAX_ERROS erros são detalhados, com a linha do arquivo
+    assert [erro['linha'] for erro in resultado['erros']] == [2, 4]
+    assert 'Tipo inválido' in resultado['erros'][0]['erro']
+    assert 'Viagem' in resultado['erros'][1]['erro']
+
+    with app.app_context():
+        importadas = Transacao.query.order_by(Transacao.data_transacao).all()
+        assert [(t.valor, t.categoria_id is not None) for t in importadas] == [
+            (Decimal('10.50'), True), (Decimal('100.00'), False)
+        ]
+
+
+def test_operacoes_em_massa(app, cliente, cabecalhos, historico):
+    ids = [id for _, id in historico[:3]]
+    resposta = verificar_consultas_rota(
+        cliente, 'PATCH', '/api/transacoes', 6, headers=cabecalhos,
+        json={'ids': ids, 'campos': {'valor': '99.99', 'descricao': 'Revisada'}}
+    )
+    assert resposta.get_json()['afetadas'] == 3
+
+    resposta = verificar_consultas_rota(
+        cliente, 'DELETE', '/api/transacoes', 4, headers=cabecalhos,
+        json={'filtros': {'tipo': 'receita', 'data_inicio': '2024-01-05'}}
+    )
+    assert resposta.get_json()['afetadas'] == 3
+
+    with app.app_context():
+        restantes = {t.id: t for t in Transacao.query}
+        assert len(restantes) == 22
+        assert all(restantes[id].valor == Decimal('99.99') and restantes[id].descricao == 'Revisada' for id in ids)
+        assert sum(t.descricao == 'Revisada' for t in restantes.values()) == 3
+        assert not [t for t in restantes.values() if t.tipo == 'receita' and t.data_transacao >= date(2024, 1, 5)]
+
+    # Seleção vazia não pode afetar todas as transações
+    resposta = cliente.delete('/api/transacoes', headers=cabecalhos, json={'campos': {}})
+    assert resposta.status_code == 422
@@ -0,0 +1,39 @@
+"""Ponto de entrada WSGI de produção (ver gunicorn.conf.py).
+
+O aquecimento roda quando o worker importa este módulo, antes de aceitar
+requisições: configura os mapeamentos do ORM e abre a primeira conexão do
+pool, de modo que erros de configuração ou de banco derrubam o worker na
+inicialização em vez de falhar na primeira requisição.
+"""
+import logging
+from sqlalchemy import text
+from sqlalchemy.orm import configure_mappers
+from api import app, db
+
+logger = logging.getLogger(__name__)
+
+
+def _engines():
+    """Engine do primário seguido dos das réplicas de leitura (DB_REPLICAS)."""
+    replicas = app.extensions.get('replicas')
+    return [db.engine] + (replicas.engines if replicas is not None else [])
+
+
+def aquecer():
+    """Prepara o worker: mapeamentos do ORM e conexão com o banco e as réplicas."""
+    configure_mappers()
+    with app.app_context():
+        for engine in _engines():
+            with engine.connect() as conexao:
+                conexao.execute(text('SELECT 1'))
+    logger.info('Worker aquecido: mapeamentos configurados e banco acessível.')
+
+
+def encerrar():
+    """Fecha as conexões dos pools deste worker."""
+    with app.app_context():
+        for engine in _engines():
+            engine.dispose()
+
+
+aquecer()
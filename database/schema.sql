@@ -15,9 +15,23 @@ CREATE TABLE IF NOT EXISTS categorias (
     categoria_pai_id INT,
     usuario_id INT,
     FOREIGN KEY (categoria_pai_id) REFERENCES categorias(id) ON DELETE CASCADE,
-    FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE
+    FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE,
+    INDEX ix_categorias_usuario_pai (usuario_id, categoria_pai_id)
+);
+
+-- Tabela de fechamento da árvore de categorias: um par por (ancestral, descendente)
+CREATE TABLE IF NOT EXISTS categorias_caminhos (
+    ancestral_id INT NOT NULL,
+    descendente_id INT NOT NULL,
+    profundidade INT NOT NULL,
+    PRIMARY KEY (ancestral_id, descendente_id),
+    FOREIGN KEY (ancestral_id) REFERENCES categorias(id) ON DELETE CASCADE,
+    FOREIGN KEY (descendente_id) REFERENCES categorias(id) ON DELETE CASCADE,
+    INDEX ix_categorias_caminhos_descendente (descendente_id, ancestral_id)
 );
 
+-- Sem FKs nem chave primária (id) depois de "python manutencao.py particionar"
+-- (tabelas particionadas do InnoDB não aceitam FKs; a chave passa a (id, data_transacao))
 CREATE TABLE IF NOT EXISTS transacoes (
     id INT AUTO_INCREMENT PRIMARY KEY,
     valor DECIMAL(10,2) NOT NULL,
@@ -28,5 +42,64 @@ CREATE TABLE IF NOT EXISTS transacoes (
     usuario_id INT,
     data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (categoria_id) REFERENCES categorias(id) ON DELETE SET NULL,
+    FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE,
+    INDEX ix_transacoes_usuario_data_id (usuario_id, data_transacao, id),
+    INDEX ix_transacoes_usuario_categoria_data (usuario_id, categoria_id, data_transacao),
+    INDEX ix_transacoes_usuario_data_cobertura (usuario_id, data_transacao, tipo, categoria_id, valor)
+);
+
+-- Busca textual (q= em GET /api/transacoes), fora de transacoes porque tabelas
+-- particionadas não aceitam FULLTEXT; mantida pelos triggers abaixo
+CREATE TABLE IF NOT EXISTS transacoes_busca (
+    id INT PRIMARY KEY,
+    descricao TEXT,
+    FULLTEXT INDEX ft_transacoes_busca (descricao)
+);
+
+CREATE TRIGGER IF NOT EXISTS transacoes_busca_inserir AFTER INSERT ON transacoes FOR EACH ROW
+    INSERT INTO transacoes_busca (id, descricao) VALUES (NEW.id, NEW.descricao);
+
+CREATE TRIGGER IF NOT EXISTS transacoes_busca_remover AFTER DELETE ON transacoes FOR EACH ROW
+    DELETE FROM transacoes_busca WHERE id = OLD.id;
+
+CREATE TRIGGER IF NOT EXISTS transacoes_busca_atualizar AFTER UPDATE ON transacoes FOR EACH ROW
+    UPDATE transacoes_busca SET descricao = NEW.descricao
+    WHERE id = NEW.id AND NOT (descricao <=> NEW.descricao);
+
+-- Transações de anos encerrados (python manutencao.py arquivar <ano>)
+CREATE TABLE IF NOT EXISTS transacoes_arquivo (
+    id INT PRIMARY KEY,
+    valor DECIMAL(10,2) NOT NULL,
+    tipo ENUM('receita', 'despesa') NOT NULL,
+    descricao TEXT,
+    data_transacao DATE NOT NULL,
+    categoria_id INT,
+    usuario_id INT,
+    data_criacao DATETIME,
+    INDEX ix_transacoes_arquivo_usuario_data (usuario_id, data_transacao, tipo, categoria_id, valor)
+) ROW_FORMAT=COMPRESSED;
+
+CREATE TABLE IF NOT EXISTS arquivamentos (
+    ano INT PRIMARY KEY,
+    transacoes INT NOT NULL,
+    arquivado_em DATETIME NOT NULL
+);
+
+-- Totais mensais mantidos incrementalmente (categoria_id = 0: sem categoria)
+CREATE TABLE IF NOT EXISTS resumos_mensais (
+    usuario_id INT NOT NULL,
+    ano_mes CHAR(7) NOT NULL,
+    categoria_id INT NOT NULL,
+    tipo ENUM('receita', 'despesa') NOT NULL,
+    total DECIMAL(14,2) NOT NULL DEFAULT 0,
+    quantidade INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (usuario_id, ano_mes, categoria_id, tipo),
     FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE
+);
+
+-- Versões aplicadas pelas migrações em backend/api/migracoes (python migrar.py)
+CREATE TABLE IF NOT EXISTS schema_versao (
+    versao INT PRIMARY KEY,
+    descricao VARCHAR(255) NOT NULL,
+    aplicado_em DATETIME NOT NULL
 ); 
\ No newline at end of file
@@ -1,20 +1,26 @@
 import requests
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, List, Tuple
 import json
 from urllib.parse import quote  # Importa a função para codificar URLs
 
 class APIClient:
+    MAX_RESPOSTAS_CACHE = 256
+    
     def __init__(self, base_url: str):
         self.base_url = base_url.rstrip('/')
         self.token: Optional[str] = None
+        # Respostas GET por (url, parâmetros): (ETag, JSON)
+        self._cache_etag: Dict[Tuple[str, Tuple], Tuple[str, Any]] = {}
     
     def set_token(self, token: str):
         """Define o token de autenticação"""
         self.token = token
+        self._cache_etag.clear()
     
     def clear_token(self):
         """Remove o token de autenticação"""
         self.token = None
+        self._cache_etag.clear()
     
     def get_headers(self) -> Dict[str, str]:
         """Retorna os headers para as requisições"""
@@ -23,6 +29,26 @@ class APIClient:
             headers['Authorization'] = f'Bearer {self.token}'
         return headers
     
+    def _get_json(self, url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """GET condicional: reaproveita a última resposta quando o servidor devolve 304"""
+        chave = (url, tuple(sorted((params or {}).items())))
+        headers = self.get_headers()
+        anterior = self._cache_etag.get(chave)
+        if anterior:
+            headers['If-None-Match'] = anterior[0]
+        
+        response = requests.get(url, headers=headers, params=params)
+        if response.status_code == 304 and anterior:
+            return anterior[1]
+        response.raise_for_status()
+        dados = response.json()
+        if response.headers.get('ETag'):
+            self._cache_etag.pop(chave, None)
+            self._cache_etag[chave] = (response.headers['ETag'], dados)
+            if len(self._cache_etag) > self.MAX_RESPOSTAS_CACHE:
+                self._cache_etag.pop(next(iter(self._cache_etag)))  # Remove a mais antiga
+        return dados
+    
     def login(self, email: str, senha: str) -> Dict[str, Any]:
         """Realiza o login do usuário"""
         response = requests.post(
@@ -51,13 +77,93 @@ class APIClient:
         response.raise_for_status()
         return response.json()
     
-    def listar_transacoes(self, filtros: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def listar_transacoes_pagina(self, filtros: Optional[Dict[str, Any]] = None,
+                                 cursor: Optional[str] = None,
+                                 limit: Optional[int] = None) -> Dict[str, Any]:
+        """Obtém uma página de transações e o cursor da próxima página"""
+        params = dict(filtros or {})
+        if cursor:
+            params['cursor'] = cursor
+        if limit:
+            params['limit'] = limit
+        
+        return self._get_json(f'{self.base_url}/transacoes', params)
+    
+    def buscar_transacoes(self, texto: str, filtros: Optional[Dict[str, Any]] = None,
+                          cursor: Optional[str] = None,
+                          limit: Optional[int] = None) -> Dict[str, Any]:
+        """Busca textual na descrição: uma página ordenada por relevância e o cursor da próxima"""
+        params = dict(filtros or {})
+        params['q'] = texto
+        return self.listar_transacoes_pagina(params, cursor, limit)
+    
+    def iterar_transacoes(self, filtros: Optional[Dict[str, Any]] = None,
+                          limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Percorre todas as transações seguindo os cursores de paginação"""
+        cursor = None
+        while True:
+            pagina = self.listar_transacoes_pagina(filtros, cursor, limit)
+            yield from pagina['transacoes']
+            cursor = pagina.get('next_cursor')
+            if not cursor:
+                break
+    
+    def _get_ndjson(self, url: str, params: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """GET em modo NDJSON: decodifica cada linha conforme ela chega"""
+        headers = self.get_headers()
+        headers['Accept'] = 'application/x-ndjson'
+        with requests.get(url, headers=headers, params=params, stream=True) as response:
+            response.raise_for_status()
+            for linha in response.iter_lines():
+                if linha:
+                    yield json.loads(linha)
+    
+    def transmitir_transacoes(self, filtros: Optional[Dict[str, Any]] = None,
+                              cursor: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Percorre todo o histórico de transações em uma única resposta NDJSON"""
+        params = dict(filtros or {})
+        if cursor:
+            params['cursor'] = cursor
+        return self._get_ndjson(f'{self.base_url}/transacoes', params)
+    
+    def transmitir_relatorio_fluxo(self, filtros: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """Relatório de fluxo em NDJSON: registros 'periodo', 'transacao' e, por último, 'total'"""
+        return self._get_ndjson(f'{self.base_url}/relatorios/fluxo', filtros)
+    
+    def listar_transacoes(self, filtros: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """Lista todas as transações"""
-        response = requests.get(
-            f'{self.base_url}/transacoes',
-            headers=self.get_headers(),
-            params=filtros
-        )
+        return list(self.iterar_transacoes(filtros))
+    
+    def exportar_transacoes(self, caminho: str, formato: str = 'csv',
+                            filtros: Optional[Dict[str, Any]] = None) -> None:
+        """Baixa a exportação (csv, parquet ou xlsx) gravando os blocos direto no arquivo"""
+        params = dict(filtros or {})
+        params['formato'] = formato
+        with requests.get(f'{self.base_url}/transacoes/exportar', headers=self.get_headers(),
+                          params=params, stream=True) as response:
+            response.raise_for_status()
+            with open(caminho, 'wb') as arquivo:
+                for bloco in response.iter_content(chunk_size=64 * 1024):
+                    arquivo.write(bloco)
+    
+    def importar_transacoes(self, caminho: str, formato: Optional[str] = None,
+                            lote: Optional[int] = None) -> Dict[str, Any]:
+        """Envia um arquivo CSV, NDJSON ou OFX para importação em massa"""
+        params = {}
+        if formato:
+            params['formato'] = formato
+        if lote:
+            params['lote'] = lote
+        
+        # Sem Content-Type JSON: o requests monta o multipart
+        headers = {k: v for k, v in self.get_headers().items() if k != 'Content-Type'}
+        with open(caminho, 'rb') as arquivo:
+            response = requests.post(
+                f'{self.base_url}/transacoes/importar',
+                headers=headers,
+                params=params,
+                files={'arquivo': arquivo}
+            )
         response.raise_for_status()
         return response.json()
     
@@ -80,6 +186,28 @@ class APIClient:
         response.raise_for_status()
         return response.json()
     
+    def atualizar_transacoes(self, campos: Dict[str, Any], ids: Optional[List[int]] = None,
+                             filtros: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Atualiza em massa as transações selecionadas por ids e/ou filtros"""
+        response = requests.patch(
+            f'{self.base_url}/transacoes',
+            headers=self.get_headers(),
+            json={'campos': campos, 'ids': ids, 'filtros': filtros}
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    def deletar_transacoes(self, ids: Optional[List[int]] = None,
+                           filtros: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Deleta em massa as transações selecionadas por ids e/ou filtros"""
+        response = requests.delete(
+            f'{self.base_url}/transacoes',
+            headers=self.get_headers(),
+            json={'ids': ids, 'filtros': filtros}
+        )
+        response.raise_for_status()
+        return response.json()
+    
     def listar_categorias(self) -> Dict[str, Any]:
         """Lista todas as categorias"""
         response = requests.get(
@@ -99,6 +227,32 @@ class APIClient:
         response.raise_for_status()
         return response.json()
     
+    def obter_categoria(self, categoria_id: int) -> Dict[str, Any]:
+        """Obtém uma categoria da lista do usuário"""
+        for categoria in self.listar_categorias():
+            if categoria['id'] == categoria_id:
+                return categoria
+        raise ValueError(f'Categoria {categoria_id} não encontrada')
+    
+    def atualizar_categoria(self, categoria_id: int, dados: Dict[str, Any]) -> Dict[str, Any]:
+        """Renomeia ou move uma categoria"""
+        response = requests.put(
+            f'{self.base_url}/categorias/{categoria_id}',
+            headers=self.get_headers(),
+            json=dados
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    def deletar_categoria(self, categoria_id: int) -> Dict[str, Any]:
+        """Remove a categoria e todas as subcategorias"""
+        response = requests.delete(
+            f'{self.base_url}/categorias/{categoria_id}',
+            headers=self.get_headers()
+        )
+        response.raise_for_status()
+        return response.json()
+    
     def obter_relatorio_fluxo(self, filtros: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Obtém o relatório de fluxo de caixa"""
         if filtros:
@@ -106,13 +260,7 @@ class APIClient:
             filtros['data_inicio'] = quote(filtros['data_inicio'])
             filtros['data_fim'] = quote(filtros['data_fim'])
         
-        response = requests.get(
-            f'{self.base_url}/relatorios/fluxo',
-            headers=self.get_headers(),
-            params=filtros
-        )
-        response.raise_for_status()
-        return response.json()
+        return self._get_json(f'{self.base_url}/relatorios/fluxo', filtros)
     
     def obter_relatorio_categorias(self, filtros: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Obtém o relatório por categorias"""
@@ -120,10 +268,19 @@ class APIClient:
             filtros['data_inicio'] = quote(filtros['data_inicio'])
             filtros['data_fim'] = quote(filtros['data_fim'])
         
-        response = requests.get(
-            f'{self.base_url}/relatorios/categorias',
-            headers=self.get_headers(),
-            params=filtros
-        )
-        response.raise_for_status()
-        return response.json() 
\ No newline at end of file
+        return self._get_json(f'{self.base_url}/relatorios/categorias', filtros)
+    
+    def obter_dashboard(self, periodo: str = '30d', pontos: Optional[int] = None) -> Dict[str, Any]:
+        """Resumo, série de saldo e despesas por categoria dos últimos dias em uma única chamada"""
+        params: Dict[str, Any] = {'periodo': periodo}
+        if pontos:
+            params['pontos'] = pontos
+        return self._get_json(f'{self.base_url}/dashboard', params)
+    
+    def obter_relatorio_estatisticas(self, filtros: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Saldo acumulado, médias móveis das despesas, variação mensal por categoria e percentis"""
+        return self._get_json(f'{self.base_url}/relatorios/estatisticas', filtros)
+    
+    def obter_relatorio_categorias_arvore(self, filtros: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Obtém o relatório por categorias com os totais acumulados das subcategorias"""
+        return self._get_json(f'{self.base_url}/relatorios/categorias/arvore', filtros)
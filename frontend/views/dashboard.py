@@ -2,7 +2,7 @@ import customtkinter as ctk
 from typing import TYPE_CHECKING
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from datetime import datetime, timedelta
+from datetime import datetime
 from tkinter import messagebox
 
 if TYPE_CHECKING:
@@ -69,69 +69,32 @@ class DashboardView(ctk.CTkFrame):
     def atualizar(self):
         """Atualiza os dados do dashboard"""
         try:
-            # Obtém dados do último mês
-            data_fim = datetime.now()
-            data_inicio = data_fim - timedelta(days=30)
-            
-            # Formata as datas corretamente
-            data_inicio_str = data_inicio.strftime('%Y-%m-%d')
-            data_fim_str = data_fim.strftime('%Y-%m-%d')
-            
-            # Obtém relatório de fluxo
-            fluxo = self.controller.api_client.obter_relatorio_fluxo({
-                'data_inicio': data_inicio_str,
-                'data_fim': data_fim_str
-            })
-            
-            # Verifica se a resposta contém uma mensagem
-            if 'mensagem' in fluxo:
-                messagebox.showinfo("Informação", fluxo['mensagem'])
-                self.saldo_label.config(text="Saldo: R$ 0,00")
-                self.receitas_label.config(text="Receitas: R$ 0,00")
-                self.despesas_label.config(text="Despesas: R$ 0,00")
-                return
+            # Resumo, série de saldo e despesas por categoria do último mês em uma única chamada
+            dashboard = self.controller.api_client.obter_dashboard('30d')
             
             # Atualiza labels
-            self.saldo_label.config(text=f"Saldo: R$ {fluxo['saldo']:.2f}")
-            self.receitas_label.config(text=f"Receitas: R$ {fluxo['receitas']:.2f}")
-            self.despesas_label.config(text=f"Despesas: R$ {fluxo['despesas']:.2f}")
-            
-            # Atualiza gráfico de fluxo
-            self.atualizar_grafico_fluxo(fluxo['transacoes'])
-            
-            # Obtém e atualiza gráfico de categorias
-            categorias = self.controller.api_client.obter_relatorio_categorias({
-                'data_inicio': data_inicio_str,
-                'data_fim': data_fim_str
-            })
+            self.saldo_label.config(text=f"Saldo: R$ {dashboard['saldo']:.2f}")
+            self.receitas_label.config(text=f"Receitas: R$ {dashboard['receitas']:.2f}")
+            self.despesas_label.config(text=f"Despesas: R$ {dashboard['despesas']:.2f}")
             
-            # Verifica se as categorias contêm dados
-            if 'mensagem' in categorias:
-                messagebox.showinfo("Informação", categorias['mensagem'])
+            if not dashboard['receitas'] and not dashboard['despesas']:
+                messagebox.showinfo("Informação", "Nenhuma transação encontrada para o período especificado.")
                 return
             
-            self.atualizar_grafico_categorias(categorias)
+            self.atualizar_grafico_fluxo(dashboard['serie'])
+            self.atualizar_grafico_categorias(dashboard['categorias'])
             
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao atualizar dashboard: {str(e)}")
     
-    def atualizar_grafico_fluxo(self, transacoes):
+    def atualizar_grafico_fluxo(self, serie):
         """Atualiza o gráfico de fluxo de caixa"""
         self.fig_fluxo.clear()
         ax = self.fig_fluxo.add_subplot(111)
         
-        # Organiza transações por data
-        datas = []
-        valores = []
-        saldo_acumulado = 0
-        
-        for t in sorted(transacoes, key=lambda x: x['data']):
-            datas.append(datetime.strptime(t['data'], '%Y-%m-%d'))
-            if t['tipo'] == 'receita':
-                saldo_acumulado += t['valor']
-            else:
-                saldo_acumulado -= t['valor']
-            valores.append(saldo_acumulado)
+        # O saldo acumulado já vem calculado (e reduzido) pela API
+        datas = [datetime.strptime(d, '%Y-%m-%d') for d in serie['datas']]
+        valores = serie['saldo']
         
         ax.plot(datas, valores)
         ax.set_title('Evolução do Saldo')
@@ -12,6 +12,8 @@ if TYPE_CHECKING:
     from main import MainApplication
 
 class RelatoriosView(ctk.CTkFrame):
+    GRANULARIDADES = {"Dia": "dia", "Semana": "semana", "Mês": "mes", "Ano": "ano"}
+    
     def __init__(self, parent, controller: 'MainApplication'):
         super().__init__(parent)
         self.controller = controller
@@ -30,6 +32,12 @@ class RelatoriosView(ctk.CTkFrame):
         self.data_fim = DateEntry(filtros_frame, width=12, locale='pt_BR')
         self.data_fim.pack(side="left", padx=5)
         
+        # Granularidade do fluxo de caixa
+        ctk.CTkLabel(filtros_frame, text="Agrupar por:").pack(side="left", padx=5)
+        self.granularidade = ctk.CTkComboBox(filtros_frame, values=["Dia", "Semana", "Mês", "Ano"], state="readonly", width=10)
+        self.granularidade.set("Dia")
+        self.granularidade.pack(side="left", padx=5)
+        
         # Botão de atualizar
         ctk.CTkButton(filtros_frame, text="Atualizar", command=self.atualizar).pack(side="left", padx=5)
         ctk.CTkButton(filtros_frame, text="Exportar CSV", command=self.exportar_csv).pack(side="right", padx=5)
@@ -103,8 +111,11 @@ class RelatoriosView(ctk.CTkFrame):
             }
             
             # Atualizar relatório de fluxo
-            fluxo = self.controller.api_client.obter_relatorio_fluxo(filtros)
-            self.atualizar_grafico_fluxo(fluxo['transacoes'])
+            fluxo = self.controller.api_client.obter_relatorio_fluxo({
+                **filtros,
+                'granularidade': self.GRANULARIDADES[self.granularidade.get()]
+            })
+            self.atualizar_grafico_fluxo(fluxo['serie'])
             
             # Atualizar relatório de categorias
             categorias = self.controller.api_client.obter_relatorio_categorias(filtros)
@@ -116,24 +127,20 @@ class RelatoriosView(ctk.CTkFrame):
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao atualizar relatórios: {str(e)}")
     
-    def atualizar_grafico_fluxo(self, transacoes):
+    def atualizar_grafico_fluxo(self, serie):
         """Atualiza o gráfico de fluxo de caixa"""
         self.fig_fluxo.clear()
         ax = self.fig_fluxo.add_subplot(111)
         
-        # Organizar transações por data
-        df = pd.DataFrame(transacoes)
-        df['data'] = pd.to_datetime(df['data'])
-        df['valor'] = df.apply(lambda x: x['valor'] if x['tipo'] == 'receita' else -x['valor'], axis=1)
-        
-        # Calcular saldo acumulado
-        df = df.sort_values('data')
-        df['saldo_acumulado'] = df['valor'].cumsum()
+        # Períodos já agregados pela API, com saldo acumulado
+        df = pd.DataFrame(serie)
+        df['periodo'] = pd.to_datetime(df['periodo'])
+        df['valor'] = df['receitas'] - df['despesas']
         
         # Plotar gráfico
-        ax.plot(df['data'], df['saldo_acumulado'], label='Saldo')
-        ax.bar(df['data'], df['valor'], alpha=0.3, 
-               color=df['valor'].apply(lambda x: 'green' if x > 0 else 'red'))
+        ax.plot(df['periodo'], df['saldo'], label='Saldo')
+        ax.bar(df['periodo'], df['valor'], alpha=0.3, 
+               color=['green' if v > 0 else 'red' for v in df['valor']])
         
         ax.set_title('Fluxo de Caixa')
         ax.set_xlabel('Data')
@@ -187,11 +194,11 @@ class RelatoriosView(ctk.CTkFrame):
             ))
     
     def exportar_csv(self):
-        """Exporta os dados do período para CSV"""
+        """Exporta as transações do período (CSV, Excel ou Parquet, pela extensão escolhida)"""
         try:
             filename = filedialog.asksaveasfilename(
                 defaultextension=".csv",
-                filetypes=[("CSV files", "*.csv")],
+                filetypes=[("CSV files", "*.csv"), ("Excel files", "*.xlsx"), ("Parquet files", "*.parquet")],
                 title="Exportar Relatório"
             )
             
@@ -203,14 +210,10 @@ class RelatoriosView(ctk.CTkFrame):
                 'data_fim': self.data_fim.get_date().strftime('%Y-%m-%d')
             }
             
-            # Obter dados
-            transacoes = self.controller.api_client.listar_transacoes(filtros)
-            
-            # Criar DataFrame
-            df = pd.DataFrame(transacoes)
-            
-            # Salvar CSV
-            df.to_csv(filename, index=False)
+            # O servidor gera o arquivo e os bytes vão direto para o disco
+            extensao = filename.rsplit('.', 1)[-1].lower()
+            formato = extensao if extensao in ('csv', 'xlsx', 'parquet') else 'csv'
+            self.controller.api_client.exportar_transacoes(filename, formato, filtros)
             messagebox.showinfo("Sucesso", "Relatório exportado com sucesso!")
             
         except Exception as e:
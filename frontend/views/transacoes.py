@@ -122,6 +122,7 @@ class TransacoesView(ctk.CTkFrame):
         ctk.CTkButton(btn_frame, text="Nova Transação", command=self.nova_transacao).pack(side="left", padx=5)
         ctk.CTkButton(btn_frame, text="Editar", command=self.editar_transacao).pack(side="left", padx=5)
         ctk.CTkButton(btn_frame, text="Excluir", command=self.excluir_transacao).pack(side="left", padx=5)
+        ctk.CTkButton(btn_frame, text="Alterar Categoria", command=self.alterar_categoria).pack(side="left", padx=5)
         
         # Frame de filtros
         filtros_frame = ctk.CTkLabelFrame(self, text="Filtros")
@@ -177,8 +178,7 @@ class TransacoesView(ctk.CTkFrame):
             messagebox.showwarning("Aviso", "Selecione uma transação para editar")
             return
         
-        item_id = selection[0]
-        transacao_id = self.tree.item(item_id)['values'][0]
+        transacao_id = int(selection[0])
         
         try:
             transacao = self.controller.api_client.obter_transacao(transacao_id)
@@ -197,16 +197,42 @@ class TransacoesView(ctk.CTkFrame):
             messagebox.showwarning("Aviso", "Selecione uma transação para excluir")
             return
         
-        if messagebox.askyesno("Confirmar", "Deseja realmente excluir esta transação?"):
-            item_id = selection[0]
-            transacao_id = self.tree.item(item_id)['values'][0]
-            
+        mensagem = ("Deseja realmente excluir esta transação?" if len(selection) == 1
+                    else f"Deseja realmente excluir as {len(selection)} transações selecionadas?")
+        if messagebox.askyesno("Confirmar", mensagem):
             try:
-                self.controller.api_client.deletar_transacao(transacao_id)
+                # Uma única requisição para toda a seleção
+                self.controller.api_client.deletar_transacoes(ids=[int(i) for i in selection])
                 self.atualizar()
             except Exception as e:
                 messagebox.showerror("Erro", f"Erro ao excluir transação: {str(e)}")
     
+    def alterar_categoria(self):
+        """Move as transações selecionadas para outra categoria"""
+        selection = self.tree.selection()
+        if not selection:
+            messagebox.showwarning("Aviso", "Selecione as transações para alterar")
+            return
+        
+        nome = ctk.CTkInputDialog(text="Nome da nova categoria:", title="Alterar Categoria").get_input()
+        if not nome:
+            return
+        
+        try:
+            categorias = self.controller.api_client.listar_categorias()
+            categoria_id = next((c['id'] for c in categorias if c['nome'] == nome), None)
+            if categoria_id is None:
+                messagebox.showerror("Erro", f"Categoria não encontrada: {nome}")
+                return
+            
+            self.controller.api_client.atualizar_transacoes(
+                {'categoria_id': categoria_id},
+                ids=[int(i) for i in selection]
+            )
+            self.atualizar()
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao alterar categoria: {str(e)}")
+    
     def atualizar(self):
         """Atualiza a lista de transações"""
         for item in self.tree.get_children():
@@ -224,7 +250,8 @@ class TransacoesView(ctk.CTkFrame):
             transacoes = self.controller.api_client.listar_transacoes(filtros)
             
             for t in transacoes:
-                self.tree.insert("", "end", values=(
+                # O iid da linha é o id da transação, usado nas ações em massa
+                self.tree.insert("", "end", iid=str(t['id']), values=(
                     t['data_transacao'],
                     t['tipo'].capitalize(),
                     f"R$ {t['valor']:.2f}",